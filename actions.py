@@ -1,11 +1,16 @@
 from config import *
+from turn_clock import TurnTimeout
+from commands import COMMAND_HELP, CommandError, parse_commands
+from forecast import describe_recruitment
 import os
 
 class ActionHandler:
-    def __init__(self, game_state, verbose_logging=True):
+    def __init__(self, game_state, verbose_logging=True, turn_clock=None, script=None):
         self.game_state = game_state
         self.renderer = None  # Will be set by main game loop
         self.verbose_logging = verbose_logging
+        self.turn_clock = turn_clock  # Optional time limit per turn
+        self.script = list(script or [])  # Input lines fed before reading from the keyboard
     
     def set_renderer(self, renderer):
         """Set the renderer reference"""
@@ -16,17 +21,36 @@ class ActionHandler:
         if not self.verbose_logging:
             os.system('clear')
     
-    def handle_player_actions(self, player):
-        """Handle player input and actions"""
+    def read(self, prompt):
+        """Read a line of player input: from the script while it lasts, then
+        through the turn clock when there is one"""
+        if self.script:
+            line = self.script.pop(0)
+            print(f"{prompt}{line}")
+            return line
+        if self.turn_clock is not None:
+            return self.turn_clock.input(prompt)
+        return input(prompt)
+    
+    def handle_player_actions(self, player, background_tasks=()):
+        """Handle player input and actions.
+        
+        With a turn clock, background_tasks run while the player is typing.
+        """
+        self.game_state.deliver_messages(player)
+        if self.turn_clock is not None:
+            self.turn_clock.start(background_tasks)
         while True:
             # Display game state with last action result
             self.renderer.display_game_state(self.game_state, player, show_action_result=True)
             self.renderer.display_action_menu()
             
             try:
-                choice = input("\nChoose an action (1-6): ").strip()
+                choice = self.read("\nChoose an action (1-7) or type commands: ").strip()
                 
-                if choice == "1":
+                if not choice:
+                    continue
+                elif choice == "1":
                     self.handle_send_message(player)
                     self.clear_console_if_needed()
                 elif choice == "2":
@@ -42,76 +66,231 @@ class ActionHandler:
                     self.handle_send_tribute(player)
                     self.clear_console_if_needed()
                 elif choice == "6":
+                    self.handle_diplomacy(player)
+                    self.clear_console_if_needed()
+                elif choice == "7":
                     break  # End turn
-                else:
-                    print("Invalid choice. Please try again.")
+                elif self.run_commands(player, choice):
+                    break  # The command line ended the turn
                     
-            except KeyboardInterrupt:
+            except TurnTimeout:
+                self.renderer.set_last_action_result("Time ran out; your turn ended.", self.game_state.turn)
+                break
+            except (KeyboardInterrupt, EOFError):
                 print("\nGame interrupted.")
                 exit()
             except Exception as e:
                 print(f"Error: {e}")
     
+    def run_commands(self, player, line):
+        """Run a line of commands (see commands.COMMAND_HELP); True if it ended the turn.
+        
+        All results are shown together on the next redraw.
+        """
+        try:
+            commands = parse_commands(line)
+        except CommandError as e:
+            self.renderer.set_last_action_result(str(e), self.game_state.turn)
+            return False
+        
+        results = []
+        end_turn = False
+        for verb, args in commands:
+            if verb == "end":
+                end_turn = True
+                break
+            if verb == "help":
+                results.append(COMMAND_HELP)
+                continue
+            if verb == "recruit":
+                results.append(self.do_recruit(player, args[0]))
+                continue
+            if verb == "dismiss":
+                results.append(self.do_dismiss(player, args[0]))
+                continue
+            target, *rest = args
+            if verb == "msg" and target.lower() in ("all", "everyone", "*"):
+                results.append(self.do_broadcast(player, rest[0]))
+                continue
+            neighbor = self.resolve_target(target)
+            if neighbor is None:
+                results.append(f"No neighbor matches '{target}'.")
+            elif verb == "msg":
+                results.append(self.do_message(player, neighbor, rest[0]))
+            elif verb == "attack":
+                results.append(self.do_attack(player, neighbor, rest[0]))
+            elif verb == "tribute":
+                results.append(self.do_tribute(player, neighbor, *rest))
+            elif verb == "propose":
+                results.append(self.do_propose(player, neighbor, rest[0]))
+            elif verb == "cancel":
+                results.append(self.do_cancel(player, neighbor, rest[0]))
+            elif verb == "pledge":
+                results.append(self.do_pledge(player, neighbor, *rest))
+        
+        if results:
+            self.renderer.set_last_action_result("\n  ".join(results), self.game_state.turn)
+        return end_turn
+    
+    def resolve_target(self, token):
+        """A neighbor by menu number, full name, or unambiguous part of the name"""
+        neighbors = self.game_state.neighbors
+        if token.isdigit():
+            index = int(token) - 1
+            return neighbors[index] if 0 <= index < len(neighbors) else None
+        token = token.lower()
+        for neighbor in neighbors:
+            if neighbor.name.lower() == token:
+                return neighbor
+        matches = [n for n in neighbors if any(word.startswith(token) for word in n.name.lower().split())]
+        return matches[0] if len(matches) == 1 else None
+    
+    # Actions shared by the menus and the command line; each returns the result text
+    
+    def do_message(self, player, recipient, message):
+        if recipient.name in player.messages_sent_this_turn:
+            return f"You've already sent a message to {recipient.name} this turn."
+        if player.send_message(recipient.name, message):
+            return f"Message sent to {recipient.name}!"
+        return "Failed to send message."
+    
+    def do_broadcast(self, player, message):
+        names = player.broadcast_message(message)
+        if names:
+            return f"Message sent to {', '.join(names)}!"
+        return "You've already messaged everyone this turn."
+    
+    def do_recruit(self, player, amount):
+        if amount <= 0:
+            return "Recruit at least one soldier."
+        if player.recruit_soldiers(amount):
+            return f"Recruited {amount} soldiers!"
+        return "Cannot recruit that many soldiers. Check your peasants and finances."
+    
+    def do_dismiss(self, player, amount):
+        if amount <= 0:
+            return "Dismiss at least one soldier."
+        if player.dismiss_soldiers(amount):
+            return f"Dismissed {amount} soldiers!"
+        return "Cannot dismiss that many soldiers."
+    
+    def attack_limits(self, player):
+        """(min, max) attack force: at least MIN_ATTACK_FORCE, at most 80% of the army"""
+        return self.game_state.config.MIN_ATTACK_FORCE, min(player.soldiers, int(player.soldiers * 0.8))
+    
+    def do_attack(self, player, target, attack_force):
+        min_attack, max_attack = self.attack_limits(player)
+        if player.soldiers < min_attack:
+            return f"You need at least {min_attack} soldiers to launch an attack!"
+        if not min_attack <= attack_force <= max_attack:
+            return f"Attack force must be between {min_attack} and {max_attack}."
+        if player.attack_target(target.name, attack_force):
+            # Queue the attack to be resolved with others
+            return f"Attack queued! You will attack {target.name} with {attack_force} soldiers at the end of the turn."
+        # Check if it's because they already attacked this turn
+        if target.name in player.attacks_sent_this_turn:
+            return f"You have already attacked {target.name} this turn. You can only attack each player once per turn."
+        if self.game_state.diplomacy.blocks_attack(player.name, target.name):
+            return f"You have a non-aggression pact with {target.name}. Cancel it before attacking."
+        if not self.game_state.in_reach(player, target):
+            return self.out_of_reach(player, target)
+        return "Failed to launch attack."
+    
+    def do_tribute(self, player, recipient, land_amount, peasant_amount):
+        if land_amount < 0 or land_amount > player.land:
+            return "Invalid land amount."
+        if peasant_amount < 0 or peasant_amount > player.peasants:
+            return "Invalid peasant amount."
+        # Check if at least something is being sent
+        if land_amount == 0 and peasant_amount == 0:
+            return "Must send at least some land or peasants."
+        if not self.game_state.in_reach(player, recipient):
+            return self.out_of_reach(player, recipient)
+        if player.send_tribute(recipient.name, land_amount, peasant_amount):
+            return f"Tribute sent to {recipient.name}: {land_amount} land, {peasant_amount} peasants"
+        return "Failed to send tribute."
+    
+    def out_of_reach(self, player, target):
+        nearby = ", ".join(entity.name for entity in self.game_state.nearby(player))
+        return (f"{target.name} is more than {self.game_state.config.MAP_RADIUS} borders away. "
+                f"Realms in reach: {nearby or 'none'}.")
+    
+    def do_propose(self, player, target, treaty):
+        outcome = player.propose_treaty(target.name, treaty)
+        if outcome == 'signed':
+            return f"{target.name} accepted: the {treaty} is now in force."
+        if outcome == 'active':
+            return f"You already have a {treaty} with {target.name}."
+        if outcome is None:
+            return "Invalid treaty offer."
+        return f"Offered a {treaty} to {target.name}. It takes effect if they propose it back."
+    
+    def do_cancel(self, player, target, treaty):
+        if player.cancel_treaty(target.name, treaty):
+            return f"Cancelled the {treaty} with {target.name}."
+        return f"You have no {treaty} with {target.name}."
+    
+    def do_pledge(self, player, target, land_amount, peasant_amount):
+        if player.pledge_tribute(target.name, land_amount, peasant_amount):
+            return f"Pledged {land_amount} land and {peasant_amount} peasants to {target.name} every turn."
+        if not self.game_state.in_reach(player, target):
+            return self.out_of_reach(player, target)
+        return "Invalid tribute pledge."
+    
     def handle_send_message(self, player):
         """Handle sending a message"""
+        neighbors = self.game_state.neighbors
         print("\nAvailable recipients:")
-        for i, neighbor in enumerate(self.game_state.neighbors, 1):
+        for i, neighbor in enumerate(neighbors, 1):
             print(f"{i}. {neighbor.name}")
+        print(f"{len(neighbors) + 1}. Everyone")
         
         try:
-            choice = int(input("Choose recipient (1-3): ")) - 1
-            if 0 <= choice < len(self.game_state.neighbors):
-                recipient = self.game_state.neighbors[choice]
+            choice = int(self.read(f"Choose recipient (1-{len(neighbors) + 1}): ")) - 1
+            if choice == len(neighbors):
+                result = self.do_broadcast(player, self.read("Enter your message: "))
+            elif 0 <= choice < len(neighbors):
+                recipient = neighbors[choice]
                 if recipient.name not in player.messages_sent_this_turn:
-                    message = input("Enter your message: ")
-                    if player.send_message(recipient.name, message):
-                        result = f"Message sent to {recipient.name}!"
-                        self.renderer.set_last_action_result(result, self.game_state.turn)
-                    else:
-                        result = "Failed to send message."
-                        self.renderer.set_last_action_result(result, self.game_state.turn)
+                    result = self.do_message(player, recipient, self.read("Enter your message: "))
                 else:
                     result = f"You've already sent a message to {recipient.name} this turn."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
             else:
                 result = "Invalid choice."
-                self.renderer.set_last_action_result(result, self.game_state.turn)
         except ValueError:
             result = "Please enter a valid number."
-            self.renderer.set_last_action_result(result, self.game_state.turn)
+        self.renderer.set_last_action_result(result, self.game_state.turn)
+    
+    def recruit_preview(self, player, turns=5):
+        """Forecast lines for a few recruitment sizes up to the most the player can afford now"""
+        most = max(0, min(player.peasants, player.net_food // self.game_state.config.FOOD_PER_SOLDIER))
+        amounts = sorted({0, most // 4, most // 2, most})
+        lines = [f"You can recruit up to {most} soldiers now. Forecast, if you recruit:"]
+        lines += [f"  {line}" for line in describe_recruitment(player, amounts, turns, self.game_state.config)]
+        return "\n".join(lines)
     
     def handle_recruit_soldiers(self, player):
         """Handle recruiting soldiers"""
+        print(self.recruit_preview(player))
         try:
-            amount = int(input("How many soldiers to recruit? "))
-            if player.recruit_soldiers(amount):
-                result = f"Recruited {amount} soldiers!"
-                self.renderer.set_last_action_result(result, self.game_state.turn)
-            else:
-                result = "Cannot recruit that many soldiers. Check your peasants and finances."
-                self.renderer.set_last_action_result(result, self.game_state.turn)
+            result = self.do_recruit(player, int(self.read("How many soldiers to recruit? ")))
         except ValueError:
             result = "Please enter a valid number."
-            self.renderer.set_last_action_result(result, self.game_state.turn)
+        self.renderer.set_last_action_result(result, self.game_state.turn)
     
     def handle_dismiss_soldiers(self, player):
         """Handle dismissing soldiers"""
         try:
-            amount = int(input("How many soldiers to dismiss? "))
-            if player.dismiss_soldiers(amount):
-                result = f"Dismissed {amount} soldiers!"
-                self.renderer.set_last_action_result(result, self.game_state.turn)
-            else:
-                result = "Cannot dismiss that many soldiers."
-                self.renderer.set_last_action_result(result, self.game_state.turn)
+            result = self.do_dismiss(player, int(self.read("How many soldiers to dismiss? ")))
         except ValueError:
             result = "Please enter a valid number."
-            self.renderer.set_last_action_result(result, self.game_state.turn)
+        self.renderer.set_last_action_result(result, self.game_state.turn)
     
     def handle_attack(self, player):
         """Handle attacking a neighbor"""
-        if player.soldiers < MIN_ATTACK_FORCE:
-            result = f"You need at least {MIN_ATTACK_FORCE} soldiers to launch an attack!"
+        min_attack, max_attack = self.attack_limits(player)
+        if player.soldiers < min_attack:
+            result = f"You need at least {min_attack} soldiers to launch an attack!"
             self.renderer.set_last_action_result(result, self.game_state.turn)
             return
         
@@ -121,39 +300,20 @@ class ActionHandler:
             print(f"{i}. {neighbor.name} ({relative_power} power)")
         
         try:
-            choice = int(input("Choose target (1-3): ")) - 1
+            choice = int(self.read(f"Choose target (1-{len(self.game_state.neighbors)}): ")) - 1
             if 0 <= choice < len(self.game_state.neighbors):
                 target = self.game_state.neighbors[choice]
                 
                 print(f"\nYou have {player.soldiers} soldiers available.")
                 print(f"{target.name} has {target.soldiers} soldiers.")
                 
-                max_attack = min(player.soldiers, int(player.soldiers * 0.8))  # Max 80% of army
-                min_attack = MIN_ATTACK_FORCE
-                
-                attack_force = int(input(f"How many soldiers to attack with? ({min_attack}-{max_attack}): "))
-                
-                if min_attack <= attack_force <= max_attack:
-                    if player.attack_target(target.name, attack_force):
-                        # Queue the attack to be resolved with others
-                        result = f"Attack queued! You will attack {target.name} with {attack_force} soldiers at the end of the turn."
-                        self.renderer.set_last_action_result(result, self.game_state.turn)
-                    else:
-                        # Check if it's because they already attacked this turn
-                        if target.name in player.attacks_sent_this_turn:
-                            result = f"You have already attacked {target.name} this turn. You can only attack each player once per turn."
-                        else:
-                            result = "Failed to launch attack."
-                        self.renderer.set_last_action_result(result, self.game_state.turn)
-                else:
-                    result = f"Attack force must be between {min_attack} and {max_attack}."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
+                attack_force = int(self.read(f"How many soldiers to attack with? ({min_attack}-{max_attack}): "))
+                result = self.do_attack(player, target, attack_force)
             else:
                 result = "Invalid choice."
-                self.renderer.set_last_action_result(result, self.game_state.turn)
         except ValueError:
             result = "Please enter a valid number."
-            self.renderer.set_last_action_result(result, self.game_state.turn)
+        self.renderer.set_last_action_result(result, self.game_state.turn)
     
     
     def handle_send_tribute(self, player):
@@ -163,7 +323,7 @@ class ActionHandler:
             print(f"{i}. {neighbor.name}")
         
         try:
-            choice = int(input("Choose recipient (1-3): ")) - 1
+            choice = int(self.read(f"Choose recipient (1-{len(self.game_state.neighbors)}): ")) - 1
             if 0 <= choice < len(self.game_state.neighbors):
                 recipient = self.game_state.neighbors[choice]
                 
@@ -171,36 +331,50 @@ class ActionHandler:
                 print(f"{recipient.name}'s resources: {recipient.land} land, {recipient.peasants} peasants")
                 
                 # Get land amount
-                land_amount = int(input(f"How much land to send? (0-{player.land}): "))
+                land_amount = int(self.read(f"How much land to send? (0-{player.land}): "))
                 if land_amount < 0 or land_amount > player.land:
                     result = "Invalid land amount."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
-                    return
-                
-                # Get peasant amount
-                peasant_amount = int(input(f"How many peasants to send? (0-{player.peasants}): "))
-                if peasant_amount < 0 or peasant_amount > player.peasants:
-                    result = "Invalid peasant amount."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
-                    return
-                
-                # Check if at least something is being sent
-                if land_amount == 0 and peasant_amount == 0:
-                    result = "Must send at least some land or peasants."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
-                    return
-                
-                # Send tribute
-                if player.send_tribute(recipient.name, land_amount, peasant_amount):
-                    result = f"Tribute sent to {recipient.name}: {land_amount} land, {peasant_amount} peasants"
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
                 else:
-                    result = "Failed to send tribute."
-                    self.renderer.set_last_action_result(result, self.game_state.turn)
+                    # Get peasant amount
+                    peasant_amount = int(self.read(f"How many peasants to send? (0-{player.peasants}): "))
+                    result = self.do_tribute(player, recipient, land_amount, peasant_amount)
+            else:
+                result = "Invalid choice."
+        except ValueError:
+            result = "Please enter valid numbers."
+        self.renderer.set_last_action_result(result, self.game_state.turn)
+    
+    def handle_diplomacy(self, player):
+        """Handle treaties and recurring tribute"""
+        print("\nRealms:")
+        for i, neighbor in enumerate(self.game_state.neighbors, 1):
+            print(f"{i}. {neighbor.name}: {self.game_state.diplomacy.describe(player.name, neighbor.name)}")
+        
+        try:
+            choice = int(self.read(f"Choose realm (1-{len(self.game_state.neighbors)}): ")) - 1
+            if not 0 <= choice < len(self.game_state.neighbors):
+                self.renderer.set_last_action_result("Invalid choice.", self.game_state.turn)
+                return
+            target = self.game_state.neighbors[choice]
+            
+            print("\n1. Propose alliance")
+            print("2. Propose non-aggression pact")
+            print("3. Cancel alliance")
+            print("4. Cancel non-aggression pact")
+            print("5. Pledge tribute every turn")
+            action = self.read("Choose (1-5): ").strip()
+            
+            if action in ("1", "2"):
+                result = self.do_propose(player, target, "alliance" if action == "1" else "non_aggression")
+            elif action in ("3", "4"):
+                result = self.do_cancel(player, target, "alliance" if action == "3" else "non_aggression")
+            elif action == "5":
+                land_amount = int(self.read("Land to pay each turn (0 to stop): "))
+                peasant_amount = int(self.read("Peasants to pay each turn (0 to stop): "))
+                result = self.do_pledge(player, target, land_amount, peasant_amount)
             else:
                 result = "Invalid choice."
-                self.renderer.set_last_action_result(result, self.game_state.turn)
+            self.renderer.set_last_action_result(result, self.game_state.turn)
         except ValueError:
             result = "Please enter valid numbers."
             self.renderer.set_last_action_result(result, self.game_state.turn)
-    
\ No newline at end of file
@@ -0,0 +1,150 @@
+# Deciding whether an LLM neighbor needs to think this turn
+import threading
+from dataclasses import dataclass
+from config import *
+
+ACTIVATION_MODES = ("always", "events")
+QUIET_ACTIONS = ("hold", "recruit")
+
+
+@dataclass
+class TurnSignals:
+    """What changed for a neighbor since it last thought"""
+    attacks_received: int = 0
+    attacks_made: int = 0
+    messages: int = 0
+    proposals: int = 0           # treaty offers waiting for an answer
+    resource_change: float = 0.0  # largest relative change in land, peasants or soldiers
+    quiet_turns: int = 0         # turns in a row the neighbor has not thought
+    first_turn: bool = False     # the neighbor has never thought yet
+    player_messages: int = 0     # messages from the human player
+    tribute_received: float = 0.0  # value of tribute received since the neighbor's last turn (land at TRIBUTE_LAND_VALUE)
+    overwhelming_gap: bool = False  # some rival is overwhelmingly stronger or weaker
+
+
+def gather_signals(neighbor):
+    """Signals for a neighbor from the event journal: last combat, inbox, offers and resources"""
+    game_state = neighbor.game_state
+    signals = TurnSignals(messages=len(neighbor.inbox), quiet_turns=neighbor.quiet_turns)
+    if game_state.player is not None:
+        signals.player_messages = sum(1 for message in neighbor.inbox if message['sender'] == game_state.player.name)
+
+    batch = game_state.last_combat
+    if batch is not None and len(batch):
+        signals.attacks_received = len(batch.battles_involving(neighbor, as_attacker=False))
+        signals.attacks_made = len(batch.battles_involving(neighbor, as_defender=False))
+
+    diplomacy = game_state.diplomacy
+    me = diplomacy.index[neighbor.name]
+    signals.proposals = int(sum((proposals[:, me] > 0).sum() for proposals in diplomacy.proposals.values()))
+    signals.tribute_received = float(diplomacy.received[me])
+
+    table = game_state.get_power_table()
+    names = game_state.config.POWER_BUCKET_NAMES
+    overwhelming = len(names) - 1
+    me_in_table = table['index'][id(neighbor)]
+    if table['buckets'] is not None:
+        signals.overwhelming_gap = bool((table['buckets'][:, me_in_table] == overwhelming).any()
+                                        or (table['buckets'][me_in_table] == overwhelming).any())
+    else:  # Large map: only realms in reach matter
+        signals.overwhelming_gap = any(
+            names[overwhelming] in (game_state.get_relative_power(neighbor, rival),
+                                                 game_state.get_relative_power(rival, neighbor))
+            for rival in game_state.nearby(neighbor))
+
+    previous = getattr(neighbor, '_previous_resources', None)
+    if previous is None:
+        signals.first_turn = True
+    else:
+        signals.resource_change = max(
+            abs(getattr(neighbor, resource) - before) / max(before, 1)
+            for resource, before in previous.items()
+        )
+    return signals
+
+
+def remember_resources(neighbor):
+    """Baseline for the next turn's resource_change, taken after the neighbor's own actions
+    so that only what others and the economy did to it counts as a change"""
+    neighbor._previous_resources = {
+        'land': neighbor.land,
+        'peasants': neighbor.peasants,
+        'soldiers': neighbor.soldiers
+    }
+
+
+class ActivationPolicy:
+    """Decides which neighbor turns need the LLM and keeps count of the rest.
+
+    mode "always" thinks every turn. mode "events" thinks on the first turn
+    and afterwards only when the neighbor was attacked or attacked, got
+    messages, treaty offers or tribute, saw a resource move by more than
+    resource_threshold, or has been quiet for max_quiet_turns turns in a row.
+    Quiet turns run a deterministic routine: "hold" does nothing, "recruit"
+    recruits a share of what food allows.
+    """
+
+    def __init__(self, mode="always", resource_threshold=0.1, max_quiet_turns=5, quiet_action="recruit",
+                 recruit_share=0.25):
+        if mode not in ACTIVATION_MODES:
+            raise ValueError(f"Unknown activation mode {mode!r}")
+        if quiet_action not in QUIET_ACTIONS:
+            raise ValueError(f"Unknown quiet action {quiet_action!r}")
+        self.mode = mode
+        self.resource_threshold = resource_threshold
+        self.max_quiet_turns = max_quiet_turns
+        self.quiet_action = quiet_action
+        self.recruit_share = recruit_share
+        self.lock = threading.Lock()
+        self.thought = 0
+        self.skipped = 0
+
+    def reason_to_think(self, signals):
+        """Why the neighbor should think this turn, or None for a quiet turn"""
+        if self.mode == "always":
+            return "always"
+        if signals.first_turn:
+            return "first turn"
+        if signals.attacks_received:
+            return "attacked"
+        if signals.attacks_made:
+            return "fought"
+        if signals.messages:
+            return "messages"
+        if signals.proposals:
+            return "treaty offers"
+        if signals.tribute_received:
+            return "tribute received"
+        if signals.resource_change > self.resource_threshold:
+            return "resources changed"
+        if signals.quiet_turns >= self.max_quiet_turns:
+            return "quiet too long"
+        return None
+
+    def decide(self, signals):
+        reason = self.reason_to_think(signals)
+        with self.lock:
+            if reason is None:
+                self.skipped += 1
+            else:
+                self.thought += 1
+        return reason
+
+    def routine(self, neighbor):
+        """Deterministic default action for a quiet turn; returns a result line"""
+        if self.quiet_action == "hold":
+            return "Holds position."
+        config = neighbor.game_state.config
+        amount = int(min(neighbor.peasants, max(neighbor.net_food, 0) // config.FOOD_PER_SOLDIER) * self.recruit_share)
+        if amount <= 0:
+            return "Holds position."
+        return neighbor.recruit_soldiers(amount)
+
+    @property
+    def skip_rate(self):
+        total = self.thought + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def summary(self):
+        total = self.thought + self.skipped
+        return f"LLM turns skipped: {self.skipped} of {total} ({self.skip_rate:.0%})"
@@ -0,0 +1,274 @@
+# The neighbors' agent loop, built once per process and shared by every neighbor.
+#
+# Tools wrap LLMNeighbor methods without binding them to an instance, the
+# graph's nodes are plain functions, and the neighbor a run belongs to is
+# looked up from config["configurable"]["neighbor"], so the tool schemas, the
+# system prompt, the tool-bound models and the compiled graph do not grow
+# with the number of neighbors.
+import itertools
+import threading
+import weakref
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool, create_schema_from_function
+from langgraph.graph import StateGraph, START, END, MessagesState
+from langgraph.prebuilt import tools_condition
+
+_neighbors = weakref.WeakValueDictionary()  # registry key -> LLMNeighbor
+_keys = itertools.count(1)
+_lock = threading.Lock()
+_tools = {}  # neighbor class -> tools
+_graphs = {}  # id(checkpointer) -> (checkpointer, compiled graph)
+_bound = {}  # (id(model), what) -> (model, model with tools bound)
+_system_prompt = None
+
+
+def register(neighbor):
+    """Make a neighbor reachable from graph config; returns its registry key"""
+    key = f"neighbor-{next(_keys)}"
+    _neighbors[key] = neighbor
+    return key
+
+
+def neighbor_for(config):
+    return _neighbors[config["configurable"]["neighbor"]]
+
+
+def system_prompt():
+    """Contents of system_prompt.txt, read once"""
+    global _system_prompt
+    if _system_prompt is None:
+        with open("system_prompt.txt", "r", encoding="utf-8") as f:
+            _system_prompt = f.read()
+    return _system_prompt
+
+
+def method_tool(cls, name, description):
+    """A tool calling cls.<name> on the neighbor named in the run's config"""
+    method = getattr(cls, name)
+    schema = create_schema_from_function(name, method, filter_args=["self"])
+
+    def run(config: RunnableConfig, **kwargs):
+        return method(neighbor_for(config), **kwargs)
+
+    return StructuredTool(name=name, description=description, args_schema=schema, func=run)
+
+
+def shared_tools(cls):
+    """The tools of a neighbor class, built once"""
+    with _lock:
+        if cls not in _tools:
+            _tools[cls] = [method_tool(cls, name, description) for name, description in TOOLS]
+        return _tools[cls]
+
+
+def bind_once(model, what, bind):
+    """bind(model), computed once per model instance (e.g. its bind_tools output)"""
+    key = (id(model), what)
+    with _lock:
+        if key not in _bound:
+            _bound[key] = (model, bind(model))  # Keeping the model keeps its id from being reused
+        return _bound[key][1]
+
+
+def shared_graph(checkpointer):
+    """The compiled agent <-> tools graph for a checkpointer, built once"""
+    with _lock:
+        if id(checkpointer) not in _graphs:
+            graph = StateGraph(MessagesState)
+            graph.add_node("agent", agent_node)
+            graph.add_node("tools", tool_node)
+
+            # start -> agent
+            graph.add_edge(START, "agent")
+
+            # if model calls a tool, go to tools node; else, end
+            graph.add_conditional_edges(
+                "agent",
+                tools_condition,
+                {"tools": "tools", "__end__": END}
+            )
+
+            # after running tools, go back to agent
+            graph.add_edge("tools", "agent")
+            _graphs[id(checkpointer)] = (checkpointer, graph.compile(checkpointer=checkpointer))
+        return _graphs[id(checkpointer)][1]
+
+
+# (LLMNeighbor method, description) of every tool, in the order the model sees them
+TOOLS = [
+    ("recruit_soldiers",
+     "Recruit soldiers from peasants. Reduces peasants and increases soldiers. Since there are fewer peasants you will make less taxes and pay upkeep on soldiers."),
+    ("dismiss_soldiers",
+     "Dismiss soldiers back to peasants. Peasants can't fight, but they make money for you. This will increase your peasants and decrease your soldiers."),
+    ("forecast_recruitment",
+     "Forecast your peasants, soldiers, net food and power after some turns (default 5, max 20) for each candidate number of soldiers recruited now (negative numbers dismiss; up to 10 candidates, include 0 for a baseline). Exact and free: use it instead of doing the economy arithmetic yourself."),
+    ("send_message",
+     "Send a diplomatic message to another entity. This is FREE and has NO COST. Use this to negotiate, threaten, form alliances, gather information, or respond to other players. You can only message each entity once per turn, so make it count! Messages are your primary tool for diplomacy and can prevent wars or secure tribute."),
+    ("broadcast_message",
+     "Send the same diplomatic message to several entities in one call: list their names in recipient_names, or leave it empty to address everyone. FREE. Counts as this turn's message to each recipient. Use it for announcements instead of many send_message calls."),
+    ("attack_target",
+     "Attack another entity with your soldiers. It is easier to defend than to attack, but if you attack somebody successfully you take some of their land."),
+    ("send_tribute",
+     "Send tribute (land or peasants) to another entity. This can be used for diplomacy, trade, alliances, or to avoid conflict."),
+    ("propose_treaty",
+     "Offer a binding treaty to another entity: 'alliance' (allies lend a quarter of their soldiers to each other's defense) or 'non_aggression' (neither side can attack the other). The treaty takes effect once the other side proposes the same treaty back."),
+    ("cancel_treaty",
+     "Cancel an 'alliance' or 'non_aggression' treaty. Required before attacking someone you have a pact with. Breaking treaties costs trust."),
+    ("pledge_tribute",
+     "Promise to pay land and peasants to another entity every turn, e.g. as the price of peace. Pledge 0 land and 0 peasants to stop. Failing to pay costs trust."),
+    ("get_relevant_rules",
+     "Retrieve the most relevant game rules or policies for a question. Call this BEFORE deciding actions if you're unsure what's allowed, what's efficient, or what is strategically wise."),
+    ("get_player_info",
+     "Get detailed information about another player including their resources, military strength, economy, and diplomatic relations. Use this to assess other players before making diplomatic or military decisions."),
+]
+
+
+def agent_node(state: MessagesState, config: RunnableConfig):
+    neighbor = neighbor_for(config)
+    if neighbor.verbose_logging:
+        print(f"\n🤖 AGENT NODE - Processing message for {neighbor.name}...")
+    messages = state["messages"]
+    if neighbor.verbose_logging:
+        print(f"📝 Input messages count: {len(messages)}")
+
+    try:
+        # Add system message at the beginning
+        messages_with_system = [SystemMessage(content=neighbor.static_prompt)] + messages
+
+        response = neighbor.llm.invoke(messages_with_system)
+        if neighbor.verbose_logging:
+            print(f"✅ Agent response generated successfully")
+            print(f"📤 Response type: {type(response)}")
+            if hasattr(response, 'tool_calls') and response.tool_calls:
+                print(f"🔧 Tool calls requested: {len(response.tool_calls)}")
+                for i, tool_call in enumerate(response.tool_calls):
+                    print(f"   Tool {i+1}: {tool_call['name']} with args: {tool_call['args']}")
+            else:
+                print("💬 No tool calls - direct response")
+        elif not neighbor.verbose_logging:
+            # Print succinct action summaries based on tool calls
+            if hasattr(response, 'tool_calls') and response.tool_calls:
+                for tool_call in response.tool_calls:
+                    tool_name = tool_call['name']
+                    tool_args = tool_call['args']
+
+                    if tool_name == 'recruit_soldiers':
+                        amount = tool_args.get('amount', 0)
+                        print(f"{neighbor.name} recruited {amount} soldiers")
+                    elif tool_name == 'dismiss_soldiers':
+                        amount = tool_args.get('amount', 0)
+                        print(f"{neighbor.name} dismissed {amount} soldiers")
+                    elif tool_name == 'send_message':
+                        recipient = tool_args.get('recipient_name', 'someone')
+                        print(f"{neighbor.name} sent a message to {recipient}")
+                    elif tool_name == 'broadcast_message':
+                        recipients = tool_args.get('recipient_names') or ['everyone']
+                        print(f"{neighbor.name} sent a message to {', '.join(recipients)}")
+                    elif tool_name == 'attack_target':
+                        target = tool_args.get('target_name', 'someone')
+                        attack_force = tool_args.get('attack_force', 'unknown')
+                        print(f"{neighbor.name} attacked {target} with {attack_force} soldiers")
+                    elif tool_name == 'send_tribute':
+                        recipient = tool_args.get('recipient_name', 'someone')
+                        land = tool_args.get('land_amount', 0)
+                        peasants = tool_args.get('peasant_amount', 0)
+                        print(f"{neighbor.name} sent tribute to {recipient}: {land} land, {peasants} peasants")
+                    elif tool_name == 'propose_treaty':
+                        target = tool_args.get('target_name', 'someone')
+                        print(f"{neighbor.name} proposed a {tool_args.get('treaty', 'treaty')} to {target}")
+                    elif tool_name == 'cancel_treaty':
+                        target = tool_args.get('target_name', 'someone')
+                        print(f"{neighbor.name} cancelled its {tool_args.get('treaty', 'treaty')} with {target}")
+                    elif tool_name == 'pledge_tribute':
+                        recipient = tool_args.get('recipient_name', 'someone')
+                        land = tool_args.get('land_per_turn', 0)
+                        peasants = tool_args.get('peasants_per_turn', 0)
+                        print(f"{neighbor.name} pledged {land} land, {peasants} peasants per turn to {recipient}")
+                    elif tool_name == 'get_player_info':
+                        player = tool_args.get('player_name', 'someone')
+                        print(f"{neighbor.name} gathered intelligence on {player}")
+                    elif tool_name == 'get_relevant_rules':
+                        print(f"{neighbor.name} consulted the rulebook")
+            else:
+                print(f"{neighbor.name} finished their turn")
+
+        return {"messages": [response]}
+    except Exception as e:
+        print(f"❌ Error in agent node: {e}")
+        raise
+
+
+def tool_node(state: MessagesState, config: RunnableConfig):
+    neighbor = neighbor_for(config)
+    tools = shared_tools(type(neighbor))
+    if neighbor.verbose_logging:
+        print(f"\n🔧 TOOL NODE - Executing tools...")
+    messages = state["messages"]
+
+    # Find the last message with tool calls
+    last_message = messages[-1]
+    if not hasattr(last_message, 'tool_calls') or not last_message.tool_calls:
+        if neighbor.verbose_logging:
+            print("⚠️ No tool calls found in last message")
+        return {"messages": []}
+
+    if neighbor.verbose_logging:
+        print(f"🎯 Found {len(last_message.tool_calls)} tool calls to execute")
+
+    tool_results = []
+    for i, tool_call in enumerate(last_message.tool_calls):
+        tool_name = tool_call['name']
+        tool_args = tool_call['args']
+        tool_id = tool_call['id']
+
+        if neighbor.verbose_logging:
+            print(f"\n🔨 Executing Tool {i+1}/{len(last_message.tool_calls)}:")
+            print(f"   Name: {tool_name}")
+            print(f"   Args: {tool_args}")
+            print(f"   ID: {tool_id}")
+
+        try:
+            # Find the tool function
+            tool_func = None
+            for tool in tools:
+                if tool.name == tool_name:
+                    tool_func = tool
+                    break
+
+            if not tool_func:
+                error_msg = f"Tool '{tool_name}' not found"
+                if neighbor.verbose_logging:
+                    print(f"❌ {error_msg}")
+                tool_results.append(ToolMessage(
+                    content=error_msg,
+                    tool_call_id=tool_id
+                ))
+                continue
+
+            # Execute the tool
+            if neighbor.verbose_logging:
+                print(f"⚡ Executing {tool_name}...")
+            result = tool_func.invoke(tool_args, config=config)
+            if neighbor.verbose_logging:
+                print(f"✅ Tool {tool_name} executed successfully")
+                print(f"📊 Result type: {type(result)}")
+                print(f"📄 Result preview: {result}")
+
+            tool_results.append(ToolMessage(
+                content=str(result),
+                tool_call_id=tool_id
+            ))
+
+        except Exception as e:
+            error_msg = f"Error executing {tool_name}: {str(e)}"
+            if neighbor.verbose_logging:
+                print(f"❌ {error_msg}")
+            tool_results.append(ToolMessage(
+                content=error_msg,
+                tool_call_id=tool_id
+            ))
+
+    if neighbor.verbose_logging:
+        print(f"🏁 Tool execution completed. {len(tool_results)} results generated")
+    return {"messages": tool_results}
@@ -0,0 +1,132 @@
+# Record and replay of LLM calls, for offline, deterministic and fast re-runs
+import hashlib
+import json
+import os
+import threading
+import time
+from langchain_core.callbacks import CallbackManager
+from langchain_core.messages import HumanMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import ensure_config
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def fingerprint(messages, tools=None, tool_choice=None, model=None):
+    """Stable hash of a request: the model, the messages and the tools bound to it"""
+    request = {
+        'model': model,
+        'messages': [
+            {
+                'type': message.type,
+                'content': message.content,
+                'tool_calls': [{'name': call['name'], 'args': call['args']} for call in getattr(message, 'tool_calls', None) or []],
+                'tool_call_id': getattr(message, 'tool_call_id', None),
+            }
+            for message in messages
+        ],
+        'tools': tools or [],
+        'tool_choice': tool_choice,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Cassette:
+    """A file of recorded LLM responses keyed by request fingerprint.
+
+    mode "record" calls the real model and appends every exchange to the file;
+    mode "replay" serves responses from the file without touching the network.
+    The same request asked several times is answered with its recordings in
+    order. latency_scale replays the recorded latency (1.0), a fraction of it,
+    or none at all (0). Recording refuses to replace an existing file unless
+    overwrite is set.
+    """
+
+    def __init__(self, path, mode="replay", latency_scale=0.0, overwrite=False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        if mode == "record" and os.path.exists(path) and not overwrite:
+            raise FileExistsError(f"Cassette {path} already exists")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.lock = threading.Lock()
+        self.recordings = {}  # fingerprint -> [(response dict, seconds)]
+        self.served = {}      # fingerprint -> recordings used so far
+
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.recordings.setdefault(entry['key'], []).append((entry['response'], entry['seconds']))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def wrap(self, llm, model=None):
+        """Route a chat model's calls through this cassette (llm may be None in replay mode)"""
+        return CassetteLLM(self, llm, model=model)
+
+    def play(self, key):
+        with self.lock:
+            takes = self.recordings.get(key)
+            if not takes:
+                raise CassetteMiss(f"No recorded response for request {key[:12]} in {self.path}")
+            used = self.served.get(key, 0)
+            response, seconds = takes[min(used, len(takes) - 1)]
+            self.served[key] = used + 1
+        if self.latency_scale:
+            time.sleep(seconds * self.latency_scale)
+        return messages_from_dict([response])[0]
+
+    def record(self, key, response, seconds):
+        entry = {'key': key, 'response': message_to_dict(response), 'seconds': seconds}
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class CassetteLLM:
+    """Stand-in for a chat model that records to, or replays from, a cassette.
+
+    Supports the calls the neighbors make: invoke() and bind_tools(). Replayed
+    responses go through the same callbacks as a real call, so usage logs
+    and routers see the recorded token usage.
+    """
+
+    def __init__(self, cassette, llm, tools=None, tool_choice=None, model=None):
+        self.cassette = cassette
+        self.llm = llm
+        self.model = model
+        self.tools = tools
+        self.tool_choice = tool_choice
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        bound = self.llm.bind_tools(tools, tool_choice=tool_choice, **kwargs) if self.llm is not None else None
+        return CassetteLLM(self.cassette, bound, [convert_to_openai_tool(tool) for tool in tools], tool_choice, self.model)
+
+    def invoke(self, messages, config=None, **kwargs):
+        if isinstance(messages, str):
+            messages = [HumanMessage(content=messages)]
+        key = fingerprint(messages, self.tools, self.tool_choice, self.model)
+        if self.cassette.mode == "replay":
+            return self.replay(key, messages, config)
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, config, **kwargs)
+        self.cassette.record(key, response, time.perf_counter() - start)
+        return response
+
+    def replay(self, key, messages, config=None):
+        config = ensure_config(config)
+        callbacks = CallbackManager.configure(config.get("callbacks"), inheritable_tags=config.get("tags"),
+                                              inheritable_metadata=config.get("metadata"))
+        (run,) = callbacks.on_chat_model_start({"name": type(self).__name__}, [messages])
+        try:
+            response = self.cassette.play(key)
+        except CassetteMiss as error:
+            run.on_llm_error(error)
+            raise
+        run.on_llm_end(LLMResult(generations=[[ChatGeneration(message=response)]]))
+        return response
@@ -0,0 +1,294 @@
+# Pluggable, bounded checkpoint storage for the neighbors' LangGraph agents
+import random
+import sqlite3
+import threading
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class PrunedSqliteSaver(BaseCheckpointSaver):
+    """SQLite checkpoint saver that keeps only the latest checkpoints per thread.
+
+    Channel values are stored once per channel version, so a checkpoint only
+    writes the channels that changed since its parent (a delta), like the
+    in-memory saver does. After every put the thread is trimmed to its
+    keep_last newest checkpoints, and every compact_every puts channel
+    versions no longer referenced by a kept checkpoint are deleted.
+
+    Use a file path to keep agent history across restarts, or ":memory:"
+    for bounded in-process storage.
+    """
+
+    def __init__(self, path, keep_last=10, compact_every=20, serde=None):
+        super().__init__(serde=serde)
+        self.keep_last = keep_last
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.puts_since_compaction = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    # --- reads ---
+
+    def _load_blobs(self, thread_id, checkpoint_ns, versions):
+        values = {}
+        for channel, version in versions.items():
+            row = self.conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id=? AND checkpoint_ns=? AND channel=? AND version=?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row and row[0] != "empty":
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _load_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        rows = self.conn.execute(
+            "SELECT task_id, channel, type, blob FROM writes "
+            "WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id=? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, self.serde.loads_typed((kind, blob))) for task_id, channel, kind, blob in rows]
+
+    def _to_tuple(self, thread_id, checkpoint_ns, row):
+        checkpoint_id, parent_checkpoint_id, kind, checkpoint, metadata_type, metadata = row
+        checkpoint = self.serde.loads_typed((kind, checkpoint))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_checkpoint_id,
+                }}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id=?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._to_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id=?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns=?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id=?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id<?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+            tuples = []
+            for thread_id, checkpoint_ns, *row in rows:
+                checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, row)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(checkpoint_tuple)
+                if limit is not None and len(tuples) >= limit:
+                    break
+        yield from tuples
+
+    # --- writes ---
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+
+        with self.lock:
+            # Only the channels that changed since the parent checkpoint are written
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (thread_id, checkpoint_ns, channel, str(version),
+                     *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+                    for channel, version in new_versions.items()
+                ],
+            )
+            kind, data = self.serde.dumps_typed(stored)
+            metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 kind, data, metadata_type, metadata_data),
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self.conn.commit()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, *self.serde.dumps_typed(value), task_path))
+        with self.lock:
+            # Special channels (errors, interrupts) replace; regular writes are kept from the first attempt
+            self.conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [row for row in rows if row[4] < 0])
+            self.conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [row for row in rows if row[4] >= 0])
+            self.conn.commit()
+
+    def delete_thread(self, thread_id):
+        with self.lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id=?", (thread_id,))
+            self.conn.commit()
+
+    def thread_bytes(self, thread_id):
+        """Bytes of serialized checkpoints, channel values and writes stored for a thread"""
+        with self.lock:
+            return sum(self.conn.execute(query, (thread_id,)).fetchone()[0] or 0 for query in (
+                "SELECT SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints WHERE thread_id=?",
+                "SELECT SUM(LENGTH(blob)) FROM blobs WHERE thread_id=?",
+                "SELECT SUM(LENGTH(blob)) FROM writes WHERE thread_id=?",
+            ))
+
+    def get_next_version(self, current, channel):
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- retention ---
+
+    def _prune(self, thread_id, checkpoint_ns):
+        """Keep the newest keep_last checkpoints of a thread; compact blobs now and then"""
+        self.conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? "
+            "ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last),
+        )
+        self.conn.execute(
+            "DELETE FROM writes WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id=? AND checkpoint_ns=?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+        )
+        key = (thread_id, checkpoint_ns)
+        self.puts_since_compaction[key] = self.puts_since_compaction.get(key, 0) + 1
+        if self.puts_since_compaction[key] >= self.compact_every:
+            self._compact(thread_id, checkpoint_ns)
+            self.puts_since_compaction[key] = 0
+
+    def _compact(self, thread_id, checkpoint_ns):
+        """Delete channel versions that no kept checkpoint refers to"""
+        referenced = set()
+        rows = self.conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id=? AND checkpoint_ns=?",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        for kind, data in rows:
+            for channel, version in self.serde.loads_typed((kind, data))["channel_versions"].items():
+                referenced.add((channel, str(version)))
+        stored = self.conn.execute(
+            "SELECT channel, version FROM blobs WHERE thread_id=? AND checkpoint_ns=?",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        self.conn.executemany(
+            "DELETE FROM blobs WHERE thread_id=? AND checkpoint_ns=? AND channel=? AND version=?",
+            [(thread_id, checkpoint_ns, channel, version) for channel, version in stored
+             if (channel, version) not in referenced],
+        )
+
+
+def make_checkpointer(path=None, keep_last=10):
+    """Checkpoint backend for the neighbors' agents.
+
+    No path keeps LangGraph's unbounded InMemorySaver; a path (or ":memory:")
+    selects the pruned SQLite store.
+    """
+    if path is None:
+        return InMemorySaver()
+    return PrunedSqliteSaver(path, keep_last=keep_last)
@@ -0,0 +1,200 @@
+import numpy as np
+from config import *
+
+# Spoils a victorious attacker takes, as (cap, divisor) of what the defender held
+LAND_SPOILS = (50, 4)
+PEASANT_SPOILS = (200, 4)
+
+
+def win_probability(attack_force, defender_soldiers, reinforcements=0, config=DEFAULT_CONFIG):
+    """Chance that an attack succeeds (works on scalars or arrays)"""
+    attack_power = np.asarray(attack_force, dtype=np.float64) * config.ATTACKER_PENALTY
+    defense_power = (np.asarray(defender_soldiers, dtype=np.float64) + reinforcements) * config.DEFENDER_BONUS
+    total_power = attack_power + defense_power
+    return np.divide(attack_power, total_power, out=np.full(np.shape(total_power), 0.5), where=total_power > 0)
+
+
+def prorate(claims, owners, available, size):
+    """Scale integer claims down so no owner gives up more than it has"""
+    requested = np.bincount(owners, weights=claims, minlength=size)
+    scale = np.ones(size)
+    np.divide(available, requested, out=scale, where=requested > available)
+    return np.floor(claims * scale[owners]).astype(np.int64)
+
+
+def resolve_battles(land, peasants, soldiers, attackers, defenders, forces, rng, reinforcements=0, config=DEFAULT_CONFIG):
+    """Resolve a batch of attacks simultaneously.
+
+    All battles see the resources every entity held at the start of the batch,
+    so the outcome does not depend on the order attacks were queued in. Spoils
+    and losses are summed per entity and prorated so that an entity attacked
+    several times can never lose more than it had. Reinforcements (soldiers
+    lent by allies) add to a defense but never take losses.
+    """
+    size = len(land)
+    defender_soldiers = soldiers[defenders]
+
+    attacker_won = rng.random(len(forces)) < win_probability(forces, defender_soldiers, reinforcements, config)
+
+    land_claims = np.where(attacker_won, np.minimum(LAND_SPOILS[0], land[defenders] // LAND_SPOILS[1]), 0)
+    peasant_claims = np.where(attacker_won, np.minimum(PEASANT_SPOILS[0], peasants[defenders] // PEASANT_SPOILS[1]), 0)
+    land_gained = prorate(land_claims, defenders, land, size)
+    peasants_gained = prorate(peasant_claims, defenders, peasants, size)
+
+    # Winners lose a third of the attacking force, losers half; defenders the reverse
+    attacker_losses = np.where(attacker_won, forces // 3, forces // 2)
+    defender_losses = np.where(attacker_won, defender_soldiers // 2, defender_soldiers // 4)
+    losses = prorate(
+        np.concatenate([attacker_losses, defender_losses]),
+        np.concatenate([attackers, defenders]),
+        soldiers,
+        size,
+    )
+    attacker_losses, defender_losses = losses[:len(forces)], losses[len(forces):]
+
+    new_land = land + np.bincount(attackers, weights=land_gained, minlength=size).astype(np.int64) \
+        - np.bincount(defenders, weights=land_gained, minlength=size).astype(np.int64)
+    new_peasants = peasants + np.bincount(attackers, weights=peasants_gained, minlength=size).astype(np.int64) \
+        - np.bincount(defenders, weights=peasants_gained, minlength=size).astype(np.int64)
+    new_soldiers = soldiers - np.bincount(attackers, weights=attacker_losses, minlength=size).astype(np.int64) \
+        - np.bincount(defenders, weights=defender_losses, minlength=size).astype(np.int64)
+
+    outcome = {
+        'attacker_won': attacker_won,
+        'land_gained': land_gained,
+        'peasants_gained': peasants_gained,
+        'attacker_losses': attacker_losses,
+        'defender_losses': defender_losses,
+    }
+    return new_land, new_peasants, np.maximum(new_soldiers, 0), outcome
+
+
+class CombatBatch:
+    """Outcome of one simultaneous combat resolution.
+
+    Results stay as arrays; the human-readable text is only built when
+    someone asks for it through the render methods.
+    """
+
+    def __init__(self, entities, attackers, defenders, forces, outcome):
+        self.entities = entities
+        self.attackers = attackers
+        self.defenders = defenders
+        self.forces = forces
+        self.attacker_won = outcome['attacker_won']
+        self.land_gained = outcome['land_gained']
+        self.peasants_gained = outcome['peasants_gained']
+        self.attacker_losses = outcome['attacker_losses']
+        self.defender_losses = outcome['defender_losses']
+        self._rendered = None
+
+    def __len__(self):
+        return len(self.forces)
+
+    def _battle(self, i):
+        """Plain Python values for battle i"""
+        return (
+            self.entities[self.attackers[i]],
+            self.entities[self.defenders[i]],
+            bool(self.attacker_won[i]),
+            int(self.land_gained[i]),
+            int(self.peasants_gained[i]),
+            int(self.attacker_losses[i]),
+            int(self.defender_losses[i]),
+        )
+
+    def battles_involving(self, entity, as_attacker=True, as_defender=True):
+        """Indices of battles the entity fought in"""
+        index = self.entities.index(entity)
+        mask = np.zeros(len(self), dtype=bool)
+        if as_attacker:
+            mask |= self.attackers == index
+        if as_defender:
+            mask |= self.defenders == index
+        return np.flatnonzero(mask)
+
+    def render(self):
+        """Combat results for every battle, as display text"""
+        if self._rendered is None:
+            self._rendered = [self.render_battle(i) for i in range(len(self))]
+        return self._rendered
+
+    def render_battle(self, i):
+        """Neutral description of battle i"""
+        attacker, defender, won, land, peasants, attacker_losses, defender_losses = self._battle(i)
+        losses = f"{attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
+        if not won:
+            return f"{defender.name} repels {attacker.name}'s attack! {losses}"
+        if land > 0 and peasants > 0:
+            return f"{attacker.name} defeats {defender.name}! Gains {land} acres and {peasants} peasants. {losses}"
+        elif land > 0:
+            return f"{attacker.name} defeats {defender.name}! Gains {land} acres (defender had no peasants). {losses}"
+        elif peasants > 0:
+            return f"{attacker.name} defeats {defender.name}! Gains {peasants} peasants (defender had no land). {losses}"
+        return f"{attacker.name} defeats {defender.name}! No resources gained (defender had no land or peasants). {losses}"
+
+    def render_attacks_by(self, entity):
+        """Results of the entity's own attacks, written from its point of view"""
+        results = []
+        for i in self.battles_involving(entity, as_defender=False):
+            _, defender, won, land, peasants, attacker_losses, _ = self._battle(i)
+            if not won:
+                results.append(f"Attack failed! {defender.name} repelled your attack. You lost {attacker_losses} soldiers.")
+            elif land > 0 and peasants > 0:
+                results.append(f"Victory! You gained {land} acres and {peasants} peasants from {defender.name}.")
+            elif land > 0:
+                results.append(f"Victory! You gained {land} acres from {defender.name} (they had no peasants).")
+            elif peasants > 0:
+                results.append(f"Victory! You gained {peasants} peasants from {defender.name} (they had no land).")
+            else:
+                results.append(f"Victory! No resources gained from {defender.name} (they had no land or peasants).")
+        return results
+
+    def render_attacks_on(self, entity):
+        """Results of attacks against the entity, written from its point of view"""
+        results = []
+        for i in self.battles_involving(entity, as_attacker=False):
+            attacker, _, won, land, peasants, attacker_losses, _ = self._battle(i)
+            if not won:
+                results.append(f"Successfully defended against {attacker.name}! They lost {attacker_losses} soldiers.")
+            elif land > 0 and peasants > 0:
+                results.append(f"Defeated by {attacker.name}! Lost {land} acres and {peasants} peasants.")
+            elif land > 0:
+                results.append(f"Defeated by {attacker.name}! Lost {land} acres (you had no peasants).")
+            elif peasants > 0:
+                results.append(f"Defeated by {attacker.name}! Lost {peasants} peasants (you had no land).")
+            else:
+                results.append(f"Defeated by {attacker.name}! No resources lost (you had no land or peasants).")
+        return results
+
+
+def resolve_combat_queue(entities, combat_queue, rng, diplomacy=None, config=DEFAULT_CONFIG):
+    """Resolve queued attacks between entity objects and write results back"""
+    index = {id(entity): i for i, entity in enumerate(entities)}
+    count = len(combat_queue)
+    attackers = np.fromiter((index[id(c['attacker'])] for c in combat_queue), dtype=np.int64, count=count)
+    defenders = np.fromiter((index[id(c['defender'])] for c in combat_queue), dtype=np.int64, count=count)
+    forces = np.fromiter((c['attacker_soldiers'] for c in combat_queue), dtype=np.int64, count=count)
+
+    land = np.fromiter((e.land for e in entities), dtype=np.int64, count=len(entities))
+    peasants = np.fromiter((e.peasants for e in entities), dtype=np.int64, count=len(entities))
+    soldiers = np.fromiter((e.soldiers for e in entities), dtype=np.int64, count=len(entities))
+
+    # An attack can never commit more soldiers than the attacker had at the start of the batch
+    forces = np.minimum(forces, soldiers[attackers])
+
+    reinforcements = 0
+    if diplomacy is not None:
+        reinforcements = diplomacy.ally_support(soldiers, attackers, defenders)
+
+    new_land, new_peasants, new_soldiers, outcome = resolve_battles(
+        land, peasants, soldiers, attackers, defenders, forces, rng, reinforcements, config
+    )
+
+    for i in np.unique(np.concatenate([attackers, defenders])):
+        entity = entities[i]
+        entity.land = int(new_land[i])
+        entity.peasants = int(new_peasants[i])
+        entity.soldiers = int(new_soldiers[i])
+
+    return CombatBatch(entities, attackers, defenders, forces, outcome)
@@ -0,0 +1,125 @@
+# Compact command grammar for the human seat, e.g.
+#   recruit 200; attack 2 300; msg 1 "peace?"; end
+import shlex
+
+COMMAND_HELP = """Commands (separate several with ';'):
+  recruit N                  recruit N soldiers
+  dismiss N                  dismiss N soldiers
+  attack TARGET N            attack with N soldiers
+  msg TARGET|all TEXT        send a message (quote TEXT to include ';')
+  tribute TARGET LAND PEASANTS
+  propose TARGET alliance|nap
+  cancel TARGET alliance|nap
+  pledge TARGET LAND PEASANTS  recurring tribute (0 0 to stop)
+  end                        end the turn
+TARGET is a neighbor's number from the menus or (part of) their name."""
+
+TREATY_NAMES = {"alliance": "alliance", "nap": "non_aggression", "non_aggression": "non_aggression", "pact": "non_aggression"}
+
+# Argument kinds for each verb; "text" takes the rest of the command
+COMMANDS = {
+    "recruit": ("count",),
+    "dismiss": ("count",),
+    "attack": ("target", "count"),
+    "msg": ("target", "text"),
+    "tribute": ("target", "count", "count"),
+    "propose": ("target", "treaty"),
+    "cancel": ("target", "treaty"),
+    "pledge": ("target", "count", "count"),
+    "end": (),
+    "help": (),
+}
+ALIASES = {"message": "msg", "say": "msg", "done": "end", "pass": "end", "?": "help"}
+
+
+class CommandError(ValueError):
+    """A command line that does not follow the grammar"""
+
+
+def parse_commands(line):
+    """Parse a command line into [(verb, args)], or raise CommandError.
+
+    The whole line is checked before anything runs, so a typo late in the
+    line does not leave the turn half done. Targets are returned as typed
+    and resolved against the game by the caller.
+    """
+    return [parse_command(tokenize(command)) for command in split_commands(line)]
+
+
+def split_commands(line):
+    """The line's commands as raw text, split at ';' outside quotes.
+
+    A quote only opens at the start of a word, so apostrophes inside
+    unquoted words (I'm, don't) are plain text.
+    """
+    commands, start, quote = [], 0, None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'" and (i == 0 or line[i - 1].isspace() or line[i - 1] == ";"):
+            quote = char
+        elif char == ";":
+            commands.append(line[start:i])
+            start = i + 1
+    if quote:
+        raise CommandError("Could not read commands: No closing quotation")
+    commands.append(line[start:])
+    return [command.strip() for command in commands if command.strip()]
+
+
+def tokenize(command):
+    """Words of one command; a message is kept as the raw text after its target"""
+    try:
+        lexer = shlex.shlex(command, posix=True)
+        lexer.whitespace_split = True
+        verb = lexer.get_token()
+        if "text" not in COMMANDS.get(ALIASES.get(verb.lower(), verb.lower()), ()):
+            return [verb] + list(lexer)
+        target = lexer.get_token()
+    except ValueError as e:
+        raise CommandError(f"Could not read commands: {e}")
+    text = lexer.instream.read().strip()
+    try:
+        text = " ".join(shlex.split(text))  # Quoted messages lose their quotes
+    except ValueError:
+        pass  # Unquoted text with an apostrophe: take it as typed
+    return [token for token in (verb, target, text) if token]
+
+
+def parse_command(tokens):
+    verb = ALIASES.get(tokens[0].lower(), tokens[0].lower())
+    if verb not in COMMANDS:
+        raise CommandError(f"Unknown command '{tokens[0]}'. Type 'help' for the list.")
+    kinds = COMMANDS[verb]
+    given = tokens[1:]
+    if "text" in kinds:
+        if len(given) < len(kinds):
+            raise CommandError(f"'{verb}' needs a target and a message.")
+        given = given[:len(kinds) - 1] + [" ".join(given[len(kinds) - 1:])]
+    elif len(given) != len(kinds):
+        raise CommandError(f"'{verb}' takes {len(kinds)} argument(s), got {len(given)}.")
+
+    args = []
+    for kind, token in zip(kinds, given):
+        if kind == "count":
+            try:
+                count = int(token)
+            except ValueError:
+                raise CommandError(f"'{token}' is not a whole number (in '{verb}').")
+            if count < 0:
+                raise CommandError(f"'{token}' is negative (in '{verb}').")
+            args.append(count)
+        elif kind == "treaty":
+            if token.lower() not in TREATY_NAMES:
+                raise CommandError(f"Unknown treaty '{token}'; use alliance or nap.")
+            args.append(TREATY_NAMES[token.lower()])
+        else:
+            args.append(token)
+    return verb, args
+
+
+def read_script(path):
+    """Lines of a command script, skipping blank lines and # comments"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
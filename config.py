@@ -1,4 +1,5 @@
 # Game Configuration
+from dataclasses import dataclass
 
 # Starting resources for all entities
 STARTING_LAND = 500
@@ -17,6 +18,71 @@ ATTACKER_PENALTY = 0.8
 DEFENDER_BONUS = 1.2
 MIN_ATTACK_FORCE = 50
 
+# Diplomacy constants
+TRUST_START = 50  # 0-100 scale
+TRUST_BASELINE = 50  # Trust drifts back towards this without events
+TRUST_DECAY = 0.05  # Fraction of the gap to baseline closed each turn
+TRUST_PER_MESSAGE = 1
+TRUST_PER_TRIBUTE = 0.02  # Per peasant sent (land counts TRIBUTE_LAND_VALUE each)
+TRUST_TRIBUTE_CAP = 20  # Most trust tribute can buy in one turn
+TRUST_ATTACK_PENALTY = 25
+TRUST_CANCEL_PENALTY = 15
+TRUST_DEFAULT_PENALTY = 15
+TRIBUTE_LAND_VALUE = 10  # Peasants an acre is worth as tribute
+ALLIANCE_TRUST_BONUS = 1
+ALLIANCE_MIN_TRUST = 25  # Alliances dissolve when either side trusts the other less
+ALLY_DEFENSE_SHARE = 0.25  # Share of each ally's soldiers lent to a defense
+TREATY_PROPOSAL_TURNS = 2  # Turns a treaty offer stays open
+
+# Relative power buckets: ratio thresholds and the names between them
+POWER_BUCKET_THRESHOLDS = [0.3, 0.6, 1.4, 2.0]
+POWER_BUCKET_NAMES = ["Miniscule", "Inferior", "Equal", "Greater", "Overwhelming"]
+
+# Large-map mode: realms on a generated map, interacting only with those nearby
+MAP_DEGREE = 4  # Realms each realm borders (at least; the map is kept connected)
+MAP_RADIUS = 2  # Borders away a realm can still attack or send tribute to
+
 # Game settings
 MAX_NEIGHBORS = 3
-TURN_DELAY = 1  # seconds between turns
\ No newline at end of file
+TURN_DELAY = 1  # seconds between turns
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """Balance settings for one game; defaults are the module constants above.
+    
+    Games read their constants from game_state.config, so games with
+    different settings can run side by side, e.g. in a tournament sweep.
+    """
+    STARTING_LAND: int = STARTING_LAND
+    STARTING_PEASANTS: int = STARTING_PEASANTS
+    STARTING_SOLDIERS: int = STARTING_SOLDIERS
+    PEASANT_GROWTH_RATE: float = PEASANT_GROWTH_RATE
+    PEASANT_GROWTH_RATE_CAPPED: float = PEASANT_GROWTH_RATE_CAPPED
+    PEASANTS_PER_ACRE: int = PEASANTS_PER_ACRE
+    FOOD_PER_PEASANT: int = FOOD_PER_PEASANT
+    FOOD_PER_SOLDIER: int = FOOD_PER_SOLDIER
+    ATTACKER_PENALTY: float = ATTACKER_PENALTY
+    DEFENDER_BONUS: float = DEFENDER_BONUS
+    MIN_ATTACK_FORCE: int = MIN_ATTACK_FORCE
+    TRUST_START: float = TRUST_START
+    TRUST_BASELINE: float = TRUST_BASELINE
+    TRUST_DECAY: float = TRUST_DECAY
+    TRUST_PER_MESSAGE: float = TRUST_PER_MESSAGE
+    TRUST_PER_TRIBUTE: float = TRUST_PER_TRIBUTE
+    TRUST_TRIBUTE_CAP: float = TRUST_TRIBUTE_CAP
+    TRUST_ATTACK_PENALTY: float = TRUST_ATTACK_PENALTY
+    TRUST_CANCEL_PENALTY: float = TRUST_CANCEL_PENALTY
+    TRUST_DEFAULT_PENALTY: float = TRUST_DEFAULT_PENALTY
+    TRIBUTE_LAND_VALUE: int = TRIBUTE_LAND_VALUE
+    ALLIANCE_TRUST_BONUS: float = ALLIANCE_TRUST_BONUS
+    ALLIANCE_MIN_TRUST: float = ALLIANCE_MIN_TRUST
+    ALLY_DEFENSE_SHARE: float = ALLY_DEFENSE_SHARE
+    TREATY_PROPOSAL_TURNS: int = TREATY_PROPOSAL_TURNS
+    POWER_BUCKET_THRESHOLDS: tuple = tuple(POWER_BUCKET_THRESHOLDS)
+    POWER_BUCKET_NAMES: tuple = tuple(POWER_BUCKET_NAMES)
+    MAP_DEGREE: int = MAP_DEGREE
+    MAP_RADIUS: int = MAP_RADIUS
+
+
+DEFAULT_CONFIG = GameConfig()
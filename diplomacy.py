@@ -0,0 +1,222 @@
+import numpy as np
+from config import *
+
+TREATY_TYPES = ("alliance", "non_aggression")
+
+
+class DiplomacyTable:
+    """Relations between every pair of entities.
+
+    Trust, treaties and this turn's events are dense (n, n) arrays indexed
+    by entity position, with row i describing how entity i stands towards
+    entity j. Recurring tribute is sparse, keyed by (payer, receiver). Events
+    are accumulated during the turn and folded into trust, treaties and
+    tribute in a single vectorized pass by settle().
+    """
+
+    def __init__(self, names, config=DEFAULT_CONFIG):
+        self.config = config
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        size = len(self.names)
+
+        self.trust = np.full((size, size), float(config.TRUST_START))  # trust[i, j]: how much i trusts j, 0-100
+        self.treaties = {kind: np.zeros((size, size), dtype=bool) for kind in TREATY_TYPES}
+        self.proposals = {kind: np.zeros((size, size), dtype=np.int8) for kind in TREATY_TYPES}  # turns left on an offer
+        self.pledges = {}  # (payer, receiver) -> (land, peasants) paid every turn
+
+        # Events since the last settlement, actor -> target
+        self.messages = np.zeros((size, size))
+        self.attacks = np.zeros((size, size))
+        self.gifts = np.zeros((size, size))
+        self.cancellations = np.zeros((size, size))
+        # Tribute value each entity received since its last turn (gifts and pledges); kept across settlements
+        self.received = np.zeros(size)
+
+        # Scratch space so settle() does not allocate (n, n) temporaries every turn
+        self._delta = np.zeros((size, size))
+        self._scratch = np.zeros((size, size))
+
+    @property
+    def alliance(self):
+        return self.treaties["alliance"]
+
+    @property
+    def non_aggression(self):
+        return self.treaties["non_aggression"]
+
+    def relation(self, name1, name2):
+        """Relation of name1 towards name2, in the shape the game has always used"""
+        i, j = self.index[name1], self.index[name2]
+        if (i, j) in self.pledges:
+            tribute = 'paying'
+        elif (j, i) in self.pledges:
+            tribute = 'receiving'
+        else:
+            tribute = None
+        return {
+            'trust': int(round(self.trust[i, j])),
+            'alliance': bool(self.alliance[i, j]),
+            'tribute': tribute,
+            'non_aggression': bool(self.non_aggression[i, j]),
+        }
+
+    def describe(self, name1, name2):
+        """One-line summary of a relation for prompts and the info screens"""
+        relation = self.relation(name1, name2)
+        i, j = self.index[name1], self.index[name2]
+        parts = [f"trust {relation['trust']}/100 (they trust you {int(round(self.trust[j, i]))}/100)"]
+        if relation['alliance']:
+            parts.append("allied")
+        if relation['non_aggression']:
+            parts.append("non-aggression pact")
+        if relation['tribute'] == 'paying':
+            land, peasants = self.pledges[(i, j)]
+            parts.append(f"you pay {land} land, {peasants} peasants per turn")
+        elif relation['tribute'] == 'receiving':
+            land, peasants = self.pledges[(j, i)]
+            parts.append(f"they pay {land} land, {peasants} peasants per turn")
+        if self.proposals["alliance"][j, i]:
+            parts.append("they proposed an alliance")
+        if self.proposals["non_aggression"][j, i]:
+            parts.append("they proposed a non-aggression pact")
+        return ", ".join(parts)
+
+    def blocks_attack(self, attacker_name, defender_name):
+        """A non-aggression pact forbids attacking"""
+        return bool(self.non_aggression[self.index[attacker_name], self.index[defender_name]])
+
+    def propose(self, kind, proposer_name, target_name):
+        """Offer a treaty; it is signed once both sides have offered it.
+
+        Returns 'signed', 'proposed' or 'active'.
+        """
+        i, j = self.index[proposer_name], self.index[target_name]
+        if self.treaties[kind][i, j]:
+            return 'active'
+        if self.proposals[kind][j, i]:
+            self.treaties[kind][i, j] = self.treaties[kind][j, i] = True
+            self.proposals[kind][i, j] = self.proposals[kind][j, i] = 0
+            return 'signed'
+        self.proposals[kind][i, j] = self.config.TREATY_PROPOSAL_TURNS
+        return 'proposed'
+
+    def cancel(self, kind, canceller_name, target_name):
+        """Leave a treaty. The other side will trust the canceller less."""
+        i, j = self.index[canceller_name], self.index[target_name]
+        self.proposals[kind][i, j] = 0
+        if not self.treaties[kind][i, j]:
+            return False
+        self.treaties[kind][i, j] = self.treaties[kind][j, i] = False
+        self.cancellations[i, j] += 1
+        return True
+
+    def pledge_tribute(self, payer_name, receiver_name, land, peasants):
+        """Set (or with zeros, stop) a recurring tribute paid every turn"""
+        i, j = self.index[payer_name], self.index[receiver_name]
+        if land or peasants:
+            self.pledges[(i, j)] = (land, peasants)
+        else:
+            self.pledges.pop((i, j), None)
+
+    def record_message(self, sender_name, recipient_name):
+        self.messages[self.index[sender_name], self.index[recipient_name]] += 1
+
+    def record_tribute(self, sender_name, recipient_name, land, peasants):
+        value = land * self.config.TRIBUTE_LAND_VALUE + peasants
+        self.gifts[self.index[sender_name], self.index[recipient_name]] += value
+        self.received[self.index[recipient_name]] += value
+
+    def clear_received(self, name):
+        """Start counting tribute received afresh, when the recipient takes its turn"""
+        self.received[self.index[name]] = 0
+
+    def record_attacks(self, attackers, defenders):
+        """Record a batch of attacks given as entity index arrays"""
+        np.add.at(self.attacks, (attackers, defenders), 1)
+
+    def ally_support(self, soldiers, attackers, defenders):
+        """Soldiers each defender's allies lend to its defense, per battle.
+
+        An ally never helps defend against itself.
+        """
+        share = self.alliance.astype(np.float64) * self.config.ALLY_DEFENSE_SHARE
+        support = share @ soldiers
+        return support[defenders] - share[defenders, attackers] * soldiers[attackers]
+
+    def settle(self, land, peasants):
+        """Run one turn of diplomacy over every pair at once.
+
+        Pays recurring tribute (a payer who cannot cover all of its pledges
+        pays nothing and is marked as defaulting), then updates trust from
+        this turn's events, lets trust drift back towards its baseline and
+        dissolves alliances that trust, or an attack, no longer supports.
+
+        Returns the new land and peasant arrays and a list of
+        (entity index, notice) pairs for the parties involved.
+        """
+        notices = []
+        size = len(self.names)
+        delta, scratch = self._delta, self._scratch
+
+        # Recurring tribute
+        defaulted = []
+        if self.pledges:
+            pairs = np.array(list(self.pledges.keys()), dtype=np.int64)
+            amounts = np.array(list(self.pledges.values()), dtype=np.int64)
+            payers, receivers = pairs[:, 0], pairs[:, 1]
+            due_land = np.bincount(payers, weights=amounts[:, 0], minlength=size)
+            due_peasants = np.bincount(payers, weights=amounts[:, 1], minlength=size)
+            pays = ((land >= due_land) & (peasants >= due_peasants))[payers]
+            paid = amounts * pays[:, None]
+            land = land - np.bincount(payers, weights=paid[:, 0], minlength=size).astype(np.int64) \
+                + np.bincount(receivers, weights=paid[:, 0], minlength=size).astype(np.int64)
+            peasants = peasants - np.bincount(payers, weights=paid[:, 1], minlength=size).astype(np.int64) \
+                + np.bincount(receivers, weights=paid[:, 1], minlength=size).astype(np.int64)
+            value = paid[:, 0] * self.config.TRIBUTE_LAND_VALUE + paid[:, 1]
+            np.add.at(self.gifts, (payers, receivers), value)
+            self.received += np.bincount(receivers, weights=value, minlength=size)
+            defaulted = list(zip(payers[~pays], receivers[~pays]))
+
+        # Events this turn, actor -> target
+        np.multiply(self.gifts, self.config.TRUST_PER_TRIBUTE, out=delta)
+        np.minimum(delta, self.config.TRUST_TRIBUTE_CAP, out=delta)
+        for events, weight in ((self.messages, self.config.TRUST_PER_MESSAGE),
+                               (self.attacks, -self.config.TRUST_ATTACK_PENALTY),
+                               (self.cancellations, -self.config.TRUST_CANCEL_PENALTY)):
+            np.multiply(events, weight, out=scratch)
+            delta += scratch
+        for payer, receiver in defaulted:
+            delta[payer, receiver] -= self.config.TRUST_DEFAULT_PENALTY
+
+        # Trust: row i moves with what j did to i this turn, then drifts towards baseline
+        np.subtract(self.config.TRUST_BASELINE, self.trust, out=scratch)
+        scratch *= self.config.TRUST_DECAY
+        self.trust += scratch
+        self.trust += delta.T
+        np.multiply(self.alliance, self.config.ALLIANCE_TRUST_BONUS, out=scratch)
+        self.trust += scratch
+        np.clip(self.trust, 0, 100, out=self.trust)
+        np.fill_diagonal(self.trust, 100)
+
+        # Alliances fall apart on attacks or when either side stops trusting the other
+        if self.alliance.any():
+            distrust = self.trust < self.config.ALLIANCE_MIN_TRUST
+            hostile = self.attacks > 0
+            broken = self.alliance & (hostile | hostile.T | distrust | distrust.T)
+            self.alliance[broken] = False
+            for i, j in zip(*np.nonzero(np.triu(broken))):
+                notices.append((i, f"Your alliance with {self.names[j]} has collapsed."))
+                notices.append((j, f"Your alliance with {self.names[i]} has collapsed."))
+
+        for payer, receiver in defaulted:
+            notices.append((payer, f"You could not pay your pledged tribute to {self.names[receiver]}."))
+            notices.append((receiver, f"{self.names[payer]} failed to pay its pledged tribute."))
+
+        # Offers expire; events start fresh
+        for proposals in self.proposals.values():
+            np.subtract(proposals, 1, out=proposals, where=proposals > 0)
+        for events in (self.messages, self.attacks, self.gifts, self.cancellations):
+            events.fill(0)
+
+        return land, peasants, notices
@@ -0,0 +1,30 @@
+# Vectorized economy rules, shared by the game, the vectorized environment and forecasts
+import numpy as np
+from config import *
+
+
+def grow_peasants(land, peasants, config=DEFAULT_CONFIG):
+    """Peasants after one turn of growth (works on scalars or arrays of any shape).
+
+    Growth is PEASANT_GROWTH_RATE while there is land to work and the capped
+    rate once every acre is worked; entities without land do not grow.
+    """
+    land = np.asarray(land, dtype=np.int64)
+    peasants = np.asarray(peasants, dtype=np.int64)
+    growth_rate = np.where(peasants < land * config.PEASANTS_PER_ACRE,
+                           config.PEASANT_GROWTH_RATE, config.PEASANT_GROWTH_RATE_CAPPED)
+    new_peasants = (peasants * growth_rate).astype(np.int64)
+    return peasants + np.where(land > 0, new_peasants, 0)
+
+
+def food_balance(peasants, soldiers, config=DEFAULT_CONFIG):
+    """(production, consumption, net) food for the given peasants and soldiers"""
+    production = np.asarray(peasants, dtype=np.int64) * config.FOOD_PER_PEASANT
+    consumption = np.asarray(soldiers, dtype=np.int64) * config.FOOD_PER_SOLDIER
+    return production, consumption, production - consumption
+
+
+def economy_step(land, peasants, soldiers, config=DEFAULT_CONFIG):
+    """One end-of-turn economy update: (peasants, food production, food consumption, net food)"""
+    peasants = grow_peasants(land, peasants, config)
+    return (peasants, *food_balance(peasants, soldiers, config))
@@ -0,0 +1,277 @@
+# Embedding backends for rules retrieval, selectable per deployment.
+#
+#   huggingface  sentence-transformers all-MiniLM-L6-v2 on PyTorch (the reference)
+#   onnx         the same model exported to ONNX with int8 weights, on ONNX Runtime
+#   static       a static word-vector model (model2vec), no neural forward pass
+#
+# Each backend's dependencies are imported only when it is selected, and one
+# instance per backend is shared by every neighbor in the process. Queries
+# from all neighbors and games go through a micro-batcher that embeds those
+# arriving within a short window in one forward pass.
+#
+#   python embeddings.py --verify onnx   # recall@k against the reference on the rules
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from rules_index import RulesIndex, normalize
+
+EMBEDDING_BACKENDS = ("huggingface", "onnx", "static")
+REFERENCE_BACKEND = "huggingface"
+DEFAULT_MODELS = {
+    "huggingface": "all-MiniLM-L6-v2",
+    "onnx": "sentence-transformers/all-MiniLM-L6-v2",
+    "static": "minishlab/potion-base-8M",
+}
+ONNX_FILE = "onnx/model_quint8_avx2.onnx"  # Dynamic int8 quantization, runs on any x86-64 CPU with AVX2
+
+# Questions neighbors typically ask get_relevant_rules
+VERIFY_QUERIES = [
+    "How does combat work?",
+    "How is land captured when an attack wins?",
+    "What is the minimum attack force?",
+    "How do I recruit soldiers and what do they cost?",
+    "How does food production and consumption work?",
+    "How fast do peasants grow?",
+    "What happens when I send tribute?",
+    "What are alliances and non-aggression pacts?",
+    "Can I break a treaty?",
+    "How do I win the game?",
+]
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence-transformer embeddings (mean pooling, normalized) on ONNX Runtime's CPU provider.
+
+    model is a Hugging Face repo id or a local directory holding the ONNX
+    file and tokenizer.json.
+    """
+
+    def __init__(self, model=DEFAULT_MODELS["onnx"], onnx_file=ONNX_FILE, max_length=256, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if os.path.isdir(model):
+            model_path, tokenizer_path = os.path.join(model, onnx_file), os.path.join(model, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            model_path, tokenizer_path = hf_hub_download(model, onnx_file), hf_hub_download(model, "tokenizer.json")
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return normalize(pooled.astype(np.float32))
+
+    def embed_documents(self, texts):
+        return self.embed(texts).tolist() if texts else []
+
+    def embed_query(self, text):
+        return self.embed([text])[0].tolist()
+
+
+class StaticEmbeddings(Embeddings):
+    """Static token vectors averaged per text (model2vec): tiny, and fast on any CPU"""
+
+    def __init__(self, model=DEFAULT_MODELS["static"]):
+        from model2vec import StaticModel
+        self.model = StaticModel.from_pretrained(model)
+
+    def embed_documents(self, texts):
+        return self.model.encode(list(texts)).tolist() if texts else []
+
+    def embed_query(self, text):
+        return self.model.encode([text])[0].tolist()
+
+
+def load_embeddings(backend=REFERENCE_BACKEND, model=None):
+    """A new embedding model for the backend"""
+    model = model or DEFAULT_MODELS.get(backend)
+    if backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model, model_kwargs={"device": "cpu"})
+    if backend == "onnx":
+        return OnnxEmbeddings(model)
+    if backend == "static":
+        return StaticEmbeddings(model)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+
+
+class BatchingEmbeddings(Embeddings):
+    """Micro-batches embed_query calls from many threads into one forward pass.
+
+    A caller's query waits at most window seconds for others to join it
+    (up to max_batch queries), then one worker thread embeds the distinct
+    texts with embed_documents and hands each caller its vector. Document
+    embedding is already batched and goes straight to the model.
+    """
+
+    def __init__(self, embedding, window=0.002, max_batch=64):
+        self.embedding = embedding
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.queries = 0
+        self.batches = 0
+        self.worker = threading.Thread(target=self.run, name="embedding-batcher", daemon=True)
+        self.worker.start()
+
+    def embed_query(self, text):
+        future = Future()
+        self.pending.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts):
+        return self.embedding.embed_documents(texts)
+
+    def collect(self):
+        """The next batch: the first waiting query plus whatever arrives within the window"""
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.pending.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            texts = list(dict.fromkeys(text for text, _ in batch))  # Neighbors often ask the same thing
+            try:
+                vectors = dict(zip(texts, self.embedding.embed_documents(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.queries += len(batch)
+            self.batches += 1
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def summary(self):
+        if not self.batches:
+            return "Embedding batcher: no queries"
+        return (f"Embedding batcher: {self.queries} queries in {self.batches} forward passes "
+                f"(avg batch {self.queries / self.batches:.1f})")
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def make_embeddings(backend=REFERENCE_BACKEND, model=None, batch_window=0):
+    """The process-wide embedding model for the backend, loaded on first use.
+
+    With a batch_window (seconds), queries go through the process-wide
+    BatchingEmbeddings for that model; 0 or None embeds each query alone.
+    """
+    with _shared_lock:
+        if (backend, model) not in _shared:
+            _shared[(backend, model)] = load_embeddings(backend, model)
+        embedding = _shared[(backend, model)]
+        if not batch_window:
+            return embedding
+        key = (backend, model, batch_window)
+        if key not in _shared:
+            _shared[key] = BatchingEmbeddings(embedding, batch_window)
+        return _shared[key]
+
+
+def rule_chunks(path="game_rules.txt"):
+    """The rules split the way LLMNeighbor.setup_rag splits them"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    with open(path, "r", encoding="utf-8") as f:
+        return RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50).split_text(f.read())
+
+
+def profile_backend(backend, chunks, queries, k, model=None):
+    """(top-k chunk ids per query, stats) for one backend"""
+    started = time.perf_counter()
+    embeddings = load_embeddings(backend, model)
+    load_seconds = time.perf_counter() - started
+    index = RulesIndex.from_texts(chunks, embeddings)
+    ids = {text: i for i, text in enumerate(chunks)}
+
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        docs = index.similarity_search(query, k=k)
+        latencies.append(time.perf_counter() - started)
+        results.append({ids[doc.page_content] for doc in docs})
+    stats = {
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'query_ms': 1000 * float(np.median(latencies)),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    return results, stats
+
+
+def verify(backend, k=3, queries=VERIFY_QUERIES, path="game_rules.txt", model=None):
+    """Recall@k of the backend's rule retrieval against the reference model.
+
+    The candidate runs first so its peak memory is measured before the
+    reference model is loaded into the same process.
+    """
+    chunks = rule_chunks(path)
+    candidate, stats = profile_backend(backend, chunks, queries, k, model)
+    reference, reference_stats = profile_backend(REFERENCE_BACKEND, chunks, queries, k)
+    recalls = [len(got & expected) / len(expected) for got, expected in zip(candidate, reference) if expected]
+    stats['recall'] = float(np.mean(recalls)) if recalls else 1.0
+    stats['k'] = k
+    return stats, reference_stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare an embedding backend with the reference on the game rules")
+    parser.add_argument("--verify", choices=EMBEDDING_BACKENDS, required=True, metavar="BACKEND",
+                        help=f"Backend to check: {', '.join(EMBEDDING_BACKENDS)}")
+    parser.add_argument("--model", default=None, help="Model for the backend (default: its built-in choice)")
+    parser.add_argument("-k", type=int, default=3, help="Chunks retrieved per query, as in get_relevant_rules")
+    parser.add_argument("--rules", default="game_rules.txt", help="Rules file to index")
+    parser.add_argument("--min-recall", type=float, default=0.8,
+                        help="Exit with status 1 when recall is below this")
+    args = parser.parse_args()
+
+    stats, reference_stats = verify(args.verify, k=args.k, path=args.rules, model=args.model)
+    print(f"{'backend':<12} {'load s':>8} {'query ms':>9}")
+    for row in (stats, reference_stats):
+        print(f"{row['backend']:<12} {row['load_seconds']:>8.2f} {row['query_ms']:>9.2f}")
+    print(f"Peak RSS with {args.verify} only: {stats['max_rss_mb']:.0f} MB")
+    print(f"Recall@{stats['k']} against {REFERENCE_BACKEND}: {stats['recall']:.2f}")
+    return 0 if stats['recall'] >= args.min_recall else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# Economy and army forecasts: many candidate plans projected turns ahead at once
+import numpy as np
+from economy import economy_step
+from config import *
+
+
+def forecast(land, peasants, soldiers, net_food, recruits, config=DEFAULT_CONFIG):
+    """Project the economy for a batch of recruitment plans.
+
+    recruits is an int array (plans, turns): soldiers recruited at the start
+    of each turn, negative to dismiss. Recruiting follows
+    can_recruit_soldiers (enough peasants, and net food from the last
+    economy update to feed them, else nothing happens) and each turn ends
+    with the same economy update as the game. Land stays as it is: no
+    battles or tribute are assumed.
+
+    Returns a dict of (plans, turns) arrays, values after each turn's
+    economy: land, peasants, soldiers, net_food, power, and recruited
+    (what actually happened, 0 where the game would refuse).
+    """
+    recruits = np.atleast_2d(np.asarray(recruits, dtype=np.int64))
+    plans, turns = recruits.shape
+    land = np.broadcast_to(np.asarray(land, dtype=np.int64), plans).copy()
+    peasants = np.broadcast_to(np.asarray(peasants, dtype=np.int64), plans).copy()
+    soldiers = np.broadcast_to(np.asarray(soldiers, dtype=np.int64), plans).copy()
+    net_food = np.broadcast_to(np.asarray(net_food, dtype=np.int64), plans).copy()
+
+    result = {key: np.zeros((plans, turns), dtype=np.int64)
+              for key in ('land', 'peasants', 'soldiers', 'net_food', 'recruited')}
+    for turn in range(turns):
+        amount = recruits[:, turn]
+        recruit = (amount > 0) & (peasants >= amount) & (net_food >= amount * config.FOOD_PER_SOLDIER)
+        dismiss = (amount < 0) & (soldiers >= -amount)
+        change = np.where(recruit | dismiss, amount, 0)
+        peasants -= change
+        soldiers += change
+        peasants, _, _, net_food = economy_step(land, peasants, soldiers, config)
+        result['land'][:, turn] = land
+        result['peasants'][:, turn] = peasants
+        result['soldiers'][:, turn] = soldiers
+        result['net_food'][:, turn] = net_food
+        result['recruited'][:, turn] = change
+    result['power'] = (result['peasants'] + result['soldiers'] * 2) * result['land'] / 1000
+    return result
+
+
+def forecast_entity(entity, recruits, config=DEFAULT_CONFIG):
+    """forecast() from an entity's current land, peasants, soldiers and net food"""
+    return forecast(entity.land, entity.peasants, entity.soldiers, entity.net_food, recruits, config)
+
+
+def recruit_now(amounts, turns):
+    """Plans that recruit each amount this turn and nothing afterwards"""
+    plans = np.zeros((len(amounts), turns), dtype=np.int64)
+    plans[:, 0] = amounts
+    return plans
+
+
+def describe_recruitment(entity, amounts, turns=5, config=DEFAULT_CONFIG):
+    """One line per amount: where recruiting it now leaves the entity in `turns` turns"""
+    amounts = list(amounts)
+    turns = max(1, int(turns))
+    result = forecast_entity(entity, recruit_now(amounts, turns), config)
+    lines = []
+    for i, amount in enumerate(amounts):
+        verb = "Dismiss" if amount < 0 else "Recruit"
+        label = f"{verb} {abs(amount)} now" if amount else "Do nothing"
+        if amount and not result['recruited'][i, 0]:
+            reason = "not enough peasants or food" if amount > 0 else "not enough soldiers"
+            label += f" (refused: {reason})"
+        lines.append(
+            f"{label}: after {turns} turn{'s' if turns > 1 else ''} {result['peasants'][i, -1]} peasants, "
+            f"{result['soldiers'][i, -1]} soldiers, net food {result['net_food'][i, -1]:+d}, "
+            f"power {result['power'][i, -1]:.0f} (now {entity.get_total_power():.0f})"
+        )
+    return lines
@@ -1,207 +1,216 @@
-import random
+import bisect
+import numpy as np
 from typing import List, Dict, Any
+from combat import resolve_combat_queue
+from economy import economy_step
+from diplomacy import DiplomacyTable
+from world_map import WorldMap
 from config import *
 
+BROADCAST = "*"  # Recipient spec addressing every other entity in reach
+
 class GameState:
-    def __init__(self):
+    def __init__(self, seed=None, config=None, large_map=False):
         self.turn = 1
+        self.config = config or DEFAULT_CONFIG
+        self.rng = np.random.default_rng(seed)
         self.player = None
         self.neighbors = []
-        self.message_queue = []
-        self.diplomatic_relations = {}  # Store alliances, tribute agreements, etc.
+        self.entity_by_name = {}
+        self.mailboxes = {}  # Recipient name -> messages waiting for its next turn
+        self.diplomacy = None  # DiplomacyTable with trust, treaties and tribute agreements
         self.combat_queue = []
-        self.combat_results = []  # Store combat results to display later
+        self.pending_combat = []  # Resolved combat batches not yet displayed
+        self.last_combat = None  # This turn's combat batch, kept after display; None if nobody fought
+        self.entities = []
+        self.entity_index = {}  # id(entity) -> position in entities
+        self._power_table = None  # Cached power and aggregates, None when dirty
+        self.large_map = large_map
+        self.world_map = None  # WorldMap in large-map mode; otherwise everyone is in reach of everyone
         
     def initialize_game(self, player, neighbors):
         """Initialize the game with starting resources"""
         self.player = player
         self.neighbors = neighbors
+        self.entities = [player] + neighbors
+        self.entity_by_name = {entity.name: entity for entity in self.entities}
+        self.mailboxes = {entity.name: [] for entity in self.entities}
+        self.mark_power_dirty()
+        self.entity_index = {id(entity): i for i, entity in enumerate(self.entities)}
+        if self.large_map:
+            self.world_map = WorldMap.generate(len(self.entities), self.config.MAP_DEGREE, self.config.MAP_RADIUS,
+                                               seed=int(self.rng.integers(2**63)))
         
         # Initialize diplomatic relations
-        all_entities = [player] + neighbors
-        for i, entity1 in enumerate(all_entities):
-            for j, entity2 in enumerate(all_entities):
-                if i != j:
-                    key = (entity1.name, entity2.name)
-                    self.diplomatic_relations[key] = {
-                        'trust': 50,  # 0-100 scale
-                        'alliance': False,
-                        'tribute': None,  # None, 'paying', 'receiving'
-                        'non_aggression': False
-                    }
+        self.diplomacy = DiplomacyTable([entity.name for entity in self.entities], self.config)
     
     def get_entity_by_name(self, name):
         """Get entity (player or neighbor) by name"""
-        if self.player.name == name:
-            return self.player
-        for neighbor in self.neighbors:
-            if neighbor.name == name:
-                return neighbor
-        return None
+        return self.entity_by_name.get(name)
     
-    def get_relative_power(self, entity1, entity2):
-        """Calculate relative power between two entities"""
-        power1 = entity1.get_total_power()
-        power2 = entity2.get_total_power()
-        
-        ratio = power1 / power2 if power2 > 0 else float('inf')
-        
-        if ratio < 0.3:
-            return "Miniscule"
-        elif ratio < 0.6:
-            return "Inferior"
-        elif ratio < 1.4:
-            return "Equal"
-        elif ratio < 2.0:
-            return "Greater"
-        else:
-            return "Overwhelming"
+    def nearby(self, entity):
+        """Entities the entity can attack and trade with: closest first on a map, else all others"""
+        if self.world_map is None:
+            return [other for other in self.entities if other is not entity]
+        return [self.entities[j] for j in self.world_map.nearby(self.entity_index[id(entity)])]
     
-    def resolve_combat(self):
-        """Resolve all queued combat actions"""
-        for combat_data in self.combat_queue:
-            attacker = combat_data['attacker']
-            defender = combat_data['defender']
-            attacker_soldiers = combat_data['attacker_soldiers']
-            
-            # Simple combat resolution
-            defender_soldiers = defender.soldiers
-            
-            # Attacker needs advantage to win
-            attack_power = attacker_soldiers * ATTACKER_PENALTY
-            defense_power = defender_soldiers * DEFENDER_BONUS
+    def in_reach(self, entity, other):
+        """Whether entity can attack or send tribute to other"""
+        if self.world_map is None:
+            return True
+        return self.world_map.in_reach(self.entity_index[id(entity)], self.entity_index[id(other)])
+    
+    def mark_power_dirty(self):
+        """Invalidate the power table after any resource change"""
+        self._power_table = None
+    
+    def get_power_table(self):
+        """Power per entity, pairwise relative power buckets and total land.
+        
+        Recomputed lazily on the first read after a resource change, so any
+        code that changes land, peasants or soldiers must call mark_power_dirty.
+        On a large map the pairwise buckets are left out (None): realms only
+        compare themselves with the few nearby, so all pairs would be waste.
+        """
+        if self._power_table is None:
+            count = len(self.entities)
+            land = np.fromiter((e.land for e in self.entities), dtype=np.float64, count=count)
+            peasants = np.fromiter((e.peasants for e in self.entities), dtype=np.float64, count=count)
+            soldiers = np.fromiter((e.soldiers for e in self.entities), dtype=np.float64, count=count)
+            power = (peasants + soldiers * 2) * land / 1000
             
-            total_power = attack_power + defense_power
-            attacker_win_chance = attack_power / total_power if total_power > 0 else 0.5
+            buckets = None
+            if self.world_map is None:
+                ratio = np.full((count, count), np.inf)
+                np.divide(power[:, None], power[None, :], out=ratio, where=power[None, :] > 0)
+                buckets = np.digitize(ratio, self.config.POWER_BUCKET_THRESHOLDS)
             
-            if random.random() < attacker_win_chance:
-                # Attacker wins
-                self.handle_attacker_victory(attacker, defender, attacker_soldiers, defender_soldiers)
-            else:
-                # Defender wins
-                self.handle_defender_victory(attacker, defender, attacker_soldiers, defender_soldiers)
-        self.combat_queue.clear()
+            self._power_table = {
+                'index': {id(e): i for i, e in enumerate(self.entities)},
+                'power': power,
+                'buckets': buckets,
+                'total_land': int(land.sum()),
+            }
+        return self._power_table
     
-    def process_combat(self, combat_data):
-        """Process a single combat between two entities"""
-
-    def handle_attacker_victory(self, attacker, defender, attacker_soldiers, defender_soldiers):
-        """Handle attacker victory"""
-        # Check if defender has land and peasants to gain
-        defender_land = defender.land
-        defender_peasants = defender.peasants
-        
-        # Only gain resources if defender has them
-        land_gained = 0
-        peasants_gained = 0
-        
-        if defender_land > 0:
-            land_gained = min(50, defender_land // 4)
-            # Transfer land
-            defender.land = max(0, defender.land - land_gained)
-            attacker.land += land_gained
-        
-        if defender_peasants > 0:
-            peasants_gained = min(200, defender_peasants // 4)
-            # Transfer peasants
-            defender.peasants = max(0, defender.peasants - peasants_gained)
-            attacker.peasants += peasants_gained
-        
-        # Both sides lose soldiers
-        attacker_losses = attacker_soldiers // 3
-        defender_losses = defender_soldiers // 2
-        
-        attacker.soldiers = max(0, attacker.soldiers - attacker_losses)
-        defender.soldiers = max(0, defender.soldiers - defender_losses)
-        
-        # Store combat result with more detail including soldier losses
-        if land_gained > 0 and peasants_gained > 0:
-            result = f"{attacker.name} defeats {defender.name}! Gains {land_gained} acres and {peasants_gained} peasants. {attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
-        elif land_gained > 0:
-            result = f"{attacker.name} defeats {defender.name}! Gains {land_gained} acres (defender had no peasants). {attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
-        elif peasants_gained > 0:
-            result = f"{attacker.name} defeats {defender.name}! Gains {peasants_gained} peasants (defender had no land). {attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
-        else:
-            result = f"{attacker.name} defeats {defender.name}! No resources gained (defender had no land or peasants). {attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
-        
-        self.combat_results.append(result)
-        
-        # Track specific results for player
-        if attacker == self.player:
-            # Player's outgoing attack
-            if hasattr(self, 'renderer') and self.renderer:
-                if land_gained > 0 and peasants_gained > 0:
-                    self.renderer.add_player_attack_result(f"Victory! You gained {land_gained} acres and {peasants_gained} peasants from {defender.name}.")
-                elif land_gained > 0:
-                    self.renderer.add_player_attack_result(f"Victory! You gained {land_gained} acres from {defender.name} (they had no peasants).")
-                elif peasants_gained > 0:
-                    self.renderer.add_player_attack_result(f"Victory! You gained {peasants_gained} peasants from {defender.name} (they had no land).")
-                else:
-                    self.renderer.add_player_attack_result(f"Victory! No resources gained from {defender.name} (they had no land or peasants).")
-        elif defender == self.player:
-            # Attack against player
-            if hasattr(self, 'renderer') and self.renderer:
-                if land_gained > 0 and peasants_gained > 0:
-                    self.renderer.add_incoming_attack_result(f"Defeated by {attacker.name}! Lost {land_gained} acres and {peasants_gained} peasants.")
-                elif land_gained > 0:
-                    self.renderer.add_incoming_attack_result(f"Defeated by {attacker.name}! Lost {land_gained} acres (you had no peasants).")
-                elif peasants_gained > 0:
-                    self.renderer.add_incoming_attack_result(f"Defeated by {attacker.name}! Lost {peasants_gained} peasants (you had no land).")
-                else:
-                    self.renderer.add_incoming_attack_result(f"Defeated by {attacker.name}! No resources lost (you had no land or peasants).")
-    
-    def handle_defender_victory(self, attacker, defender, attacker_soldiers, defender_soldiers):
-        """Handle defender victory"""
-        # Defender gains nothing but attacker loses heavily
-        attacker_losses = attacker_soldiers // 2
-        defender_losses = defender_soldiers // 4
-        
-        attacker.soldiers = max(0, attacker.soldiers - attacker_losses)
-        defender.soldiers = max(0, defender.soldiers - defender_losses)
-        
-        # Store combat result with more detail including soldier losses for both sides
-        result = f"{defender.name} repels {attacker.name}'s attack! {attacker.name} loses {attacker_losses} soldiers, {defender.name} loses {defender_losses} soldiers."
-        self.combat_results.append(result)
+    def get_power(self, entity):
+        """Total power of an entity, from the cached table"""
+        table = self.get_power_table()
+        return float(table['power'][table['index'][id(entity)]])
+    
+    def get_total_land(self):
+        """Land held by all entities combined"""
+        return self.get_power_table()['total_land']
+    
+    def get_relative_power(self, entity1, entity2):
+        """Relative power of entity1 compared to entity2"""
+        table = self.get_power_table()
+        i, j = table['index'][id(entity1)], table['index'][id(entity2)]
+        names = self.config.POWER_BUCKET_NAMES
+        if table['buckets'] is not None:
+            return names[table['buckets'][i, j]]
+        power = table['power']
+        ratio = power[i] / power[j] if power[j] > 0 else np.inf
+        return names[bisect.bisect_right(self.config.POWER_BUCKET_THRESHOLDS, ratio)]
+    
+    def resolve_combat(self):
+        """Resolve all queued combat actions simultaneously"""
+        if not self.combat_queue:
+            self.last_combat = None  # No battles this turn; don't leave last turn's on display
+            return
+        batch = resolve_combat_queue(self.entities, self.combat_queue, self.rng, self.diplomacy, self.config)
+        self.combat_queue.clear()
+        self.diplomacy.record_attacks(batch.attackers, batch.defenders)
+        self.mark_power_dirty()
+        self.pending_combat.append(batch)
+        self.last_combat = batch
         
         # Track specific results for player
-        if attacker == self.player:
-            # Player's outgoing attack failed
-            if hasattr(self, 'renderer') and self.renderer:
-                self.renderer.add_player_attack_result(f"Attack failed! {defender.name} repelled your attack. You lost {attacker_losses} soldiers.")
-        elif defender == self.player:
-            # Player successfully defended
-            if hasattr(self, 'renderer') and self.renderer:
-                self.renderer.add_incoming_attack_result(f"Successfully defended against {attacker.name}! They lost {attacker_losses} soldiers.")
+        if hasattr(self, 'renderer') and self.renderer:
+            for result in batch.render_attacks_by(self.player):
+                self.renderer.add_player_attack_result(result)
+            for result in batch.render_attacks_on(self.player):
+                self.renderer.add_incoming_attack_result(result)
+    
+    @property
+    def combat_results(self):
+        """Display text for combat results not yet shown"""
+        return [result for batch in self.pending_combat for result in batch.render()]
     
     def get_combat_results(self):
         """Get and clear combat results"""
-        results = self.combat_results.copy()
-        self.combat_results.clear()
+        results = self.combat_results
+        self.pending_combat.clear()
         return results
     
     def process_diplomacy(self):
         """Process diplomatic actions and agreements"""
-        # This will handle alliance effects, tribute payments, etc.
-        pass
+        land = np.fromiter((e.land for e in self.entities), dtype=np.int64, count=len(self.entities))
+        peasants = np.fromiter((e.peasants for e in self.entities), dtype=np.int64, count=len(self.entities))
+        
+        new_land, new_peasants, notices = self.diplomacy.settle(land, peasants)
+        
+        for i in np.flatnonzero((new_land != land) | (new_peasants != peasants)):
+            self.entities[i].land = int(new_land[i])
+            self.entities[i].peasants = int(new_peasants[i])
+        self.mark_power_dirty()
+        
+        for i, notice in notices:
+            self.mailboxes[self.entities[i].name].append({
+                'sender': 'Royal Herald',
+                'recipient': self.entities[i].name,
+                'content': notice,
+                'turn': self.turn
+            })
     
     def update_economy(self):
-        """Update all entities' economies"""
-        all_entities = [self.player] + self.neighbors
-        
-        for entity in all_entities:
-            entity.update_economy()
-    
-    def send_message(self, sender, recipient_name, content):
-        """Deliver a message immediately to the recipient"""
-        recipient = self.get_entity_by_name(recipient_name)
-        if recipient:
-            message_data = {
+        """Update all entities' economies at once"""
+        count = len(self.entities)
+        land = np.fromiter((e.land for e in self.entities), dtype=np.int64, count=count)
+        peasants = np.fromiter((e.peasants for e in self.entities), dtype=np.int64, count=count)
+        soldiers = np.fromiter((e.soldiers for e in self.entities), dtype=np.int64, count=count)
+        
+        peasants, production, consumption, net_food = economy_step(land, peasants, soldiers, self.config)
+        
+        for i, entity in enumerate(self.entities):
+            entity.peasants = int(peasants[i])
+            entity.food_production = int(production[i])
+            entity.food_consumption = int(consumption[i])
+            entity.net_food = int(net_food[i])
+        self.mark_power_dirty()
+    
+    def resolve_recipients(self, sender, recipients):
+        """Names addressed by a recipient spec: one name, a list of names or BROADCAST"""
+        if recipients == BROADCAST:
+            return [entity.name for entity in self.nearby(sender)]
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        return [name for name in dict.fromkeys(recipients) if name in self.mailboxes and name != sender.name]
+    
+    def send_message(self, sender, recipients, content):
+        """Post a message to one recipient, several (a list) or everyone nearby (BROADCAST).
+        
+        Messages wait in each recipient's mailbox until deliver_messages is
+        called at the start of its turn. Returns the names it was posted to.
+        """
+        names = self.resolve_recipients(sender, recipients)
+        for name in names:
+            self.mailboxes[name].append({
                 'sender': sender.name,
-                'recipient': recipient_name,
+                'recipient': name,
                 'content': content,
                 'turn': self.turn
-            }
-            recipient.receive_message(message_data)
+            })
+            self.diplomacy.record_message(sender.name, name)
+        return names
+    
+    def deliver_messages(self, entity):
+        """Drain an entity's mailbox into it in one batch; returns the batch"""
+        batch = self.mailboxes[entity.name]
+        self.mailboxes[entity.name] = []
+        if batch:
+            entity.receive_messages(batch)
+        return batch
     
     def advance_turn(self):
         """Advance to the next turn"""
@@ -214,7 +223,7 @@ class GameState:
             return True
         
         # Game ends if player controls all land
-        total_land = sum(entity.land for entity in [self.player] + self.neighbors)
+        total_land = self.get_total_land()
         player_land = self.player.land
         
         if player_land >= total_land * 0.9:  # 90% control
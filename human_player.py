@@ -1,4 +1,6 @@
 from config import *
+from diplomacy import TREATY_TYPES
+from game_state import BROADCAST
 
 class HumanPlayer:
     def __init__(self, name, game_state):
@@ -6,11 +8,12 @@ class HumanPlayer:
         self.game_state = game_state
         
         # Starting resources from config
-        self.land = STARTING_LAND
-        self.peasants = STARTING_PEASANTS
-        self.soldiers = STARTING_SOLDIERS
-        self.food_production = STARTING_PEASANTS * FOOD_PER_PEASANT
-        self.food_consumption = STARTING_SOLDIERS * FOOD_PER_SOLDIER
+        config = game_state.config
+        self.land = config.STARTING_LAND
+        self.peasants = config.STARTING_PEASANTS
+        self.soldiers = config.STARTING_SOLDIERS
+        self.food_production = config.STARTING_PEASANTS * config.FOOD_PER_PEASANT
+        self.food_consumption = config.STARTING_SOLDIERS * config.FOOD_PER_SOLDIER
         self.net_food = self.food_production - self.food_consumption
         
         # Message tracking
@@ -24,40 +27,26 @@ class HumanPlayer:
         """Calculate total power for relative comparisons"""
         return (self.peasants + self.soldiers * 2) * self.land / 1000
     
-    def update_economy(self):
-        """Update economic calculations"""
-        # Peasants grow naturally (growth rate from config, limited by available land)
-        max_peasants = self.land * PEASANTS_PER_ACRE
-        growth_rate = PEASANT_GROWTH_RATE if self.peasants < max_peasants else PEASANT_GROWTH_RATE_CAPPED
-        new_peasants = int(self.peasants * growth_rate)
-        
-        # Peasants can grow if there's land
-        if self.land > 0:
-            self.peasants += new_peasants
-        
-        # Calculate food production and consumption
-        self.food_production = self.peasants * FOOD_PER_PEASANT
-        self.food_consumption = self.soldiers * FOOD_PER_SOLDIER
-        self.net_food = self.food_production - self.food_consumption
-    
     def can_recruit_soldiers(self, amount):
         """Check if player can recruit specified number of soldiers"""
         # Can recruit if we have enough peasants and enough food to feed new soldiers
-        return self.peasants >= amount and self.net_food >= amount * FOOD_PER_SOLDIER
+        return self.peasants >= amount and self.net_food >= amount * self.game_state.config.FOOD_PER_SOLDIER
     
     def recruit_soldiers(self, amount):
         """Recruit soldiers from peasants"""
-        if self.can_recruit_soldiers(amount):
+        if amount >= 0 and self.can_recruit_soldiers(amount):
             self.peasants -= amount
             self.soldiers += amount
+            self.game_state.mark_power_dirty()
             return True
         return False
     
     def dismiss_soldiers(self, amount):
         """Dismiss soldiers back to peasants"""
-        if self.soldiers >= amount:
+        if 0 <= amount <= self.soldiers:
             self.soldiers -= amount
             self.peasants += amount
+            self.game_state.mark_power_dirty()
             return True
         return False
     
@@ -71,6 +60,13 @@ class HumanPlayer:
         # Check if already attacked this target this turn
         if target_name in self.attacks_sent_this_turn:
             return False
+        
+        if not self.game_state.in_reach(self, target):
+            return False
+        
+        # Non-aggression pacts are binding
+        if self.game_state.diplomacy.blocks_attack(self.name, target_name):
+            return False
             
         if self.soldiers >= attack_force and attack_force > 0:
             # Queue combat
@@ -97,6 +93,21 @@ class HumanPlayer:
             return True
         return False
     
+    def broadcast_message(self, content, recipient_names=BROADCAST):
+        """Send one message to several entities (everyone by default); returns who got it"""
+        names = [name for name in self.game_state.resolve_recipients(self, recipient_names)
+                 if name not in self.messages_sent_this_turn]
+        if not names:
+            return []
+        self.game_state.send_message(self, names, content)
+        self.messages_sent_this_turn.update(names)
+        self.message_history.append({
+            'to': ", ".join(names),
+            'content': content,
+            'turn': self.game_state.turn
+        })
+        return names
+    
     def send_tribute(self, recipient_name, land_amount, peasant_amount):
         """Send tribute (land or peasants) to another entity"""
         target = self.game_state.get_entity_by_name(recipient_name)
@@ -109,6 +120,9 @@ class HumanPlayer:
         if land_amount == 0 and peasant_amount == 0:
             return False
         
+        if not self.game_state.in_reach(self, target):
+            return False
+        
         # Check if we have enough resources
         if land_amount > self.land:
             return False
@@ -125,6 +139,9 @@ class HumanPlayer:
             self.peasants -= peasant_amount
             target.peasants += peasant_amount
         
+        self.game_state.mark_power_dirty()
+        self.game_state.diplomacy.record_tribute(self.name, recipient_name, land_amount, peasant_amount)
+        
         # Send a message about the tribute (don't count as a regular message)
         tribute_message = f"Tribute sent: {land_amount} land, {peasant_amount} peasants"
         self.game_state.send_message(self, recipient_name, tribute_message)
@@ -136,6 +153,30 @@ class HumanPlayer:
         
         return True
     
+    def propose_treaty(self, target_name, treaty):
+        """Offer a treaty; returns 'signed', 'proposed', 'active' or None if invalid"""
+        if treaty not in TREATY_TYPES or not self.game_state.get_entity_by_name(target_name) or target_name == self.name:
+            return None
+        return self.game_state.diplomacy.propose(treaty, self.name, target_name)
+    
+    def cancel_treaty(self, target_name, treaty):
+        """Leave a treaty with another entity"""
+        if treaty not in TREATY_TYPES or not self.game_state.get_entity_by_name(target_name) or target_name == self.name:
+            return False
+        return self.game_state.diplomacy.cancel(treaty, self.name, target_name)
+    
+    def pledge_tribute(self, recipient_name, land_per_turn, peasants_per_turn):
+        """Pay land and peasants to another entity every turn (zeros stop paying)"""
+        target = self.game_state.get_entity_by_name(recipient_name)
+        if not target or recipient_name == self.name:
+            return False
+        if land_per_turn < 0 or peasants_per_turn < 0:
+            return False
+        if (land_per_turn or peasants_per_turn) and not self.game_state.in_reach(self, target):
+            return False
+        self.game_state.diplomacy.pledge_tribute(self.name, recipient_name, land_per_turn, peasants_per_turn)
+        return True
+    
     def receive_message(self, message_data):
         """Receive a message from another entity"""
         self.message_history.append({
@@ -144,6 +185,11 @@ class HumanPlayer:
             'turn': message_data['turn']
         })
     
+    def receive_messages(self, batch):
+        """Receive a batch of messages delivered from the mailbox"""
+        for message_data in batch:
+            self.receive_message(message_data)
+    
     def reset_turn(self):
         """Reset turn-specific tracking"""
         self.messages_sent_this_turn.clear()
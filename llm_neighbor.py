@@ -1,91 +1,155 @@
 # LLM Neighbor that uses tools to call game actions
-from langchain_core.tools import StructuredTool
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import tools_condition
 from langchain_ollama import ChatOllama
-from langgraph.graph import MessagesState
 from langgraph.checkpoint.memory import InMemorySaver
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from requests.auth import HTTPBasicAuth
 from config import *
+from diplomacy import TREATY_TYPES
+from game_state import BROADCAST
+from planner import TurnPlan, build_briefing, plan_action_call, request_plan
+from activation import ActivationPolicy, gather_signals, remember_resources
+from router import MODELS, TIERS
+from usage import UsageLog
+from rules_index import RulesSource
+from embeddings import make_embeddings
+from memory import EpisodicMemory
+from forecast import describe_recruitment
+from agent_graph import register, shared_tools, shared_graph, bind_once, system_prompt
+from contextlib import nullcontext
+from typing import List
 import os
+import threading
+import weakref
+
+# Chat models are shared by every neighbor using the same model and endpoint
+_llm_clients = {}
+_llm_clients_lock = threading.Lock()
+# Checkpointer for neighbors not given one; each neighbor's thread is deleted with the neighbor
+_default_checkpointer = InMemorySaver()
 
 class LLMNeighbor:
-    def __init__(self, name, game_state, player_id, verbose_logging=True, use_ollama=False):
+    def __init__(self, name, game_state, player_id, verbose_logging=True, use_ollama=False, turn_mode="graph",
+                 checkpointer=None, thread_id=None, cassette=None, base_url=None,
+                 activation=None, router=None, usage_log=None, rules_backend="numpy",
+                 embedding_backend="huggingface", rules=None, memories=4):
         self.name = name
         self.game_state = game_state
         self.player_id = player_id
         self.verbose_logging = verbose_logging
+        self.turn_mode = turn_mode  # "graph": agent <-> tools loop, "plan": one structured plan per turn
+        self.agent_key = register(self)  # How the shared graph and tools find this neighbor (graph config)
+        # Pass a stable thread_id to resume from a persistent checkpointer across restarts
+        self.thread_id = thread_id or f"{player_id}:{self.agent_key}"
+        self.activation = activation or ActivationPolicy()
+        self.quiet_turns = 0  # Turns in a row handled by the activation policy's routine
+        self.usage_log = usage_log or UsageLog()  # Token usage of every LLM call, cached prompt tokens included
+        self.prepared_combat = (None, [], [])  # (batch, incoming, outgoing) lines rendered by prepare_turn
+        self.rules_warmed = False
 
-        # Initialize LLM based on use_ollama parameter
-        if use_ollama:
-            authorization = HTTPBasicAuth(os.getenv("NGROK_USER"), os.getenv("NGROK_PASS"))
-            self.llm = ChatOllama(
-                base_url=os.getenv("NGROK_URL"),
-                auth=authorization,
-                model="gpt-oss:20b",
-                temperature=0.6,
-                top_p=0.8,
-                top_k=50,
-                repeat_penalty=1.1,
-                repeat_last_n=64,
-                num_ctx=24000,
-                num_predict=1536,
-                keep_alive="7m",
-                num_thread=8
-            )
-        else:
-            # Initialize OpenAI LLM
-            self.llm = ChatOpenAI(
-                api_key=os.getenv("OPENAI_API_KEY"),
-                model="gpt-4o-mini",
-                temperature=0.5,
-                top_p=0.8,
-            )
+        # Initialize LLMs based on use_ollama parameter; a router adds a cheap model next to the strong one
+        provider = 'ollama' if use_ollama else 'openai'
+        self.router = router
+        tiers = TIERS if router is not None else ("strong",)
+        self.llms = {tier: self.create_llm(MODELS[provider][tier], use_ollama, base_url, cassette) for tier in tiers}
+        self.llm = self.llms["strong"]
 
-        self.prompt_template = """Your name is {name}. You are: {personality}. Your current status is: {status}. The game state is: {game_state_info}.
+        # Per-turn delta only; everything that never changes lives in the system message (see build_graph)
+        # so the prompt prefix stays byte-identical from call to call and provider prompt caches can hit
+        self.prompt_template = """Turn {turn}. Your current status is: {status}. The game state is: {game_state_info}.
 
         Events since your last turn:
         {turn_summary}
 
-        Relevant game rules:
-        {relevant_rules}
-
         {agent_scratchpad}"""
 
         # Initialize RAG system
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2", model_kwargs={"device": "cpu"})
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+        # Shared by every neighbor using the same backend; a shared RulesSource brings its own
+        self.embeddings = make_embeddings(embedding_backend) if rules is None else rules.model
+        self.rules_backend = rules_backend  # "numpy" (exact, in memory) or "chroma"
+        self.rules = rules  # A RulesSource shared with other neighbors; refreshed by its owner
+        self.rules_version = None  # Version of the rules in static_prompt
         self.vectorstore = None
         self.setup_rag()
         
+        # Long-term memory of diplomacy and battles; the top few relevant memories are recalled each turn
+        self.memories = memories
+        self.memory = None  # Created on first use, once every realm's name is known
+        self.counterparties = set()  # Realms involved in this turn's events
+        
         # Starting resources from config
-        self.land = STARTING_LAND
-        self.peasants = STARTING_PEASANTS
-        self.soldiers = STARTING_SOLDIERS
-        self.food_production = STARTING_PEASANTS * FOOD_PER_PEASANT
-        self.food_consumption = STARTING_SOLDIERS * FOOD_PER_SOLDIER
+        config = game_state.config
+        self.land = config.STARTING_LAND
+        self.peasants = config.STARTING_PEASANTS
+        self.soldiers = config.STARTING_SOLDIERS
+        self.food_production = config.STARTING_PEASANTS * config.FOOD_PER_PEASANT
+        self.food_consumption = config.STARTING_SOLDIERS * config.FOOD_PER_SOLDIER
         self.net_food = self.food_production - self.food_consumption
         
         # Generate the AI's personality
-        self.personality = self.generate_personality()
+        with self.usage_log.record(neighbor=self.name, turn=game_state.turn, tier="cheap" if router else "strong"):
+            self.personality = self.generate_personality()
         
         # Message tracking
         self.messages_sent_this_turn = set()
         self.message_history = []
+        self.inbox = []  # Messages delivered at the start of this turn
         
         # Attack tracking
         self.attacks_sent_this_turn = set()
         
-        # AI memory
-        self.checkpointer = InMemorySaver()
+        # AI memory (shared checkpointers keep each neighbor apart by thread_id)
+        self.checkpointer = checkpointer or _default_checkpointer
+        if checkpointer is None:
+            weakref.finalize(self, _default_checkpointer.delete_thread, self.thread_id)
 
         # Build the langgraph graph, which is an agentic loop
         self.graph = self.build_graph()
+        self.planner_llms = {tier: bind_once(llm, "plan", lambda model: model.bind_tools([TurnPlan], tool_choice="TurnPlan"))
+                             for tier, llm in self.llms.items()}
+        self.planner_llm = self.planner_llms["strong"]
+
+    def create_llm(self, model, use_ollama, base_url=None, cassette=None):
+        """Chat model for one tier, shared with other neighbors using the same one"""
+        key = (model, use_ollama, base_url, id(cassette))
+        with _llm_clients_lock:
+            if key not in _llm_clients:
+                _llm_clients[key] = (cassette, self.new_llm(model, use_ollama, base_url, cassette))  # Holding the cassette keeps its id unique
+            return _llm_clients[key][1]
+
+    def new_llm(self, model, use_ollama, base_url=None, cassette=None):
+        """A new chat model (a replayed cassette needs no model at all)"""
+        if cassette is not None and cassette.mode == "replay":
+            return cassette.wrap(None, model)
+        if use_ollama:
+            authorization = HTTPBasicAuth(os.getenv("NGROK_USER"), os.getenv("NGROK_PASS"))
+            llm = ChatOllama(
+                base_url=base_url or os.getenv("NGROK_URL"),
+                auth=authorization,
+                model=model,
+                temperature=0.6,
+                top_p=0.8,
+                top_k=50,
+                repeat_penalty=1.1,
+                repeat_last_n=64,
+                num_ctx=24000,
+                num_predict=1536,
+                keep_alive="7m",
+                num_thread=8
+            )
+        else:
+            # Initialize OpenAI LLM
+            llm = ChatOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=base_url or os.getenv("OPENAI_API_BASE"),
+                model=model,
+                temperature=0.5,
+                top_p=0.8,
+            )
+        if cassette is not None and cassette.mode == "record":
+            llm = cassette.wrap(llm, model)
+        return llm
+
     def take_turn(self):
         """LLM agent takes its turn"""
         if self.verbose_logging:
@@ -96,68 +160,128 @@ class LLMNeighbor:
         --------------------------------------------
 
         """)
+        self.inbox = self.game_state.deliver_messages(self)
+        self.sync_rules()
+        signals = gather_signals(self)
+        self.game_state.diplomacy.clear_received(self.name)
+        self.remember(self.turn_events())
+        if self.activation.decide(signals) is None:
+            self.quiet_turns += 1
+            result = self.activation.routine(self)
+            if self.verbose_logging:
+                print(f"😴 Quiet turn, no LLM call: {result}")
+            else:
+                print(f"{self.name}: {result}")
+            remember_resources(self)
+            self.reset_turn()
+            return
+        self.quiet_turns = 0
+
+        # Pick the model for this turn
+        tier = "strong"
+        if self.router is not None:
+            tier, reason = self.router.route(signals)
+            if self.verbose_logging:
+                print(f"🧭 Using the {tier} model ({reason})")
+        self.llm = self.tool_llms[tier]
+        self.planner_llm = self.planner_llms[tier]
+
+        with self.usage_log.record(neighbor=self.name, turn=self.game_state.turn, tier=tier), \
+                self.router.measure(tier) if self.router is not None else nullcontext():
+            if self.turn_mode == "plan":
+                self.take_planned_turn()
+            else:
+                self.take_graph_turn()
+        self.remember(self.own_messages())
+        remember_resources(self)
+        
+        # Reset turn tracking
+        self.reset_turn()
+
+    def take_graph_turn(self):
+        """Take the turn through the agent <-> tools loop"""
         try:
             # Get current game state for the LLM
             gameStateInfo = self.get_game_state_info()
             
             turn_summary = self.get_ai_turn_summary()
 
-            relevant_rules = self.get_relevant_rules(f"{self.get_ai_turn_summary()}")
-
             formatted_prompt = self.prompt_template.format(
-                name=self.name,
-                personality=self.personality,
+                turn=self.game_state.turn,
                 status=self.get_status(),
                 game_state_info=gameStateInfo,
                 turn_summary=turn_summary,
-                relevant_rules=relevant_rules,
                 agent_scratchpad=""
             )
 		
-            result = self.graph.invoke({"messages": [HumanMessage(content=formatted_prompt)]}, config={"configurable":{"thread_id":self.player_id}})
+            result = self.graph.invoke({"messages": [HumanMessage(content=formatted_prompt)]}, config=self.graph_config())
             if self.verbose_logging:
                 print(formatted_prompt)
                 print(result["messages"][-1].content)
         except Exception as e:
             print(f"Error in LLM turn for {self.name}: {e}")
-        
-        # Reset turn tracking
-        self.reset_turn()
 
+    def prepare_turn(self):
+        """Work that does not depend on this turn's actions, done early (e.g. while the human is typing)"""
+        batch = self.game_state.last_combat
+        if batch is not None:
+            self.prepared_combat = (batch, batch.render_attacks_on(self), batch.render_attacks_by(self))
+        if not self.rules_warmed:
+            # The first similarity search pays for loading and warming the embedding model
+            self.get_relevant_rules("attack defend recruit tribute treaty")
+            self.rules_warmed = True
+
+    def take_planned_turn(self):
+        """Take the whole turn from one structured plan instead of the agent loop"""
+        try:
+            turn_summary = self.get_ai_turn_summary()
+            briefing = build_briefing(self, turn_summary)
+            plan, calls = request_plan(self.planner_llm, self.static_prompt, briefing)
+            if self.verbose_logging:
+                print(briefing)
+                print(f"📋 Plan ({calls} LLM call{'s' if calls > 1 else ''}): {plan.summary}")
+            
+            for planned in plan.actions:
+                call = plan_action_call(planned)
+                if call is None:
+                    result = f"Skipped incomplete {planned.action}"
+                else:
+                    method, kwargs = call
+                    result = getattr(self, method)(**kwargs)
+                if self.verbose_logging:
+                    print(f"   {planned.action}: {result}")
+                else:
+                    print(f"{self.name}: {result}")
+        except Exception as e:
+            print(f"Error in LLM planned turn for {self.name}: {e}")
+    
     def get_ai_turn_summary(self):
         """Get a summary of all actions that happened to this AI since its last turn"""
         summary_parts = []
         
-        # Check for incoming attacks
-        incoming_attacks = []
-        for result in self.game_state.combat_results:
-            if f"defeated by {self.name}" in result.lower() or f"repelled {self.name}" in result.lower():
-                incoming_attacks.append(result)
-        
+        # Battles from the last combat resolution, which ran after this AI's previous turn
+        batch = self.game_state.last_combat
+        if batch is not None and self.prepared_combat[0] is batch:
+            _, incoming_attacks, outgoing_attacks = self.prepared_combat
+        elif batch is not None:
+            incoming_attacks, outgoing_attacks = batch.render_attacks_on(self), batch.render_attacks_by(self)
+        else:
+            incoming_attacks, outgoing_attacks = [], []
         if incoming_attacks:
             summary_parts.append("INCOMING ATTACKS:")
             for attack in incoming_attacks:
                 summary_parts.append(f"  - {attack}")
         
-        # Check for outgoing attacks (attacks this AI made)
-        outgoing_attacks = []
-        for result in self.game_state.combat_results:
-            if f"{self.name} defeats" in result or f"{self.name} repelled" in result:
-                outgoing_attacks.append(result)
-        
         if outgoing_attacks:
             summary_parts.append("YOUR ATTACKS:")
             for attack in outgoing_attacks:
                 summary_parts.append(f"  - {attack}")
         
-        # Check for messages received since last turn
-        current_turn = self.game_state.turn
-        recent_messages = [msg for msg in self.message_history 
-                          if msg.get('from') and msg.get('turn', 0) == current_turn]
-        if recent_messages:
+        # Messages delivered from the mailbox at the start of this turn
+        if self.inbox:
             summary_parts.append("MESSAGES RECEIVED:")
-            for msg in recent_messages:
-                summary_parts.append(f"  - From {msg['from']}: {msg['content']}")
+            for msg in self.inbox:
+                summary_parts.append(f"  - From {msg['sender']}: {msg['content']}")
         
         # Check for resource changes
         resource_changes = []
@@ -177,18 +301,58 @@ class LLMNeighbor:
             summary_parts.append("RESOURCE CHANGES:")
             summary_parts.append(f"  - {', '.join(resource_changes)}")
         
-        # Store current resources for next turn comparison
-        self._previous_resources = {
-            'land': self.land,
-            'peasants': self.peasants,
-            'soldiers': self.soldiers
-        }
+        # Older events with the realms involved now, in place of keeping every past turn in context
+        recalled = self.recall("\n".join(summary_parts) or self.get_status())
+        if recalled:
+            summary_parts.append("FROM EARLIER TURNS:")
+            for _, text in recalled:
+                summary_parts.append(f"  - {text}")
         
         if not summary_parts:
             return "No significant events since your last turn."
         
         return "\n".join(summary_parts)
     
+    def turn_events(self):
+        """Battles and messages since the last turn, as memories: (turn, text, realms involved)"""
+        turn = self.game_state.turn
+        names = [entity.name for entity in self.game_state.nearby(self)]
+        lines = []
+        batch = self.game_state.last_combat
+        if batch is not None:
+            lines += [(line, ()) for line in batch.render_attacks_on(self) + batch.render_attacks_by(self)]
+        lines += [(f"{msg['sender']} told us: {msg['content']}", (msg['sender'],)) for msg in self.inbox]
+        events = [(turn, f"Turn {turn}: {text}", {name for name in names if name in text} | set(senders))
+                  for text, senders in lines]
+        self.counterparties = set().union(*(parties for _, _, parties in events))
+        return events
+
+    def own_messages(self):
+        """What this neighbor said this turn (promises and threats included), as memories"""
+        turn = self.game_state.turn
+        return [(turn, f"Turn {turn}: We told {entry['to']}: {entry['content']}", set(entry['to'].split(", ")))
+                for entry in self.message_history if entry.get('to') and entry['turn'] == turn]
+
+    def remember(self, events):
+        if not self.memories or not events or self.embeddings is None:
+            return
+        try:
+            if self.memory is None:
+                self.memory = EpisodicMemory(self.embeddings, [entity.name for entity in self.game_state.entities])
+            self.memory.remember(events)
+        except Exception as e:
+            print(f"Error storing memories for {self.name}: {e}")
+
+    def recall(self, query):
+        """The memories from earlier turns most relevant to query and this turn's counterparties"""
+        if self.memory is None:
+            return []
+        try:
+            return self.memory.recall(query, self.counterparties, k=self.memories, before_turn=self.game_state.turn)
+        except Exception as e:
+            print(f"Error recalling memories for {self.name}: {e}")
+            return []
+
     def generate_personality(self):
         """Generate a personality description by asking AI to create a historical ruler"""
         
@@ -206,7 +370,8 @@ class LLMNeighbor:
         Create a new, unique ruler:"""
         
         try:
-            response = self.llm.invoke(prompt)
+            # Personalities are routine work for the cheap model when there is one
+            response = self.llms.get("cheap", self.llms["strong"]).invoke(prompt)
             if self.verbose_logging:
                 print(f"Personality: {response.content.strip()}")
             return response.content.strip()
@@ -219,32 +384,19 @@ class LLMNeighbor:
         """Calculate total power for relative comparisons"""
         return (self.peasants + self.soldiers * 2) * self.land / 1000
     
-    def update_economy(self):
-        """Update economic calculations (same as player)"""
-        # Peasants grow naturally using config values
-        max_peasants = self.land * PEASANTS_PER_ACRE
-        growth_rate = PEASANT_GROWTH_RATE if self.peasants < max_peasants else PEASANT_GROWTH_RATE_CAPPED
-        new_peasants = int(self.peasants * growth_rate)
-        
-        if self.land > 0:
-            self.peasants += new_peasants
-        
-        # Calculate food production and consumption
-        self.food_production = self.peasants * FOOD_PER_PEASANT
-        self.food_consumption = self.soldiers * FOOD_PER_SOLDIER
-        self.net_food = self.food_production - self.food_consumption
-    
     def get_game_state_info(self):
-        """Get current game state information for the LLM"""
-        all_entities = [self.game_state.player] + self.game_state.neighbors
-        other_entities = [e for e in all_entities if e != self]
+        """Get current game state information for the LLM (only realms in reach on a large map)"""
+        other_entities = self.game_state.nearby(self)
         
         info = f"Your resources: {self.peasants} peasants, {self.soldiers} soldiers, {self.land} land\n"
         info += f"Your food: {self.food_production} production, {self.food_consumption} consumption, {self.net_food} net\n"
+        if self.game_state.world_map is not None:
+            info += f"Realms within {self.game_state.config.MAP_RADIUS} borders of you (the rest of the world is out of reach):\n"
         
         for entity in other_entities:
             relative_power = self.game_state.get_relative_power(self, entity)
-            info += f"{entity.name}: {relative_power} power, {entity.soldiers} soldiers, {entity.peasants} peasants\n"
+            relation = self.game_state.diplomacy.describe(self.name, entity.name)
+            info += f"{entity.name}: {relative_power} power, {entity.soldiers} soldiers, {entity.peasants} peasants; {relation}\n"
         
         return info
     
@@ -254,7 +406,7 @@ class LLMNeighbor:
         return f"""Land: {self.land}
         Population: {self.peasants} peasants, {self.soldiers} soldiers
         Food: {self.food_production} production, {self.food_consumption} consumption, {self.net_food} net
-        Total Power: {self.get_total_power():.1f}"""
+        Total Power: {self.game_state.get_power(self):.1f}"""
     
     def get_entity_info(self, entity_name: str) -> str:
         """Get information about another entity"""
@@ -272,7 +424,7 @@ class LLMNeighbor:
         """Get detailed information about another player including their resource counts"""
         entity = self.game_state.get_entity_by_name(player_name)
         if not entity:
-            return f"Player '{player_name}' not found. Available players: {', '.join([e.name for e in [self.game_state.player] + self.game_state.neighbors if e.name != self.name])}"
+            return f"Player '{player_name}' not found. Available players: {', '.join(e.name for e in self.game_state.nearby(self))}"
         
         # Calculate relative power
         relative_power = self.game_state.get_relative_power(self, entity)
@@ -290,14 +442,25 @@ class LLMNeighbor:
         Net Food: {entity.net_food}
         
         Military:
-        Total Power: {entity.get_total_power():.1f}
-        Relative Power vs You: {relative_power}"""
+        Total Power: {self.game_state.get_power(entity):.1f}
+        Relative Power vs You: {relative_power}
+        
+        Diplomacy:
+        {self.game_state.diplomacy.describe(self.name, player_name)}"""
+    
+    def forecast_recruitment(self, amounts: List[int], turns: int = 5) -> str:
+        """Project peasants, soldiers, net food and power a few turns ahead for each amount recruited now"""
+        if not amounts:
+            return "Give at least one amount to forecast."
+        turns = min(max(int(turns), 1), 20)
+        return "\n".join(describe_recruitment(self, amounts[:10], turns, self.game_state.config))
     
     def recruit_soldiers(self, amount: int) -> str:
         """Recruit soldiers from peasants"""
         if self.can_recruit_soldiers(amount):
             self.peasants -= amount
             self.soldiers += amount
+            self.game_state.mark_power_dirty()
             return f"Recruited {amount} soldiers. Now have {self.soldiers} soldiers."
         return f"Cannot recruit {amount} soldiers. Need {amount} peasants and {amount * 3} net profit."
     
@@ -306,6 +469,7 @@ class LLMNeighbor:
         if amount <= self.soldiers:
             self.soldiers -= amount
             self.peasants += amount
+            self.game_state.mark_power_dirty()
             return f"Dismissed {amount} soldiers. Now have {self.soldiers} soldiers and {self.peasants} peasants."
         return f"Cannot dismiss {amount} soldiers. Only have {self.soldiers} soldiers."
     
@@ -322,6 +486,22 @@ class LLMNeighbor:
             return f"Message sent to {recipient_name}: {content}"
         return f"Already sent a message to {recipient_name} this turn."
     
+    def broadcast_message(self, content: str, recipient_names: List[str] = None) -> str:
+        """Send one diplomatic message to several entities at once, or to everyone if no recipients are given"""
+        recipients = recipient_names if recipient_names else BROADCAST
+        names = [name for name in self.game_state.resolve_recipients(self, recipients)
+                 if name not in self.messages_sent_this_turn]
+        if not names:
+            return "No one left to message this turn (each entity can be messaged once per turn)."
+        self.game_state.send_message(self, names, content)
+        self.messages_sent_this_turn.update(names)
+        self.message_history.append({
+            'to': ", ".join(names),
+            'content': content,
+            'turn': self.game_state.turn
+        })
+        return f"Message sent to {', '.join(names)}: {content}"
+    
     def attack_target(self, target_name: str, attack_force: int = None) -> str:
         """Attack a target player"""
         target = self.game_state.get_entity_by_name(target_name)
@@ -332,8 +512,15 @@ class LLMNeighbor:
         if target_name in self.attacks_sent_this_turn:
             return f"Already attacked {target_name} this turn. You can only attack each player once per turn."
         
-        if self.soldiers < 50:
-            return "Need at least 50 soldiers to attack."
+        if not self.game_state.in_reach(self, target):
+            return self.out_of_reach(target_name)
+        
+        if self.game_state.diplomacy.blocks_attack(self.name, target_name):
+            return f"You have a non-aggression pact with {target_name}. Cancel it first if you mean to attack."
+        
+        min_attack = self.game_state.config.MIN_ATTACK_FORCE
+        if self.soldiers < min_attack:
+            return f"Need at least {min_attack} soldiers to attack."
         
         if attack_force is None:
             attack_force = min(self.soldiers, int(self.soldiers * 0.8))
@@ -359,6 +546,9 @@ class LLMNeighbor:
         if not target:
             return f"Target {recipient_name} not found."
         
+        if not self.game_state.in_reach(self, target):
+            return self.out_of_reach(recipient_name)
+        
         if land_amount < 0 or peasant_amount < 0:
             return "Cannot send negative amounts."
         
@@ -381,6 +571,9 @@ class LLMNeighbor:
             self.peasants -= peasant_amount
             target.peasants += peasant_amount
         
+        self.game_state.mark_power_dirty()
+        self.game_state.diplomacy.record_tribute(self.name, recipient_name, land_amount, peasant_amount)
+        
         # Send a message about the tribute (don't count as a regular message)
         tribute_message = f"Tribute sent: {land_amount} land, {peasant_amount} peasants"
         self.game_state.send_message(self, recipient_name, tribute_message)
@@ -392,9 +585,55 @@ class LLMNeighbor:
         
         return f"Sent tribute to {recipient_name}: {land_amount} land, {peasant_amount} peasants"
     
+    def propose_treaty(self, target_name: str, treaty: str) -> str:
+        """Offer an 'alliance' or 'non_aggression' treaty to another player"""
+        if treaty not in TREATY_TYPES:
+            return f"Unknown treaty '{treaty}'. Choose one of: {', '.join(TREATY_TYPES)}."
+        if not self.game_state.get_entity_by_name(target_name) or target_name == self.name:
+            return f"Target {target_name} not found."
+        
+        outcome = self.game_state.diplomacy.propose(treaty, self.name, target_name)
+        if outcome == 'signed':
+            return f"{treaty} with {target_name} is now in force."
+        if outcome == 'active':
+            return f"You already have a {treaty} with {target_name}."
+        return f"Offered a {treaty} to {target_name}. It takes effect if they accept by proposing it back."
+    
+    def cancel_treaty(self, target_name: str, treaty: str) -> str:
+        """Leave an 'alliance' or 'non_aggression' treaty with another player"""
+        if treaty not in TREATY_TYPES:
+            return f"Unknown treaty '{treaty}'. Choose one of: {', '.join(TREATY_TYPES)}."
+        if not self.game_state.get_entity_by_name(target_name) or target_name == self.name:
+            return f"Target {target_name} not found."
+        
+        if self.game_state.diplomacy.cancel(treaty, self.name, target_name):
+            return f"Cancelled the {treaty} with {target_name}. They will trust you less."
+        return f"You have no {treaty} with {target_name}."
+    
+    def pledge_tribute(self, recipient_name: str, land_per_turn: int = 0, peasants_per_turn: int = 0) -> str:
+        """Pay land and peasants to another player every turn; pledge zero of both to stop"""
+        target = self.game_state.get_entity_by_name(recipient_name)
+        if not target or recipient_name == self.name:
+            return f"Target {recipient_name} not found."
+        if land_per_turn < 0 or peasants_per_turn < 0:
+            return "Cannot pledge negative amounts."
+        if (land_per_turn or peasants_per_turn) and not self.game_state.in_reach(self, target):
+            return self.out_of_reach(recipient_name)
+        
+        self.game_state.diplomacy.pledge_tribute(self.name, recipient_name, land_per_turn, peasants_per_turn)
+        if land_per_turn == 0 and peasants_per_turn == 0:
+            return f"Stopped paying tribute to {recipient_name}."
+        return f"Pledged {land_per_turn} land and {peasants_per_turn} peasants to {recipient_name} every turn."
+    
+    def out_of_reach(self, target_name):
+        """Why an attack or tribute to a realm too far away was refused"""
+        nearby = ", ".join(entity.name for entity in self.game_state.nearby(self))
+        return (f"{target_name} is more than {self.game_state.config.MAP_RADIUS} borders away. "
+                f"Realms in reach: {nearby or 'none'}.")
+    
     def can_recruit_soldiers(self, amount):
         """Check if AI can recruit specified number of soldiers"""
-        return self.peasants >= amount and self.net_food >= amount * FOOD_PER_SOLDIER
+        return self.peasants >= amount and self.net_food >= amount * self.game_state.config.FOOD_PER_SOLDIER
     
     def receive_message(self, message_data):
         """Receive a message from another entity"""
@@ -404,11 +643,20 @@ class LLMNeighbor:
             'turn': message_data['turn']
         })
     
+    def receive_messages(self, batch):
+        """Receive a batch of messages delivered from the mailbox"""
+        for message_data in batch:
+            self.receive_message(message_data)
+    
     def reset_turn(self):
         """Reset turn-specific tracking"""
         self.messages_sent_this_turn.clear()
         self.attacks_sent_this_turn.clear()
     
+    def graph_config(self):
+        """Config for the shared graph: this neighbor's checkpoint thread and registry key"""
+        return {"configurable": {"thread_id": self.thread_id, "neighbor": self.agent_key}}
+    
     def _execute_tool_calls(self, tool_calls):
         """Execute tool calls from the LLM response"""
         for tool_call in tool_calls:
@@ -416,10 +664,10 @@ class LLMNeighbor:
             tool_args = tool_call["args"]
             
             # Find and execute the tool
-            for tool in self.tools:
+            for tool in shared_tools(type(self)):
                 if tool.name == tool_name:
                     try:
-                        result = tool.invoke(tool_args)
+                        result = tool.invoke(tool_args, config=self.graph_config())
                         print(f"tool_call: {tool_call}")
                         print(f"{self.name}: {result}")
                     except Exception as e:
@@ -427,224 +675,43 @@ class LLMNeighbor:
                     break
 
     def build_graph(self):
-        # Define tools as instance methods
-        tools = [
-            StructuredTool.from_function(
-                func=self.recruit_soldiers,
-                name="recruit_soldiers",
-                description="Recruit soldiers from peasants. Reduces peasants and increases soldiers. Since there are fewer peasants you will make less taxes and pay upkeep on soldiers."
-            ),
-            StructuredTool.from_function(
-                func=self.dismiss_soldiers,
-                name="dismiss_soldiers", 
-                description="Dismiss soldiers back to peasants. Peasants can't fight, but they make money for you. This will increase your peasants and decrease your soldiers."
-            ),
-            StructuredTool.from_function(
-                func=self.send_message,
-                name="send_message",
-                description="Send a diplomatic message to another entity. This is FREE and has NO COST. Use this to negotiate, threaten, form alliances, gather information, or respond to other players. You can only message each entity once per turn, so make it count! Messages are your primary tool for diplomacy and can prevent wars or secure tribute."
-            ),
-            StructuredTool.from_function(
-                func=self.attack_target,
-                name="attack_target",
-                description="Attack another entity with your soldiers. It is easier to defend than to attack, but if you attack somebody successfully you take some of their land."
-            ),
-            StructuredTool.from_function(
-                func=self.send_tribute,
-                name="send_tribute",
-                description="Send tribute (land or peasants) to another entity. This can be used for diplomacy, trade, alliances, or to avoid conflict."
-            ),
-            StructuredTool.from_function(
-                func=self.get_relevant_rules,
-                name="get_relevant_rules",
-                description="Retrieve the most relevant game rules or policies for a question. Call this BEFORE deciding actions if you're unsure what's allowed, what's efficient, or what is strategically wise."
-            ),
-            StructuredTool.from_function(
-                func=self.get_player_info,
-                name="get_player_info",
-                description="Get detailed information about another player including their resources, military strength, economy, and diplomatic relations. Use this to assess other players before making diplomatic or military decisions."
-            )
-        ]
-        # load the system prompt from the file
-        with open("system_prompt.txt", "r", encoding="utf-8") as f:
-            system_prompt = f.read()
-
-        # System message
-        sys_msg = SystemMessage(content=system_prompt)
-
-        self.llm = self.llm.bind_tools(tools)
-
-        graph = StateGraph(MessagesState)
-
-        def agent_node(state: MessagesState):
-            if self.verbose_logging:
-                print(f"\n🤖 AGENT NODE - Processing message for {self.name}...")
-            messages = state["messages"]
-            if self.verbose_logging:
-                print(f"📝 Input messages count: {len(messages)}")
-            
-            try:
-                # Add system message at the beginning
-                messages_with_system = [sys_msg] + messages
-                
-                response = self.llm.invoke(messages_with_system)
-                if self.verbose_logging:
-                    print(f"✅ Agent response generated successfully")
-                    print(f"📤 Response type: {type(response)}")
-                    if hasattr(response, 'tool_calls') and response.tool_calls:
-                        print(f"🔧 Tool calls requested: {len(response.tool_calls)}")
-                        for i, tool_call in enumerate(response.tool_calls):
-                            print(f"   Tool {i+1}: {tool_call['name']} with args: {tool_call['args']}")
-                    else:
-                        print("💬 No tool calls - direct response")
-                elif not self.verbose_logging:
-                    # Print succinct action summaries based on tool calls
-                    if hasattr(response, 'tool_calls') and response.tool_calls:
-                        for tool_call in response.tool_calls:
-                            tool_name = tool_call['name']
-                            tool_args = tool_call['args']
-                            
-                            if tool_name == 'recruit_soldiers':
-                                amount = tool_args.get('amount', 0)
-                                print(f"{self.name} recruited {amount} soldiers")
-                            elif tool_name == 'dismiss_soldiers':
-                                amount = tool_args.get('amount', 0)
-                                print(f"{self.name} dismissed {amount} soldiers")
-                            elif tool_name == 'send_message':
-                                recipient = tool_args.get('recipient_name', 'someone')
-                                print(f"{self.name} sent a message to {recipient}")
-                            elif tool_name == 'attack_target':
-                                target = tool_args.get('target_name', 'someone')
-                                attack_force = tool_args.get('attack_force', 'unknown')
-                                print(f"{self.name} attacked {target} with {attack_force} soldiers")
-                            elif tool_name == 'send_tribute':
-                                recipient = tool_args.get('recipient_name', 'someone')
-                                land = tool_args.get('land_amount', 0)
-                                peasants = tool_args.get('peasant_amount', 0)
-                                print(f"{self.name} sent tribute to {recipient}: {land} land, {peasants} peasants")
-                            elif tool_name == 'get_player_info':
-                                player = tool_args.get('player_name', 'someone')
-                                print(f"{self.name} gathered intelligence on {player}")
-                            elif tool_name == 'get_relevant_rules':
-                                print(f"{self.name} consulted the rulebook")
-                    else:
-                        print(f"{self.name} finished their turn")
-
-                return {"messages": [response]}
-            except Exception as e:
-                print(f"❌ Error in agent node: {e}")
-                raise
-
-        def tool_node(state: MessagesState):
-            if self.verbose_logging:
-                print(f"\n🔧 TOOL NODE - Executing tools...")
-            messages = state["messages"]
-            
-            # Find the last message with tool calls
-            last_message = messages[-1]
-            if not hasattr(last_message, 'tool_calls') or not last_message.tool_calls:
-                if self.verbose_logging:
-                    print("⚠️ No tool calls found in last message")
-                return {"messages": []}
-            
-            if self.verbose_logging:
-                print(f"🎯 Found {len(last_message.tool_calls)} tool calls to execute")
-            
-            tool_results = []
-            for i, tool_call in enumerate(last_message.tool_calls):
-                tool_name = tool_call['name']
-                tool_args = tool_call['args']
-                tool_id = tool_call['id']
-                
-                if self.verbose_logging:
-                    print(f"\n🔨 Executing Tool {i+1}/{len(last_message.tool_calls)}:")
-                    print(f"   Name: {tool_name}")
-                    print(f"   Args: {tool_args}")
-                    print(f"   ID: {tool_id}")
-                
-                try:
-                    # Find the tool function
-                    tool_func = None
-                    for tool in tools:
-                        if tool.name == tool_name:
-                            tool_func = tool
-                            break
-                    
-                    if not tool_func:
-                        error_msg = f"Tool '{tool_name}' not found"
-                        if self.verbose_logging:
-                            print(f"❌ {error_msg}")
-                        tool_results.append(ToolMessage(
-                            content=error_msg,
-                            tool_call_id=tool_id
-                        ))
-                        continue
-                    
-                    # Execute the tool
-                    if self.verbose_logging:
-                        print(f"⚡ Executing {tool_name}...")
-                    result = tool_func.invoke(tool_args)
-                    if self.verbose_logging:
-                        print(f"✅ Tool {tool_name} executed successfully")
-                        print(f"📊 Result type: {type(result)}")
-                        print(f"📄 Result preview: {result}")
-                    
-                    tool_results.append(ToolMessage(
-                        content=str(result),
-                        tool_call_id=tool_id
-                    ))
-                    
-                except Exception as e:
-                    error_msg = f"Error executing {tool_name}: {str(e)}"
-                    if self.verbose_logging:
-                        print(f"❌ {error_msg}")
-                    tool_results.append(ToolMessage(
-                        content=error_msg,
-                        tool_call_id=tool_id
-                    ))
-            
-            if self.verbose_logging:
-                print(f"🏁 Tool execution completed. {len(tool_results)} results generated")
-            return {"messages": tool_results}
-
-        # --- Graph wiring ---
-        graph.add_node("agent", agent_node)
-        graph.add_node("tools", tool_node)
-
-        # start -> agent
-        graph.add_edge(START, "agent")
-
-        # if model calls a tool, go to tools node; else, end
-        graph.add_conditional_edges(
-            "agent",
-            tools_condition,
-            {"tools": "tools", "__end__": END}
-        )
-
-        # after running tools, go back to agent
-        graph.add_edge("tools", "agent")
+        """The process-wide agent graph; this neighbor only brings its prompt and tool-bound models"""
+        self.system_prompt = system_prompt()
+        self.update_static_prompt()
 
-        return graph.compile(checkpointer=self.checkpointer)
+        tools = shared_tools(type(self))
+        self.tool_llms = {tier: bind_once(llm, "tools", lambda model: model.bind_tools(tools))
+                          for tier, llm in self.llms.items()}
+        self.llm = self.tool_llms["strong"]
+        return shared_graph(self.checkpointer)
 
     def setup_rag(self):
         """Setup RAG system with game rules"""
         try:
-            with open('game_rules.txt', 'r', encoding='utf-8') as f:
-                rules_text = f.read()
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_text(rules_text)
-            
-            # Create vector store
-            self.vectorstore = Chroma.from_texts(
-                chunks, 
-                self.embeddings,
-                collection_name=f"game_rules_{self.player_id}"
-            )
+            self.vectorstore = self.rules or RulesSource('game_rules.txt', self.embeddings, self.rules_backend,
+                                                         collection_name=f"game_rules_{self.player_id}")
         except Exception as e:
             print(f"Error setting up RAG: {e}")
             self.vectorstore = None
 
+    def update_static_prompt(self):
+        """System message: the static prefix of every call (instructions, full rules, identity)"""
+        if self.vectorstore is not None:
+            rules_text, self.rules_version = self.vectorstore.text, self.vectorstore.version
+        else:
+            with open("game_rules.txt", "r", encoding="utf-8") as f:
+                rules_text = f.read()
+        self.static_prompt = f"{self.system_prompt}\n\nGame rules:\n{rules_text}\n\nYour name is {self.name}. You are: {self.personality}"
+
+    def sync_rules(self):
+        """Pick up edits to game_rules.txt; between turns, so a turn sees one version of the rules"""
+        if self.vectorstore is None:
+            return
+        if self.rules is None:
+            self.vectorstore.refresh()  # Our own index; a shared one is refreshed by whoever owns it
+        if self.vectorstore.version != self.rules_version:
+            self.update_static_prompt()
+
     def get_relevant_rules(self, query: str) -> str:
         """Get relevant game rules for a specific query"""
         if not self.vectorstore:
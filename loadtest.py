@@ -0,0 +1,128 @@
+# Load test: many simultaneous games of LLM neighbors against the mock LLM server.
+#
+# Each game runs on its own thread with a scripted ruler in the player's seat,
+# so the only blocking work is the neighbors' LLM traffic. Reports p50/p95/p99
+# latency of single neighbor turns and of whole game turns.
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from game_state import GameState
+from llm_neighbor import LLMNeighbor
+from scripted_ruler import ScriptedRuler
+from mock_llm_server import start_server, add_backend_arguments, backend_options
+from router import ModelRouter
+from usage import UsageLog
+from embeddings import make_embeddings
+from rules_index import RulesSource
+
+NEIGHBOR_NAMES = ["Northern Realm", "Eastern Empire", "Southern Dominion"]
+
+
+def neighbor_names(count):
+    """The usual names, then numbered realms for larger worlds"""
+    return NEIGHBOR_NAMES[:count] + [f"Realm {i + 1}" for i in range(len(NEIGHBOR_NAMES), count)]
+
+
+def play_load_game(game_id, base_url, use_ollama, turns, neighbors, turn_mode, router=None, usage_log=None, rules=None,
+                   large_map=False):
+    """Play one game against base_url; returns (neighbor turn seconds, game turn seconds)"""
+    game_state = GameState(seed=game_id, large_map=large_map)
+    player = ScriptedRuler("Western Kingdom", game_state, "balanced")
+    rulers = [
+        LLMNeighbor(name, game_state, player_id=i + 1, verbose_logging=False, use_ollama=use_ollama,
+                    turn_mode=turn_mode, thread_id=f"{game_id}:{name}", base_url=base_url, router=router,
+                    usage_log=usage_log, rules=rules)
+        for i, name in enumerate(neighbor_names(neighbors))
+    ]
+    game_state.initialize_game(player, rulers)
+
+    neighbor_turns, game_turns = [], []
+    for _ in range(turns):
+        turn_start = time.perf_counter()
+        player.reset_turn()
+        for neighbor in rulers:
+            neighbor.reset_turn()
+        player.take_turn()
+        for neighbor in rulers:
+            start = time.perf_counter()
+            neighbor.take_turn()
+            neighbor_turns.append(time.perf_counter() - start)
+        game_state.resolve_combat()
+        game_state.process_diplomacy()
+        game_state.update_economy()
+        game_turns.append(time.perf_counter() - turn_start)
+        if game_state.check_victory_conditions():
+            break
+        game_state.advance_turn()
+    return neighbor_turns, game_turns
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0.0, 0.0, 0.0)
+    return f"p50 {p50 * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms   (n={len(samples)})"
+
+
+def run_load_test(games, base_url, use_ollama=False, turns=5, neighbors=3, turn_mode="graph", router=None,
+                  usage_log=None, rules=None, large_map=False):
+    """Play games concurrently; returns all neighbor turn and game turn latencies"""
+    neighbor_turns, game_turns = [], []
+    with ThreadPoolExecutor(max_workers=games) as pool:
+        futures = [pool.submit(play_load_game, game_id, base_url, use_ollama, turns, neighbors, turn_mode, router,
+                               usage_log, rules, large_map)
+                   for game_id in range(games)]
+        for future in futures:
+            game_neighbor_turns, game_game_turns = future.result()
+            neighbor_turns += game_neighbor_turns
+            game_turns += game_game_turns
+    return np.array(neighbor_turns), np.array(game_turns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive many simultaneous games against a mock LLM server")
+    parser.add_argument("--games", type=int, default=20, help="Games played at the same time")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per game")
+    parser.add_argument("--neighbors", type=int, default=3, help="LLM neighbors per game")
+    parser.add_argument("--large-map", action="store_true",
+                       help="Place realms on a generated map where each only deals with realms nearby (for many --neighbors)")
+    parser.add_argument("--ollama", action="store_true", help="Use the Ollama API instead of OpenAI's")
+    parser.add_argument("--plan", action="store_true", help="Neighbors use the single-call plan turn mode")
+    parser.add_argument("--route", action="store_true", help="Route turns between a cheap and a strong model")
+    parser.add_argument("--url", default=None,
+                       help="Use an already running mock server instead of starting one in-process")
+    parser.add_argument("--embed-batch-ms", type=float, default=2.0, metavar="MS",
+                       help="Window for batching rules queries from all games into one embedding pass (0 = off)")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = start_server(**backend_options(args))
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+    router = ModelRouter() if args.route else None
+    usage_log = UsageLog()
+    # Every game in the process searches one rules index through one embedding model
+    embeddings = make_embeddings(batch_window=args.embed_batch_ms / 1000)
+    rules = RulesSource("game_rules.txt", embeddings)
+    start = time.perf_counter()
+    neighbor_turns, game_turns = run_load_test(
+        args.games, base_url if args.ollama else f"{base_url}/v1", args.ollama, args.turns, args.neighbors,
+        "plan" if args.plan else "graph", router, usage_log, rules, args.large_map,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.games} games x {args.turns} turns in {elapsed:.1f}s")
+    print(f"Neighbor turn: {percentiles(neighbor_turns)}")
+    print(f"Game turn:     {percentiles(game_turns)}")
+    print(usage_log.summary())
+    if hasattr(embeddings, "summary"):
+        print(embeddings.summary())
+    if router is not None:
+        print(router.summary())
+    if server is not None:
+        stats = server.backend.stats()
+        print(f"Server: {stats['requests']} requests, {stats['errors']} errors, peak {stats['peak_in_flight']} in flight")
+        server.shutdown()
@@ -6,12 +6,41 @@ from human_player import HumanPlayer
 from llm_neighbor import LLMNeighbor
 from renderer import Renderer
 from actions import ActionHandler
+from checkpoint_store import make_checkpointer
+from cassette import Cassette
+from activation import ActivationPolicy, ACTIVATION_MODES, QUIET_ACTIONS
+from router import ModelRouter
+from usage import UsageLog
+from turn_clock import TurnClock
+from commands import read_script
+from memprofile import MemoryProfiler
+from turn_stats import TurnStats
+from rules_index import RULES_BACKENDS, RulesSource
+from embeddings import EMBEDDING_BACKENDS, make_embeddings
 from dotenv import load_dotenv
 from config import *
 
-def main(verbose_logging=True, use_ollama=False):
+def main(verbose_logging=True, use_ollama=False, seed=None, turn_mode="graph",
+         checkpoint_db=None, keep_checkpoints=10, cassette=None,
+         activation=None, router=None, turn_seconds=None, script=None,
+         rules_backend="numpy", embedding_backend="huggingface", embed_batch_window=0,
+         memories=4, memprofile=None, stats=None):
+    # Trace allocations from the start so models and indexes are attributed too
+    profiler = MemoryProfiler(memprofile) if memprofile else None
+    
     # Initialize game state
-    game_state = GameState()
+    game_state = GameState(seed=seed)
+
+    # One checkpoint store shared by every neighbor, each on its own thread
+    checkpointer = make_checkpointer(checkpoint_db, keep_last=keep_checkpoints)
+    activation = activation or ActivationPolicy()
+    usage_log = UsageLog()
+    # One rules index for every neighbor, reloaded between rounds when game_rules.txt changes
+    try:
+        rules = RulesSource("game_rules.txt", make_embeddings(embedding_backend, batch_window=embed_batch_window), rules_backend)
+    except Exception as e:
+        print(f"Error setting up RAG: {e}")
+        rules = None  # Each neighbor tries its own index (and copes without one)
     
     # Create human player
     player = HumanPlayer("Western Kingdom", game_state)
@@ -22,59 +51,88 @@ def main(verbose_logging=True, use_ollama=False):
     
     # Create LLM Neighbors (limited by config)
     for i, name in enumerate(neighbor_names[:MAX_NEIGHBORS]):
-        llm_neighbor = LLMNeighbor(name, game_state, player_id=i+1, verbose_logging=verbose_logging, use_ollama=use_ollama)
+        llm_neighbor = LLMNeighbor(name, game_state, player_id=i+1, verbose_logging=verbose_logging, use_ollama=use_ollama, turn_mode=turn_mode,
+                                   checkpointer=checkpointer, thread_id=name, cassette=cassette,
+                                   activation=activation, router=router, usage_log=usage_log,
+                                   rules_backend=rules_backend, embedding_backend=embedding_backend, rules=rules,
+                                   memories=memories)
         neighbors.append(llm_neighbor)
     
     game_state.initialize_game(player, neighbors)
     
     # Initialize renderer and action handler
     renderer = Renderer()
-    action_handler = ActionHandler(game_state, verbose_logging)
+    turn_clock = TurnClock(turn_seconds) if turn_seconds else None
+    action_handler = ActionHandler(game_state, verbose_logging, turn_clock, script)
     action_handler.set_renderer(renderer)  # Connect renderer to action handler
     
     # Connect renderer to game state for attack tracking
     game_state.renderer = renderer
+    if profiler is not None:
+        profiler.watch(game_state, renderer, checkpointer)
+        profiler.snapshot(game_state.turn)
+    turn_stats = TurnStats(game_state, usage_log, stats) if stats else None
     
-    # Main game loop
-    while not game_state.is_game_over():
-        print(f"\n=== TURN {game_state.turn} ===")
+    try:
+        # Main game loop
+        while not game_state.is_game_over():
+            print(f"\n=== TURN {game_state.turn} ===")
         
-        # Clear attack results and old action results at start of turn
-        renderer.clear_attack_results()
-        renderer.clear_old_action_results(game_state.turn)
+            if rules is not None and rules.refresh():
+                print(f"📜 Rules changed: re-indexed, {rules.last_embedded} chunk(s) re-embedded")
         
-        # Reset turn tracking for all entities
-        player.reset_turn()
-        for neighbor in neighbors:
-            neighbor.reset_turn()
+            # Clear attack results and old action results at start of turn
+            renderer.clear_attack_results()
+            renderer.clear_old_action_results(game_state.turn)
         
-        # Turn order: player first, then neighbors in creation order
-        all_entities = [player] + neighbors
+            # Reset turn tracking for all entities
+            player.reset_turn()
+            for neighbor in neighbors:
+                neighbor.reset_turn()
         
-        for entity in all_entities:
-            if entity == player:
-                action_handler.handle_player_actions(player)
-            else:
-                # AI neighbor turn
-                entity.take_turn()
+            # Turn order: player first, then neighbors in creation order
+            all_entities = [player] + neighbors
         
-        # Resolve combat and diplomacy
-        game_state.resolve_combat()
-        game_state.process_diplomacy()
+            for entity in all_entities:
+                if entity == player:
+                    # Neighbors get ready while the player is thinking
+                    action_handler.handle_player_actions(player, [neighbor.prepare_turn for neighbor in neighbors])
+                else:
+                    # AI neighbor turn
+                    entity.take_turn()
         
-        # Update economy
-        game_state.update_economy()
+            # Resolve combat and diplomacy
+            game_state.resolve_combat()
+            game_state.process_diplomacy()
         
-        # Check win conditions
-        if game_state.check_victory_conditions():
-            break
+            # Update economy
+            game_state.update_economy()
+            if turn_stats is not None:
+                turn_stats.record()
+        
+            # Check win conditions
+            if game_state.check_victory_conditions():
+                break
             
-        # Advance to next turn
-        game_state.advance_turn()
-        time.sleep(TURN_DELAY)  # Pause between turns from config
+            # Advance to next turn
+            game_state.advance_turn()
+            if profiler is not None:
+                profiler.snapshot(game_state.turn)
+            time.sleep(TURN_DELAY)  # Pause between turns from config
     
-    # Game over
-    renderer.display_final_results(game_state)
+        # Game over
+        renderer.display_final_results(game_state)
+        print(activation.summary())
+        print(usage_log.summary())
+        if router is not None:
+            print(router.summary())
+    finally:
+        # Also written when the game is quit early (Ctrl+C, end of input)
+        if profiler is not None:
+            print(profiler.finish())
+            print(f"Per-turn memory report written to {memprofile}")
+        if turn_stats is not None:
+            print(f"Per-turn statistics for {len(turn_stats)} turns written to {turn_stats.flush()}/")
 
 if __name__ == "__main__":
     load_dotenv()
@@ -85,8 +143,74 @@ if __name__ == "__main__":
                        help="Enable verbose logging for AI neighbors")
     parser.add_argument("--ollama", action="store_true",
                        help="Use ChatOllama instead of ChatOpenAI for AI neighbors")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Seed for combat randomness (reproducible battles)")
+    parser.add_argument("--plan", action="store_true",
+                       help="AI neighbors plan each turn in one structured LLM call instead of the agent loop")
+    parser.add_argument("--checkpoint-db", default=None, metavar="PATH",
+                       help="Keep AI memory in a SQLite file (or :memory:) pruned to the latest checkpoints")
+    parser.add_argument("--keep-checkpoints", type=int, default=10, metavar="N",
+                       help="Checkpoints kept per neighbor with --checkpoint-db")
+    parser.add_argument("--record", default=None, metavar="CASSETTE",
+                       help="Record every LLM request and response to a cassette file")
+    parser.add_argument("--re-record", action="store_true",
+                       help="With --record, replace the cassette file if it already exists")
+    parser.add_argument("--replay", default=None, metavar="CASSETTE",
+                       help="Serve LLM responses from a recorded cassette, without network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="SCALE",
+                       help="With --replay, sleep this fraction of each recorded response time (1.0 = as recorded)")
+    parser.add_argument("--activation", choices=ACTIVATION_MODES, default="events",
+                       help="When AI neighbors call the LLM: every turn, or only after events that need a decision")
+    parser.add_argument("--max-quiet-turns", type=int, default=5, metavar="N",
+                       help="With --activation events, think at least every N turns")
+    parser.add_argument("--quiet-action", choices=QUIET_ACTIONS, default="recruit",
+                       help="What a neighbor does on a turn it does not think")
+    parser.add_argument("--route", action="store_true",
+                       help="Use a cheap model for routine turns and the strong model for high-stakes ones")
+    parser.add_argument("--escalate-attacks", type=int, default=1, metavar="N",
+                       help="With --route, use the strong model after at least N incoming attacks")
+    parser.add_argument("--escalate-tribute", type=float, default=1, metavar="VALUE",
+                       help=f"With --route, use the strong model after receiving tribute worth VALUE peasants (an acre is worth {TRIBUTE_LAND_VALUE})")
+    parser.add_argument("--turn-seconds", type=float, default=None, metavar="S",
+                       help="Time limit for each of your turns; the turn ends automatically when it runs out")
+    parser.add_argument("--script", default=None, metavar="FILE",
+                       help="Play your first turns from a file of command lines (one per input, # comments); the keyboard takes over when it runs out")
+    parser.add_argument("--rules-index", choices=RULES_BACKENDS, default="numpy",
+                       help="Where AI neighbors search the game rules: an exact in-memory index, or Chroma for large corpora")
+    parser.add_argument("--embeddings", choices=EMBEDDING_BACKENDS, default="huggingface",
+                       help="Embedding model for rules search: PyTorch MiniLM, its int8 ONNX export, or static vectors (check with: python embeddings.py --verify BACKEND)")
+    parser.add_argument("--embed-batch-ms", type=float, default=0, metavar="MS",
+                       help="Batch rules queries from all neighbors arriving within this window into one embedding pass (default 0 = off; worth it only when many neighbors think at once, see loadtest.py)")
+    parser.add_argument("--memories", type=int, default=4, metavar="K",
+                       help="Older diplomacy and battle memories recalled into each AI turn (0 = no long-term memory)")
+    parser.add_argument("--memprofile", nargs="?", const="memprofile.txt", default=None, metavar="FILE",
+                       help="Snapshot allocations with tracemalloc every turn and write a growth report (default memprofile.txt)")
+    parser.add_argument("--stats", nargs="?", const="game_stats", default=None, metavar="DIR",
+                       help="Record every realm's resources, attacks and LLM calls each turn, written at game end as one .npy per column (default game_stats)")
     
     args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+
+    cassette = None
+    if args.record:
+        try:
+            cassette = Cassette(args.record, mode="record", overwrite=args.re_record)
+        except FileExistsError as error:
+            parser.error(f"{error}; pass --re-record to replace it")
+    elif args.replay:
+        cassette = Cassette(args.replay, mode="replay", latency_scale=args.replay_latency)
     
     # Run the game with the specified settings
-    main(verbose_logging=args.verbose, use_ollama=args.ollama)
+    main(verbose_logging=args.verbose, use_ollama=args.ollama, seed=args.seed,
+         turn_mode="plan" if args.plan else "graph",
+         checkpoint_db=args.checkpoint_db, keep_checkpoints=args.keep_checkpoints,
+         cassette=cassette,
+         activation=ActivationPolicy(args.activation, max_quiet_turns=args.max_quiet_turns,
+                                     quiet_action=args.quiet_action),
+         router=ModelRouter(args.escalate_attacks, args.escalate_tribute) if args.route else None,
+         turn_seconds=args.turn_seconds,
+         script=read_script(args.script) if args.script else None,
+         rules_backend=args.rules_index, embedding_backend=args.embeddings,
+         embed_batch_window=args.embed_batch_ms / 1000, memories=args.memories,
+         memprofile=args.memprofile, stats=args.stats)
@@ -0,0 +1,82 @@
+# Long-term episodic memory for neighbors: past diplomacy and battles, recalled by relevance
+import numpy as np
+from rules_index import normalize
+
+
+class EpisodicMemory:
+    """Events a neighbor lived through, embedded as they happen.
+
+    Each memory is a line of text, the turn it happened and the realms it
+    involved (a row of a boolean matrix over names). recall() returns the
+    few older memories closest to a query among those involving the
+    current counterparties, so a promise broken twenty turns ago can come
+    back without keeping twenty turns of conversation in context.
+    """
+
+    def __init__(self, embedding, names, capacity=64):
+        self.embedding = embedding
+        self.index = {name: i for i, name in enumerate(names)}
+        self.texts = []
+        self.vectors = None  # (capacity, dim) float32, rows past len(self) unused
+        self.turns = np.zeros(capacity, dtype=np.int64)
+        self.parties = np.zeros((capacity, len(self.index)), dtype=bool)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def party_columns(self, names):
+        return [self.index[name] for name in names if name in self.index]
+
+    def grow(self, needed):
+        capacity = len(self.turns)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        self.turns = np.resize(self.turns, capacity)
+        parties = np.zeros((capacity, self.parties.shape[1]), dtype=bool)
+        parties[:len(self)] = self.parties[:len(self)]
+        self.parties = parties
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:len(self)] = self.vectors[:len(self)]
+        self.vectors = vectors
+
+    def remember(self, events):
+        """Store [(turn, text, party names)], embedding all texts in one call"""
+        if not events:
+            return
+        vectors = normalize(np.asarray(self.embedding.embed_documents([text for _, text, _ in events]), dtype=np.float32))
+        if self.vectors is None:
+            self.vectors = np.zeros((len(self.turns), vectors.shape[1]), dtype=np.float32)
+        start = len(self)
+        self.grow(start + len(events))
+        end = start + len(events)
+        self.vectors[start:end] = vectors
+        self.turns[start:end] = [turn for turn, _, _ in events]
+        for row, (_, _, names) in enumerate(events, start):
+            self.parties[row, self.party_columns(names)] = True
+        self.texts.extend(text for _, text, _ in events)
+
+    def recall(self, query, parties=(), k=4, before_turn=None):
+        """Up to k [(turn, text)] most similar to query, oldest first.
+
+        Only memories involving one of parties (when given) and from before
+        before_turn (when given) are considered.
+        """
+        count = len(self)
+        if not count or k <= 0:
+            return []
+        eligible = np.ones(count, dtype=bool)
+        if before_turn is not None:
+            eligible &= self.turns[:count] < before_turn
+        columns = self.party_columns(parties)
+        if columns:
+            eligible &= self.parties[:count, columns].any(axis=1)
+        candidates = np.flatnonzero(eligible)
+        if not len(candidates):
+            return []
+        query_vector = normalize(np.asarray(self.embedding.embed_query(query), dtype=np.float32))
+        scores = self.vectors[candidates] @ query_vector
+        k = min(k, len(candidates))
+        best = candidates[np.argpartition(-scores, k - 1)[:k]]
+        best = best[np.argsort(self.turns[best], kind="stable")]
+        return [(int(self.turns[i]), self.texts[i]) for i in best]
@@ -0,0 +1,203 @@
+# Memory profiling for long games: tracemalloc snapshots at turn boundaries.
+#
+# Every turn the report gets the growth since the previous turn, grouped two
+# ways: by subsystem (from where in the code the memory was allocated) and by
+# owner (bytes reachable from each neighbor's own state, the renderer and the
+# game state). At the end, a leak summary lists what kept growing.
+import gc
+import os
+import sys
+import tracemalloc
+import types
+from collections import defaultdict
+
+# (subsystem, packages, project modules); the innermost matching frame of an allocation decides
+SUBSYSTEMS = [
+    ("checkpoints", ("langgraph/checkpoint",), ("checkpoint_store.py",)),
+    ("embedding models", ("torch", "sentence_transformers", "transformers", "onnxruntime", "tokenizers", "model2vec"),
+     ("embeddings.py",)),
+    ("rules index", ("chromadb",), ("rules_index.py",)),
+    ("LLM clients", ("openai", "ollama", "httpx", "httpcore", "langchain_openai", "langchain_ollama"),
+     ("cassette.py",)),
+    ("LLM messages", ("langchain_core", "langgraph", "pydantic", "pydantic_core"), ()),
+    ("neighbors", (), ("llm_neighbor.py", "agent_graph.py", "planner.py", "memory.py", "activation.py", "router.py", "usage.py",
+                       "forecast.py")),
+    ("renderer", (), ("renderer.py",)),
+    ("game state", (), ("game_state.py", "combat.py", "diplomacy.py", "economy.py", "human_player.py", "actions.py")),
+]
+
+# Per-turn state a neighbor owns; shared things (models, graph, game state) are counted elsewhere
+NEIGHBOR_STATE = ("message_history", "inbox", "memory", "prepared_combat", "counterparties")
+# Not followed when sizing an owner: code and classes, which nobody "owns"
+OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.CodeType)
+
+
+def classify(traceback):
+    """Subsystem of an allocation, from its innermost recognizable frame"""
+    for frame in reversed(traceback):
+        path = frame.filename.replace(os.sep, "/")
+        name = os.path.basename(path)
+        for subsystem, packages, modules in SUBSYSTEMS:
+            if name in modules or any(f"/{package}/" in path for package in packages):
+                return subsystem
+    return "other"
+
+
+def deep_size(roots, stop=()):
+    """Bytes of every object reachable from roots, not entering objects in stop"""
+    seen = {id(obj) for obj in stop}
+    pending = [obj for obj in roots if id(obj) not in seen]
+    total = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj, 0)
+        pending.extend(gc.get_referents(obj))
+    return total
+
+
+def checkpoint_bytes(checkpointer, thread_id):
+    """Memory a checkpointer holds for one thread (stored bytes for the SQLite saver)"""
+    if hasattr(checkpointer, "thread_bytes"):
+        return checkpointer.thread_bytes(thread_id)
+    if hasattr(checkpointer, "storage"):  # InMemorySaver
+        roots = [checkpointer.storage.get(thread_id, {})]
+        roots += [value for key, value in checkpointer.blobs.items() if key[0] == thread_id]
+        roots += [value for key, value in checkpointer.writes.items() if key[0] == thread_id]
+        return deep_size(roots)
+    return 0
+
+
+def kb(size):
+    return f"{size / 1024:,.1f} KB" if abs(size) < 1024 * 1024 else f"{size / 1024 / 1024:,.2f} MB"
+
+
+def signed(size):
+    return ("+" if size >= 0 else "-") + kb(abs(size))
+
+
+class MemoryProfiler:
+    """Writes a per-turn allocation report to path and a leak summary at the end.
+
+    Start it before the game is built so the models' allocations are
+    traced too; call snapshot() at every turn boundary and finish() once.
+    """
+
+    def __init__(self, path, frames=16, top=10):
+        self.path = path
+        self.top = top
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.report = open(path, "w", encoding="utf-8")
+        self.filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, __file__),
+        ]
+        self.game_state = None
+        self.renderer = None
+        self.checkpointer = None
+        self.previous = None
+        self.first_turn = None
+        self.totals = []  # (turn, traced bytes)
+        self.owners = {}  # owner -> [bytes per snapshot]
+        self.subsystem_growth = defaultdict(int)
+        self.site_growth = defaultdict(list)  # site -> growth in each interval it changed
+
+    def watch(self, game_state, renderer, checkpointer=None):
+        self.game_state = game_state
+        self.renderer = renderer
+        self.checkpointer = checkpointer
+
+    def owner_sizes(self):
+        """Bytes reachable from each neighbor's state, the renderer and the game state"""
+        game_state = self.game_state
+        entities = list(game_state.entities)
+        sizes = {}
+        for neighbor in game_state.neighbors:
+            state = [getattr(neighbor, name) for name in NEIGHBOR_STATE if hasattr(neighbor, name)]
+            own = deep_size(state, stop=entities + [game_state, getattr(neighbor, "embeddings", None)])
+            checkpoints = checkpoint_bytes(self.checkpointer, getattr(neighbor, "thread_id", None)) \
+                if self.checkpointer is not None else 0
+            sizes[neighbor.name] = own + checkpoints
+        sizes["renderer"] = deep_size([self.renderer], stop=entities + [game_state])
+        sizes["game state"] = deep_size([game_state], stop=entities + [self.renderer])
+        return sizes
+
+    def snapshot(self, turn):
+        """Record the turn boundary and append its report"""
+        gc.collect()
+        current = tracemalloc.take_snapshot().filter_traces(self.filters)
+        total = sum(stat.size for stat in current.statistics("filename"))
+        peak = tracemalloc.get_traced_memory()[1]
+        owners = self.owner_sizes() if self.game_state is not None else {}
+        for owner, size in owners.items():
+            self.owners.setdefault(owner, []).append(size)
+
+        lines = [f"=== Turn {turn} === traced {kb(total)}"
+                 + (f" ({signed(total - self.totals[-1][1])})" if self.totals else "") + f", peak {kb(peak)}"]
+        if self.previous is not None:
+            subsystems, sites = defaultdict(int), defaultdict(lambda: [0, 0])
+            for diff in current.compare_to(self.previous, "traceback"):
+                if not diff.size_diff:
+                    continue
+                subsystems[classify(diff.traceback)] += diff.size_diff
+                frame = diff.traceback[-1]
+                site = sites[f"{frame.filename}:{frame.lineno}"]
+                site[0] += diff.size_diff
+                site[1] += diff.count_diff
+            for subsystem, growth in subsystems.items():
+                self.subsystem_growth[subsystem] += growth
+            for site, (growth, _) in sites.items():
+                self.site_growth[site].append(growth)
+
+            lines.append("By subsystem: " + ", ".join(
+                f"{name} {signed(growth)}" for name, growth in sorted(subsystems.items(), key=lambda item: -item[1])))
+            lines.append("Top growth sites:")
+            for site, (growth, count) in sorted(sites.items(), key=lambda item: -item[1][0])[:self.top]:
+                lines.append(f"  {signed(growth):>12}  {count:+7d} blocks  {site}")
+        if owners:
+            lines.append("By owner: " + ", ".join(
+                f"{owner} {kb(size)}" + (f" ({signed(size - self.owners[owner][-2])})" if len(self.owners[owner]) > 1 else "")
+                for owner, size in owners.items()))
+        self.report.write("\n".join(lines) + "\n\n")
+        self.report.flush()
+
+        if self.first_turn is None:
+            self.first_turn = turn
+        self.totals.append((turn, total))
+        self.previous = current
+
+    def summary(self):
+        """What grew over the whole game, and what grew steadily (the likely leaks)"""
+        if len(self.totals) < 2:
+            return "Memory profile: fewer than two turns recorded."
+        (first_turn, first), (last_turn, last) = self.totals[0], self.totals[-1]
+        turns = max(last_turn - first_turn, 1)
+        intervals = len(self.totals) - 1
+        lines = [f"=== Leak summary, turns {first_turn}-{last_turn} ===",
+                 f"Traced memory {kb(first)} -> {kb(last)} ({signed(last - first)}, {signed((last - first) / turns)} per turn)",
+                 "Growth by subsystem:"]
+        for name, growth in sorted(self.subsystem_growth.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<18} {signed(growth):>12}")
+        if self.owners:
+            lines.append("Growth by owner:")
+            for owner, sizes in sorted(self.owners.items(), key=lambda item: item[1][0] - item[1][-1]):
+                lines.append(f"  {owner:<18} {kb(sizes[0]):>12} -> {kb(sizes[-1]):>12} ({signed(sizes[-1] - sizes[0])})")
+        # A site that grew in most turns and never gave memory back is the usual shape of a leak
+        steady = [(site, sum(growths)) for site, growths in self.site_growth.items()
+                  if len(growths) >= 0.75 * intervals and min(growths) > 0]
+        lines.append("Sites that grew in at least 3/4 of turns:" if steady else "No site grew steadily.")
+        for site, growth in sorted(steady, key=lambda item: -item[1])[:self.top]:
+            lines.append(f"  {signed(growth):>12}  {site}")
+        return "\n".join(lines)
+
+    def finish(self):
+        summary = self.summary()
+        self.report.write(summary + "\n")
+        self.report.close()
+        tracemalloc.stop()
+        return summary
@@ -0,0 +1,352 @@
+# Local stand-in for OpenAI chat completions and Ollama /api/chat, for load testing.
+#
+# Speaks enough of both APIs, tool calls included, for ChatOpenAI(base_url=...)
+# and ChatOllama(base_url=...) to run against it unchanged. Latency, token
+# throughput, error rate and concurrency are configurable, and usage reports
+# simulate provider prompt caching so prefix reuse can be checked offline.
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+MOCK_REPLY = "I have considered the situation and will hold my position this turn."
+CHARS_PER_TOKEN = 4
+
+
+class LatencyModel:
+    """Random response delays from a named distribution.
+
+    Specs: "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,SD" or "lognormal:MU,SIGMA"
+    (seconds; lognormal parameters are those of the underlying normal).
+    """
+
+    def __init__(self, spec="fixed:0", seed=None):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",")] if params else []
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+
+    def sample(self):
+        with self.lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return float(self.rng.uniform(*self.params))
+            if self.kind == "normal":
+                return max(0.0, float(self.rng.normal(*self.params)))
+            return float(self.rng.lognormal(*self.params))
+
+
+def placeholder(schema):
+    """A value that satisfies a JSON schema well enough for a tool call"""
+    if 'enum' in schema:
+        return schema['enum'][0]
+    if 'default' in schema and schema['default'] is not None:
+        return schema['default']
+    for option in schema.get('anyOf', []):
+        if option.get('type') != 'null':
+            return placeholder(option)
+    kind = schema.get('type')
+    if kind == 'integer':
+        return 0
+    if kind == 'number':
+        return 0.0
+    if kind == 'boolean':
+        return False
+    if kind == 'array':
+        return []
+    if kind == 'object':
+        return {name: placeholder(prop) for name, prop in schema.get('properties', {}).items()
+                if name in schema.get('required', [])}
+    return "mock"
+
+
+class PrefixCache:
+    """Simulated prompt cache: how much of a prompt repeats the start of a recent one.
+
+    Prompts are serialized tools first, then messages, the order providers
+    hash them in. As in vLLM and SGLang, a prompt is cut into fixed-size
+    blocks and each block is keyed by the hash of everything up to its end,
+    so the cached prefix is found by walking the prompt's blocks until one
+    is missing. OpenAI only caches prompts of min_tokens or more, in
+    block_tokens steps; Ollama's KV cache reuses any shared prefix.
+    """
+
+    def __init__(self, capacity=65536, block_chars=16 * CHARS_PER_TOKEN):
+        self.capacity = capacity  # Blocks kept, least recently used dropped first
+        self.block_chars = block_chars
+        self.blocks = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def serialize(request):
+        parts = [json.dumps(request.get('tools') or [], sort_keys=True)]
+        for message in request.get('messages', []):
+            parts.append(f"<{message.get('role')}>{message.get('content') or ''}"
+                         f"{json.dumps(message.get('tool_calls') or [], sort_keys=True)}")
+        return "".join(parts)
+
+    def block_hashes(self, prompt):
+        """Hash of each full block, chained so a block's hash covers the whole prefix"""
+        hashes, previous = [], None
+        for start in range(0, len(prompt) - self.block_chars + 1, self.block_chars):
+            previous = hash((previous, prompt[start:start + self.block_chars]))
+            hashes.append(previous)
+        return hashes
+
+    def lookup(self, request, min_tokens=0, block_tokens=1):
+        """(prompt tokens, cached tokens) for a request, remembering it for later ones"""
+        prompt = self.serialize(request)
+        hashes = self.block_hashes(prompt)
+        with self.lock:
+            shared = 0
+            while shared < len(hashes) and hashes[shared] in self.blocks:
+                shared += 1
+            for key in hashes:
+                self.blocks[key] = None
+                self.blocks.move_to_end(key)
+            while len(self.blocks) > self.capacity:
+                self.blocks.popitem(last=False)
+        tokens = len(prompt) // CHARS_PER_TOKEN + 1
+        cached = shared * self.block_chars // CHARS_PER_TOKEN
+        cached = cached // block_tokens * block_tokens if cached >= min_tokens else 0
+        return tokens, min(cached, tokens - 1)
+
+
+class MockBackend:
+    """Decides what to answer and how long to take; shared by all request handlers"""
+
+    def __init__(self, latency="fixed:0", tokens_per_second=0.0, error_rate=0.0, max_concurrency=0, seed=None):
+        self.latency = LatencyModel(latency, seed)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.rng = np.random.default_rng(seed)
+        self.prefix_cache = PrefixCache()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def reply(self, messages, tools, tool_choice=None):
+        """(content, [(tool name, args)]) for a conversation.
+
+        Forced tool choices are always honoured. Otherwise the model calls one
+        random tool, and answers in plain text once it has seen a tool result.
+        """
+        functions = [tool.get('function', tool) for tool in tools or []]
+        forced = None
+        if isinstance(tool_choice, dict):
+            forced = tool_choice.get('function', {}).get('name')
+        elif isinstance(tool_choice, str) and tool_choice not in ("auto", "none", "required"):
+            forced = tool_choice
+        if forced or (tool_choice == "required" and functions):
+            function = next((f for f in functions if f['name'] == forced), functions[0])
+        elif functions and messages and messages[-1].get('role') != 'tool':
+            with self.lock:
+                function = functions[int(self.rng.integers(len(functions)))]
+        else:
+            return MOCK_REPLY, []
+        return "", [(function['name'], placeholder(function.get('parameters', {})))]
+
+    def serve(self, handle):
+        """Run handle() inside the concurrency limit, with simulated latency and errors.
+
+        Returns handle()'s result, or None when this request should fail.
+        """
+        if self.slots:
+            self.slots.acquire()
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            failed = self.rng.random() < self.error_rate
+        try:
+            time.sleep(self.latency.sample())
+            if failed:
+                with self.lock:
+                    self.errors += 1
+                return None
+            content, calls = handle()
+            if self.tokens_per_second:
+                tokens = len(content.split()) + sum(len(json.dumps(args)) // CHARS_PER_TOKEN + 1 for _, args in calls)
+                time.sleep(tokens / self.tokens_per_second)
+            return content, calls
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            if self.slots:
+                self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests, 'errors': self.errors, 'peak_in_flight': self.peak_in_flight}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/v1/models", "/models"):
+            self.send_json(200, {'object': 'list', 'data': [{'id': 'mock', 'object': 'model'}]})
+        elif self.path == "/api/tags":
+            self.send_json(200, {'models': [{'name': 'mock', 'model': 'mock'}]})
+        elif self.path == "/api/version":
+            self.send_json(200, {'version': '0.0.0-mock'})
+        elif self.path == "/stats":
+            self.send_json(200, self.server.backend.stats())
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path.rstrip("/") in ("/v1/chat/completions", "/chat/completions"):
+            self.openai_chat(self.read_body())
+        elif self.path == "/api/chat":
+            self.ollama_chat(self.read_body())
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def openai_chat(self, request):
+        backend = self.server.backend
+        result = backend.serve(lambda: backend.reply(request.get('messages', []), request.get('tools'), request.get('tool_choice')))
+        if result is None:
+            self.send_json(500, {'error': {'message': 'Simulated server error', 'type': 'server_error', 'code': None}})
+            return
+        content, calls = result
+        tool_calls = [
+            {'id': f"call_{uuid.uuid4().hex[:24]}", 'type': 'function',
+             'function': {'name': name, 'arguments': json.dumps(args)}}
+            for name, args in calls
+        ]
+        message = {'role': 'assistant', 'content': content or None}
+        if tool_calls:
+            message['tool_calls'] = tool_calls
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = request.get('model', 'mock')
+        prompt_tokens, cached_tokens = backend.prefix_cache.lookup(request, min_tokens=1024, block_tokens=128)
+        completion_tokens = len((content or "").split()) + sum(len(call['function']['arguments']) // CHARS_PER_TOKEN for call in tool_calls)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': cached_tokens},
+        }
+
+        if not request.get('stream'):
+            self.send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason, 'logprobs': None}],
+                'usage': usage,
+            })
+            return
+
+        delta = dict(message)
+        if tool_calls:
+            delta['tool_calls'] = [dict(call, index=i) for i, call in enumerate(tool_calls)]
+        chunks = [
+            {'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]},
+            {'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}], 'usage': usage},
+        ]
+        events = b"".join(
+            b"data: " + json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                                    'model': model, **chunk}).encode() + b"\n\n"
+            for chunk in chunks
+        ) + b"data: [DONE]\n\n"
+        self.send_json(200, events, "text/event-stream")
+
+    def ollama_chat(self, request):
+        backend = self.server.backend
+        start = time.perf_counter_ns()
+        result = backend.serve(lambda: backend.reply(request.get('messages', []), request.get('tools')))
+        if result is None:
+            self.send_json(500, {'error': 'Simulated server error'})
+            return
+        content, calls = result
+        prompt_tokens, cached_tokens = backend.prefix_cache.lookup(request)
+        message = {'role': 'assistant', 'content': content}
+        if calls:
+            message['tool_calls'] = [{'function': {'name': name, 'arguments': args}} for name, args in calls]
+        final = {
+            'model': request.get('model', 'mock'),
+            'created_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'message': message,
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': time.perf_counter_ns() - start,
+            'prompt_eval_count': prompt_tokens - cached_tokens,  # like Ollama, only tokens not reused from the KV cache
+            'eval_count': len(content.split()),
+        }
+        if request.get('stream', True):
+            self.send_json(200, json.dumps(final).encode() + b"\n", "application/x-ndjson")
+        else:
+            self.send_json(200, final)
+
+
+def start_server(host="127.0.0.1", port=0, **backend_options):
+    """Start the mock server on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.backend = MockBackend(**backend_options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_backend_arguments(parser):
+    parser.add_argument("--latency", default="lognormal:-1.2,0.5",
+                       help="Response delay distribution: fixed:S, uniform:LOW,HIGH, normal:MEAN,SD or lognormal:MU,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                       help="Extra delay per generated token (0 disables)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                       help="Fraction of requests answered with a server error")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                       help="Requests served at once; the rest queue (0 = unlimited)")
+
+
+def backend_options(args):
+    return {
+        'latency': args.latency,
+        'tokens_per_second': args.tokens_per_second,
+        'error_rate': args.error_rate,
+        'max_concurrency': args.max_concurrency,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Ollama chat server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_server(args.host, args.port, **backend_options(args))
+    print(f"Mock LLM server on {url} (OpenAI: {url}/v1, Ollama: {url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
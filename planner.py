@@ -0,0 +1,114 @@
+# Single-shot turn planning: one enriched briefing in, one validated action plan out
+import json
+import numpy as np
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, ValidationError
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from combat import win_probability
+from config import *
+
+PLAN_INSTRUCTIONS = """You are planning your whole turn at once. Everything you need is in the rules above and the briefing: your status, every rival's resources, your relations and your odds in battle.
+Call the TurnPlan function exactly once with every action you want to take this turn, in the order they should happen. Actions run through the same rules as always; impossible actions are skipped."""
+
+
+class PlannedAction(BaseModel):
+    """One action in a turn plan"""
+    action: Literal[
+        "send_message", "broadcast_message", "recruit_soldiers", "dismiss_soldiers", "attack_target",
+        "send_tribute", "propose_treaty", "cancel_treaty", "pledge_tribute"
+    ]
+    target: Optional[str] = Field(None, description="Entity the action is aimed at: message recipient, attack target, tribute recipient or treaty partner")
+    recipients: Optional[List[str]] = Field(None, description="broadcast_message only: recipients, or empty for everyone")
+    amount: Optional[int] = Field(None, description="Soldiers to recruit, dismiss or attack with")
+    land: Optional[int] = Field(None, description="Land for send_tribute, or per turn for pledge_tribute")
+    peasants: Optional[int] = Field(None, description="Peasants for send_tribute, or per turn for pledge_tribute")
+    treaty: Optional[Literal["alliance", "non_aggression"]] = Field(None, description="Treaty for propose_treaty and cancel_treaty")
+    content: Optional[str] = Field(None, description="Message text for send_message and broadcast_message")
+
+
+class TurnPlan(BaseModel):
+    """Every action you will take this turn, in order"""
+    summary: str = Field(description="One or two in-character sentences summarizing your decision")
+    actions: List[PlannedAction]
+
+
+def plan_action_call(planned):
+    """Tool method name and keyword arguments for a planned action, or None if incomplete"""
+    action = planned.action
+    if action == "send_message":
+        if planned.target and planned.content:
+            return action, {'recipient_name': planned.target, 'content': planned.content}
+    elif action == "broadcast_message":
+        if planned.content:
+            return action, {'content': planned.content, 'recipient_names': planned.recipients}
+    elif action in ("recruit_soldiers", "dismiss_soldiers"):
+        if planned.amount is not None:
+            return action, {'amount': planned.amount}
+    elif action == "attack_target":
+        if planned.target:
+            return action, {'target_name': planned.target, 'attack_force': planned.amount}
+    elif action == "send_tribute":
+        if planned.target:
+            return action, {'recipient_name': planned.target, 'land_amount': planned.land or 0, 'peasant_amount': planned.peasants or 0}
+    elif action in ("propose_treaty", "cancel_treaty"):
+        if planned.target and planned.treaty:
+            return action, {'target_name': planned.target, 'treaty': planned.treaty}
+    elif action == "pledge_tribute":
+        if planned.target:
+            return action, {'recipient_name': planned.target, 'land_per_turn': planned.land or 0, 'peasants_per_turn': planned.peasants or 0}
+    return None
+
+
+def combat_odds(neighbor, target):
+    """Win chances against a target when attacking with half and with 80% of the army"""
+    game_state = neighbor.game_state
+    soldiers = np.array([entity.soldiers for entity in game_state.entities], dtype=np.float64)
+    attacker = game_state.entities.index(neighbor)
+    defender = game_state.entities.index(target)
+    support = game_state.diplomacy.ally_support(soldiers, np.array([attacker]), np.array([defender]))[0]
+    forces = np.array([neighbor.soldiers // 2, int(neighbor.soldiers * 0.8)])
+    odds = win_probability(forces, target.soldiers, support, game_state.config)
+    return f"attack with {forces[0]}: {odds[0]:.0%} to win, with {forces[1]}: {odds[1]:.0%} to win" + (
+        f" (allies lend them {support:.0f} soldiers)" if support else "")
+
+
+def build_briefing(neighbor, turn_summary):
+    """Everything that changed for this turn, inlined into one prompt (identity and rules are in the system prompt)"""
+    game_state = neighbor.game_state
+    parts = [
+        f"Turn {game_state.turn}. Your status:\n{neighbor.get_status()}",
+        f"Events since your last turn:\n{turn_summary}",
+        "Rivals:",
+    ]
+    for entity in game_state.nearby(neighbor):
+        parts.append(neighbor.get_player_info(entity.name))
+        if neighbor.soldiers >= game_state.config.MIN_ATTACK_FORCE:
+            parts.append(f"        Combat odds: {combat_odds(neighbor, entity)}")
+    if neighbor.messages_sent_this_turn:
+        parts.append(f"Already messaged this turn: {', '.join(sorted(neighbor.messages_sent_this_turn))}")
+    return "\n\n".join(parts)
+
+
+def parse_plan(response):
+    """Validated TurnPlan from a model response (tool call, or JSON text as a fallback)"""
+    if getattr(response, 'tool_calls', None):
+        return TurnPlan.model_validate(response.tool_calls[0]['args'])
+    content = response.content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+    return TurnPlan.model_validate(json.loads(content))
+
+
+def request_plan(planner_llm, system_prompt, briefing):
+    """Ask for a plan in one call; on a malformed answer, retry once with the error"""
+    messages = [SystemMessage(content=system_prompt + "\n\n" + PLAN_INSTRUCTIONS), HumanMessage(content=briefing)]
+    response = planner_llm.invoke(messages)
+    try:
+        return parse_plan(response), 1
+    except (ValidationError, ValueError, KeyError) as e:
+        correction = f"That plan was invalid: {e}. Call TurnPlan again with a valid plan."
+        if getattr(response, 'tool_calls', None):
+            messages += [response] + [ToolMessage(content=correction, tool_call_id=call['id']) for call in response.tool_calls]
+        else:
+            messages += [response, HumanMessage(content=correction)]
+        return parse_plan(planner_llm.invoke(messages)), 2
@@ -53,7 +53,8 @@ class Renderer:
             print("-" * 60)
         
         # Display player's resources
-        worked_land = player.peasants // PEASANTS_PER_ACRE if PEASANTS_PER_ACRE > 0 else 0
+        peasants_per_acre = game_state.config.PEASANTS_PER_ACRE
+        worked_land = player.peasants // peasants_per_acre if peasants_per_acre > 0 else 0
         # Ensure worked land cannot exceed total land
         worked_land = min(worked_land, player.land)
         print(f"\n{player.name} - Your Kingdom:")
@@ -65,7 +66,8 @@ class Renderer:
         print(f"\nNeighbors:")
         for neighbor in game_state.neighbors:
             relative_power = game_state.get_relative_power(player, neighbor)
-            print(f"  {neighbor.name}: {relative_power} power")
+            relation = game_state.diplomacy.describe(player.name, neighbor.name)
+            print(f"  {neighbor.name}: {relative_power} power ({relation})")
         
         # Display recent messages
         if player.message_history:
@@ -106,7 +108,9 @@ class Renderer:
         print("3. Dismiss Soldiers")
         print("4. Attack Neighbor")
         print("5. Send Tribute")
-        print("6. End Turn")
+        print("6. Diplomacy (treaties & recurring tribute)")
+        print("7. End Turn")
+        print("Or type commands, e.g. recruit 200; attack 2 300; msg 1 \"peace?\"; end  ('help' lists them)")
     
     def display_final_results(self, game_state):
         """Display final game results"""
@@ -0,0 +1,97 @@
+# Per-turn routing between a cheap, fast model and a strong one
+import threading
+import time
+from contextlib import contextmanager
+from langchain_core.callbacks import get_usage_metadata_callback
+
+# Model names per provider and tier
+MODELS = {
+    'openai': {'strong': "gpt-4o-mini", 'cheap': "gpt-4.1-nano"},
+    'ollama': {'strong': "gpt-oss:20b", 'cheap': "llama3.2:3b"},
+}
+
+# USD per million (input, output) tokens; local Ollama models cost nothing
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+TIERS = ("cheap", "strong")
+
+
+def price_of(model):
+    """(input, output) price for a model, also matching dated names like gpt-4o-mini-2024-07-18"""
+    matches = [name for name in MODEL_PRICES if model and model.startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+
+
+class ModelRouter:
+    """Sends routine turns to the cheap model and high-stakes turns to the strong one.
+
+    A turn escalates when the neighbor was attacked at least attack_threshold
+    times, received tribute worth at least tribute_threshold, faces an
+    Overwhelming power gap (escalate_on_gap), or got a message from the human
+    player (escalate_on_player). Latency and token usage are kept per tier so
+    savings against an all-strong game can be reported.
+    """
+
+    def __init__(self, attack_threshold=1, tribute_threshold=1, escalate_on_gap=True, escalate_on_player=True):
+        self.attack_threshold = attack_threshold
+        self.tribute_threshold = tribute_threshold
+        self.escalate_on_gap = escalate_on_gap
+        self.escalate_on_player = escalate_on_player
+        self.lock = threading.Lock()
+        self.turns = {tier: 0 for tier in TIERS}
+        self.seconds = {tier: 0.0 for tier in TIERS}
+        self.tokens = {tier: [0, 0] for tier in TIERS}  # input, output
+        self.models = {}  # tier -> model name, for pricing
+
+    def route(self, signals):
+        """(tier, reason) for a turn with these signals"""
+        if signals.attacks_received >= self.attack_threshold:
+            return "strong", "attacked"
+        if signals.tribute_received >= self.tribute_threshold:
+            return "strong", "tribute received"
+        if self.escalate_on_gap and signals.overwhelming_gap:
+            return "strong", "overwhelming power gap"
+        if self.escalate_on_player and signals.player_messages:
+            return "strong", "message from the player"
+        return "cheap", "routine"
+
+    @contextmanager
+    def measure(self, tier):
+        """Time a turn and collect its token usage under the given tier"""
+        start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            yield
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.turns[tier] += 1
+            self.seconds[tier] += elapsed
+            for model, counts in usage.usage_metadata.items():
+                self.models.setdefault(tier, model)
+                self.tokens[tier][0] += counts.get('input_tokens', 0)
+                self.tokens[tier][1] += counts.get('output_tokens', 0)
+
+    def cost(self, tier, priced_as=None):
+        """Estimated USD spent on a tier's turns, optionally priced as another tier's model"""
+        model = self.models.get(priced_as or tier)
+        input_price, output_price = price_of(model)
+        input_tokens, output_tokens = self.tokens[tier]
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def summary(self):
+        lines = []
+        for tier in TIERS:
+            turns = self.turns[tier]
+            average = self.seconds[tier] / turns if turns else 0.0
+            lines.append(f"{tier:>6}: {turns} turns, {average:.2f}s average, ${self.cost(tier):.4f}")
+        total_turns = sum(self.turns.values())
+        if total_turns and self.turns['strong']:
+            actual = self.cost('cheap') + self.cost('strong')
+            all_strong = self.cost('cheap', priced_as='strong') + self.cost('strong')
+            strong_average = self.seconds['strong'] / self.turns['strong']
+            actual_average = sum(self.seconds.values()) / total_turns
+            lines.append(f"Saved ${all_strong - actual:.4f} of ${all_strong:.4f} and "
+                         f"{strong_average - actual_average:.2f}s per turn against the strong model alone")
+        return "Model router:\n" + "\n".join(lines)
@@ -0,0 +1,164 @@
+# Exact top-k retrieval over the game rules, kept in memory as one NumPy matrix
+import hashlib
+import os
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+RULES_BACKENDS = ("numpy", "chroma")
+
+
+class RulesIndex:
+    """Vector store for small corpora: chunk embeddings in a contiguous,
+    L2-normalized float32 matrix, searched exactly with one matrix-vector
+    product. Implements the part of the LangChain vector store interface
+    the neighbors use (from_texts, similarity_search).
+    """
+
+    def __init__(self, texts, vectors, embedding):
+        self.texts = list(texts)
+        self.embedding = embedding
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.matrix = normalize(vectors.reshape(len(self.texts), -1) if self.texts else vectors.reshape(0, 0))
+
+    @classmethod
+    def from_texts(cls, texts, embedding, **kwargs):
+        texts = list(texts)
+        return cls(texts, embedding.embed_documents(texts) if texts else [], embedding)
+
+    def similarity_search_with_score(self, query, k=4):
+        """[(Document, cosine similarity)], best first"""
+        if not self.texts:
+            return []
+        query_vector = normalize(np.asarray(self.embedding.embed_query(query), dtype=np.float32))
+        scores = self.matrix @ query_vector
+        k = min(k, len(self.texts))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(Document(page_content=self.texts[i]), float(scores[i])) for i in top]
+
+    def similarity_search(self, query, k=4):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+
+def normalize(vectors):
+    """Rows scaled to unit length (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.ascontiguousarray(np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0))
+
+
+def build_rules_index(chunks, embedding, backend="numpy", collection_name="game_rules"):
+    """A vector store over the rule chunks; chroma is for corpora too large to scan"""
+    if backend == "numpy":
+        return RulesIndex.from_texts(chunks, embedding)
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        return Chroma.from_texts(chunks, embedding, collection_name=collection_name)
+    raise ValueError(f"Unknown rules index backend {backend!r}; expected one of {RULES_BACKENDS}")
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Document embeddings memoized by content hash, so re-indexing only embeds new chunks"""
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self.vectors = {}
+        self.embedded = 0  # Documents actually sent to the model
+
+    def embed_documents(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if content_hash(text) not in self.vectors]
+        if missing:
+            for text, vector in zip(missing, self.embedding.embed_documents(missing)):
+                self.vectors[content_hash(text)] = vector
+            self.embedded += len(missing)
+        return [self.vectors[content_hash(text)] for text in texts]
+
+    def embed_query(self, text):
+        return self.embedding.embed_query(text)
+
+    def retain(self, texts):
+        """Forget vectors of chunks that are no longer in the corpus"""
+        keep = {content_hash(text) for text in texts}
+        self.vectors = {key: vector for key, vector in self.vectors.items() if key in keep}
+
+
+class RulesSource:
+    """The rules file as a vector store that follows edits to the file.
+
+    refresh() costs one stat() and reloads only when the file changed,
+    keeping the last good index if the new version cannot be loaded;
+    reload() re-chunks the text, embeds just the chunks whose content is
+    new, builds the new index to the side and swaps it in with a single
+    assignment. Call them between turns so a round is played on one
+    version of the rules. version counts the swaps, text is the rules
+    the current index was built from.
+    """
+
+    def __init__(self, path="game_rules.txt", embedding=None, backend="numpy",
+                 chunk_size=500, chunk_overlap=50, collection_name="game_rules"):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        self.path = path
+        self.backend = backend
+        self.collection_name = collection_name
+        self.model = embedding  # The embedding model itself, for other indexes that share it
+        self.embedding = CachedEmbeddings(embedding)
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.lock = threading.Lock()
+        self.index = None
+        self.text = None
+        self.stamp = None
+        self.version = 0
+        self.last_embedded = 0  # Chunks embedded by the last reload
+        self.reload()
+
+    def file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """Reload if the file changed since it was last read; True if a new index is in place"""
+        try:
+            stamp = self.file_stamp()
+        except OSError:
+            return False  # Keep serving the last good rules while the file is being replaced
+        if stamp == self.stamp:
+            return False
+        try:
+            return self.reload()
+        except Exception as e:
+            # A half-saved or broken edit must not end the game: try again once the file changes
+            self.stamp = stamp
+            print(f"Error reloading {self.path}, keeping the previous rules: {e}")
+            return False
+
+    def reload(self):
+        """Re-read the file and swap in a new index if the text changed; True if it did"""
+        with self.lock:
+            stamp = self.file_stamp()
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            self.stamp = stamp
+            if text == self.text:
+                return False
+
+            chunks = self.splitter.split_text(text)
+            embedded = self.embedding.embedded
+            index = build_rules_index(chunks, self.embedding, self.backend,
+                                      collection_name=f"{self.collection_name}_v{self.version + 1}")
+            self.embedding.retain(chunks)
+            self.last_embedded = self.embedding.embedded - embedded
+
+            old, self.index = self.index, index
+            self.text = text
+            self.version += 1
+            if old is not None and hasattr(old, "delete_collection"):
+                old.delete_collection()  # Chroma keeps every collection until told otherwise
+            return True
+
+    def similarity_search(self, query, k=4):
+        return self.index.similarity_search(query, k=k)
@@ -0,0 +1,99 @@
+# Rule-based rulers for headless games (tournaments, sweeps, load tests)
+from human_player import HumanPlayer
+from combat import win_probability
+from config import *
+
+
+class ScriptedRuler(HumanPlayer):
+    """A ruler driven by a fixed policy function instead of a person or an LLM"""
+
+    def __init__(self, name, game_state, policy="balanced"):
+        super().__init__(name, game_state)
+        self.policy = policy
+
+    def take_turn(self):
+        """Act according to the policy"""
+        self.game_state.deliver_messages(self)
+        POLICIES[self.policy](self)
+
+    def affordable_recruits(self, share=1.0):
+        """Soldiers that can be recruited now while keeping net food non-negative"""
+        food_limit = self.net_food // self.game_state.config.FOOD_PER_SOLDIER
+        return max(0, int(min(self.peasants, food_limit) * share))
+
+    def rivals(self):
+        """Realms in reach (everyone else unless the game is on a large map)"""
+        return self.game_state.nearby(self)
+
+    def best_target(self, force, min_odds):
+        """Rival with the best odds of a successful attack, if any clears min_odds"""
+        config = self.game_state.config
+        best, best_odds = None, min_odds
+        for rival in self.rivals():
+            if self.game_state.diplomacy.blocks_attack(self.name, rival.name):
+                continue
+            odds = float(win_probability(force, rival.soldiers, config=config))
+            if odds > best_odds:
+                best, best_odds = rival, odds
+        return best
+
+    def accept_offers(self, treaty):
+        """Sign every treaty of this kind that rivals have offered"""
+        diplomacy = self.game_state.diplomacy
+        me = diplomacy.index[self.name]
+        for rival in self.rivals():
+            if diplomacy.proposals[treaty][diplomacy.index[rival.name], me]:
+                self.propose_treaty(rival.name, treaty)
+
+
+def turtle_policy(ruler):
+    """Keep a defensive army of about a fifth of the population, never attack"""
+    ruler.accept_offers("non_aggression")
+    ruler.accept_offers("alliance")
+    target = (ruler.peasants + ruler.soldiers) // 5
+    if ruler.soldiers < target:
+        ruler.recruit_soldiers(min(target - ruler.soldiers, ruler.affordable_recruits()))
+
+
+def aggressor_policy(ruler):
+    """Recruit everything food allows and attack whenever the odds are good"""
+    ruler.recruit_soldiers(ruler.affordable_recruits())
+    force = int(ruler.soldiers * 0.8)
+    if force >= ruler.game_state.config.MIN_ATTACK_FORCE:
+        target = ruler.best_target(force, 0.5)
+        if target:
+            ruler.attack_target(target.name, force)
+
+
+def balanced_policy(ruler):
+    """Grow steadily, make peace with the strong and attack only with clear odds"""
+    ruler.accept_offers("non_aggression")
+    ruler.recruit_soldiers(ruler.affordable_recruits(0.5))
+    for rival in ruler.rivals():
+        if ruler.game_state.get_relative_power(rival, ruler) in ("Greater", "Overwhelming"):
+            ruler.propose_treaty(rival.name, "non_aggression")
+    force = int(ruler.soldiers * 0.6)
+    if force >= ruler.game_state.config.MIN_ATTACK_FORCE:
+        target = ruler.best_target(force, 0.6)
+        if target:
+            ruler.attack_target(target.name, force)
+
+
+def random_policy(ruler):
+    """Random legal actions, drawn from the game's seeded generator"""
+    rng = ruler.game_state.rng
+    ruler.recruit_soldiers(int(rng.integers(0, ruler.affordable_recruits() + 1)))
+    rivals = ruler.rivals()
+    if rivals and rng.random() < 0.3:
+        target = rivals[int(rng.integers(len(rivals)))]
+        force = int(ruler.soldiers * rng.uniform(0.3, 0.8))
+        if force >= ruler.game_state.config.MIN_ATTACK_FORCE:
+            ruler.attack_target(target.name, force)
+
+
+POLICIES = {
+    "turtle": turtle_policy,
+    "aggressor": aggressor_policy,
+    "balanced": balanced_policy,
+    "random": random_policy,
+}
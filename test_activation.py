@@ -0,0 +1,36 @@
+from activation import ActivationPolicy, gather_signals, remember_resources
+from game_state import GameState
+from scripted_ruler import ScriptedRuler
+
+
+def play_turn(neighbor, policy):
+    """The activation part of LLMNeighbor.take_turn, with no LLM behind it"""
+    reason = policy.decide(gather_signals(neighbor))
+    if reason is None:
+        neighbor.quiet_turns += 1
+        policy.routine(neighbor)
+    else:
+        neighbor.quiet_turns = 0
+    remember_resources(neighbor)
+    return reason
+
+
+def test_quiet_turns_without_events_stay_quiet():
+    game_state = GameState(seed=0)
+    player = ScriptedRuler("Player", game_state, "turtle")
+    neighbor = ScriptedRuler("Neighbor", game_state, "turtle")
+    neighbor.inbox, neighbor.quiet_turns = [], 0
+    game_state.initialize_game(player, [neighbor])
+    policy = ActivationPolicy("events", max_quiet_turns=5, quiet_action="recruit")
+
+    reasons = []
+    for _ in range(7):
+        reasons.append(play_turn(neighbor, policy))
+        game_state.resolve_combat()
+        game_state.process_diplomacy()
+        game_state.update_economy()
+        game_state.advance_turn()
+
+    # Its own routine recruiting is not an outside event
+    assert reasons == ["first turn", None, None, None, None, None, "quiet too long"]
+    assert policy.skipped == 5
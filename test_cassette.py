@@ -0,0 +1,43 @@
+import pytest
+from langchain_core.callbacks import get_usage_metadata_callback
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from cassette import Cassette, CassetteMiss
+from usage import UsageLog
+
+USAGE = {'input_tokens': 120, 'output_tokens': 30, 'total_tokens': 150, 'input_token_details': {'cache_read': 64}}
+
+
+def fake_model():
+    return GenericFakeChatModel(messages=iter([
+        AIMessage(content=f"Reply {i}", usage_metadata=USAGE, response_metadata={'model_name': "fake-model"})
+        for i in range(2)
+    ]))
+
+
+def test_replay_reports_recorded_usage(tmp_path):
+    path = str(tmp_path / "game.cassette")
+    recorded = Cassette(path, mode="record").wrap(fake_model(), "fake-model")
+    for prompt in ("Hello", "Attack?"):
+        recorded.invoke(prompt)
+
+    usage_log = UsageLog()
+    replayed = Cassette(path, mode="replay").wrap(None, "fake-model")
+    with usage_log.record(neighbor="Neighbor"), get_usage_metadata_callback() as usage:
+        assert replayed.invoke("Attack?").content == "Reply 1"
+        assert replayed.invoke("Hello").content == "Reply 0"
+    assert usage_log.totals() == {'calls': 2, 'input_tokens': 240, 'cached_tokens': 128, 'output_tokens': 60}
+    assert usage_log.rows[0]['model'] == "fake-model" and usage_log.rows[0]['neighbor'] == "Neighbor"
+    assert usage.usage_metadata["fake-model"]['total_tokens'] == 300
+    with pytest.raises(CassetteMiss):
+        replayed.invoke("Surrender?")
+
+
+def test_recording_keeps_an_existing_cassette(tmp_path):
+    path = tmp_path / "game.cassette"
+    path.write_text("{}\n")
+    with pytest.raises(FileExistsError):
+        Cassette(str(path), mode="record")
+    assert path.read_text() == "{}\n"
+    Cassette(str(path), mode="record", overwrite=True)
+    assert not path.exists()
@@ -0,0 +1,45 @@
+import operator
+from typing import Annotated, TypedDict
+from langgraph.graph import END, START, StateGraph
+from checkpoint_store import PrunedSqliteSaver
+
+
+class State(TypedDict):
+    turns: Annotated[list, operator.add]
+
+
+def counter_graph(checkpointer):
+    graph = StateGraph(State)
+    graph.add_node("turn", lambda state: {"turns": [len(state["turns"])]})
+    graph.add_edge(START, "turn")
+    graph.add_edge("turn", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_threads_are_pruned_to_keep_last():
+    saver = PrunedSqliteSaver(":memory:", keep_last=3, compact_every=2)
+    graph = counter_graph(saver)
+    config = {"configurable": {"thread_id": "Neighbor"}}
+    for _ in range(10):
+        graph.invoke({"turns": []}, config)
+    assert len(list(saver.list(config))) == 3
+    assert graph.get_state(config).values["turns"] == list(range(10))
+    other = {"configurable": {"thread_id": "Other"}}
+    graph.invoke({"turns": []}, other)
+    assert len(list(saver.list(other))) == 3  # A first run writes three checkpoints
+    assert graph.get_state(config).values["turns"] == list(range(10))  # Pruning stays within a thread
+
+
+def test_resume_after_reopen(tmp_path):
+    path = str(tmp_path / "agents.sqlite")
+    config = {"configurable": {"thread_id": "Neighbor"}}
+    graph = counter_graph(PrunedSqliteSaver(path, keep_last=2))
+    for _ in range(4):
+        graph.invoke({"turns": []}, config)
+    graph.checkpointer.conn.close()
+
+    saver = PrunedSqliteSaver(path, keep_last=2)
+    graph = counter_graph(saver)
+    graph.invoke({"turns": []}, config)
+    assert graph.get_state(config).values["turns"] == list(range(5))
+    assert len(list(saver.list(config))) == 2
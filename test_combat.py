@@ -0,0 +1,53 @@
+import numpy as np
+from combat import resolve_battles
+from game_state import GameState
+from scripted_ruler import ScriptedRuler
+
+
+def battle(land, peasants, soldiers, attackers, defenders, forces, seed=0):
+    columns = (np.array(column, dtype=np.int64) for column in (land, peasants, soldiers, attackers, defenders, forces))
+    return resolve_battles(*columns, np.random.default_rng(seed))
+
+
+def test_spoils_prorated_across_attacks_on_one_defender():
+    # Five sure wins on an undefended realm each claim a quarter of its 100 acres
+    land, peasants, _, outcome = battle([100] + [500] * 5, [40] + [1000] * 5, [0] + [300] * 5,
+                                        [1, 2, 3, 4, 5], [0] * 5, [300] * 5)
+    assert outcome['attacker_won'].all()
+    assert outcome['land_gained'].tolist() == [20] * 5
+    assert land[0] == 0 and peasants[0] >= 0
+    assert outcome['peasants_gained'].sum() <= 40
+
+
+def test_land_peasants_conserved_and_soldiers_never_negative():
+    rng = np.random.default_rng(1)
+    for seed in range(20):
+        size = 6
+        land, peasants, soldiers = (rng.integers(0, 1000, size) for _ in range(3))
+        attackers = rng.integers(0, size, 15)
+        defenders = (attackers + rng.integers(1, size, 15)) % size
+        forces = rng.integers(1, 1000, 15)
+        forces = np.minimum(forces, soldiers[attackers])
+        new_land, new_peasants, new_soldiers, outcome = battle(land, peasants, soldiers, attackers, defenders, forces, seed)
+        assert new_land.sum() == land.sum() and (new_land >= 0).all()
+        assert new_peasants.sum() == peasants.sum() and (new_peasants >= 0).all()
+        assert (new_soldiers >= 0).all() and (new_soldiers <= soldiers).all()
+        # One attacker fighting several battles loses at most what it had
+        losses = np.bincount(attackers, weights=outcome['attacker_losses'], minlength=size)
+        assert (losses <= soldiers).all()
+
+
+def test_empty_queue_changes_nothing():
+    land, peasants, soldiers, outcome = battle([500, 500], [1000, 1000], [300, 300], [], [], [])
+    assert land.tolist() == [500, 500] and peasants.tolist() == [1000, 1000] and soldiers.tolist() == [300, 300]
+    assert len(outcome['attacker_won']) == 0
+
+    game_state = GameState(seed=0)
+    rulers = [ScriptedRuler(name, game_state) for name in ("A", "B")]
+    game_state.initialize_game(rulers[0], rulers[1:])
+    rulers[0].attack_target("B", 100)
+    game_state.resolve_combat()
+    assert game_state.last_combat is not None
+    game_state.resolve_combat()  # Nobody attacked this turn
+    assert game_state.last_combat is None
+    assert len(game_state.pending_combat) == 1
@@ -0,0 +1,39 @@
+import pytest
+from actions import ActionHandler
+from commands import CommandError, parse_commands
+from game_state import GameState
+from human_player import HumanPlayer
+
+
+def test_unquoted_message_with_apostrophes():
+    assert parse_commands("msg 1 I'm coming") == [("msg", ["1", "I'm coming"])]
+    assert parse_commands("say all don't attack; end") == [("msg", ["all", "don't attack"]), ("end", [])]
+
+
+def test_quoted_message_keeps_semicolons():
+    assert parse_commands("recruit 200; msg \"Northern Realm\" 'peace; now?'; end") == [
+        ("recruit", [200]), ("msg", ["Northern Realm", "peace; now?"]), ("end", [])]
+
+
+def test_unclosed_quote_is_rejected():
+    with pytest.raises(CommandError):
+        parse_commands("msg 1 \"peace?")
+
+
+def test_negative_counts_are_rejected():
+    for line in ("dismiss -1000", "recruit -5", "attack 1 -50", "tribute 1 0 -10"):
+        with pytest.raises(CommandError):
+            parse_commands(line)
+
+
+def test_recruit_and_dismiss_need_a_positive_amount():
+    game_state = GameState(seed=0)
+    player = HumanPlayer("Player", game_state)
+    game_state.initialize_game(player, [HumanPlayer("Neighbor", game_state)])
+    handler = ActionHandler(game_state, verbose_logging=False)
+    before = (player.peasants, player.soldiers)
+    for amount in (-1000, 0):
+        assert "at least one" in handler.do_dismiss(player, amount)
+        assert "at least one" in handler.do_recruit(player, amount)
+    assert not player.dismiss_soldiers(-1000) and not player.recruit_soldiers(-1000)
+    assert (player.peasants, player.soldiers) == before
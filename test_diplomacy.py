@@ -0,0 +1,49 @@
+import numpy as np
+from diplomacy import DiplomacyTable
+from game_state import GameState
+from human_player import HumanPlayer
+
+
+def test_pledges_a_payer_cannot_cover_are_not_paid():
+    diplomacy = DiplomacyTable(["A", "B", "C"])
+    diplomacy.pledge_tribute("A", "B", 10, 0)
+    diplomacy.pledge_tribute("A", "C", 0, 50)  # Affordable alone, but A defaults on all its pledges
+    diplomacy.pledge_tribute("C", "B", 3, 20)
+    land, peasants, notices = diplomacy.settle(np.array([5, 100, 100]), np.array([1000, 1000, 1000]))
+    assert land.tolist() == [5, 103, 97]
+    assert peasants.tolist() == [1000, 1020, 980]
+    assert diplomacy.trust[1, 0] == diplomacy.trust[2, 0] == 50 - diplomacy.config.TRUST_DEFAULT_PENALTY
+    assert diplomacy.trust[1, 2] > 50
+    assert (0, "You could not pay your pledged tribute to B.") in notices
+
+
+def test_cancelled_treaty_lowers_trust_in_the_canceller():
+    diplomacy = DiplomacyTable(["A", "B"])
+    assert diplomacy.propose("non_aggression", "A", "B") == 'proposed'
+    assert diplomacy.propose("non_aggression", "B", "A") == 'signed'
+    assert diplomacy.cancel("non_aggression", "A", "B")
+    assert not diplomacy.cancel("non_aggression", "A", "B")
+    diplomacy.settle(np.array([100, 100]), np.array([100, 100]))
+    assert diplomacy.trust[1, 0] == 50 - diplomacy.config.TRUST_CANCEL_PENALTY
+    assert diplomacy.trust[0, 1] == 50
+    assert not diplomacy.blocks_attack("A", "B")
+
+
+def test_ally_does_not_defend_against_itself():
+    diplomacy = DiplomacyTable(["A", "B", "C"])
+    diplomacy.propose("alliance", "A", "B")
+    diplomacy.propose("alliance", "B", "A")
+    soldiers = np.array([100.0, 200.0, 400.0])
+    # C and then B attack A: B helps A against C, but not against itself
+    support = diplomacy.ally_support(soldiers, np.array([2, 1]), np.array([0, 0]))
+    assert support.tolist() == [200 * diplomacy.config.ALLY_DEFENSE_SHARE, 0]
+
+
+def test_treaties_with_yourself_are_rejected():
+    game_state = GameState(seed=0)
+    player = HumanPlayer("Player", game_state)
+    game_state.initialize_game(player, [HumanPlayer("Neighbor", game_state)])
+    assert player.propose_treaty("Player", "alliance") is None
+    assert not player.cancel_treaty("Player", "alliance")
+    assert not player.pledge_tribute("Player", 10, 10)
+    assert not game_state.diplomacy.alliance.any() and not game_state.diplomacy.pledges
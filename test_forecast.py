@@ -0,0 +1,34 @@
+import numpy as np
+from economy import economy_step
+from forecast import forecast, forecast_entity
+from game_state import GameState
+from human_player import HumanPlayer
+
+PLAN = [300, 0, -100, 10**6, 0, 50, -10**6, 0]
+
+
+def test_forecast_matches_the_game_turn_by_turn():
+    game_state = GameState(seed=0)
+    player = HumanPlayer("Player", game_state)
+    game_state.initialize_game(player, [HumanPlayer("Neighbor", game_state)])
+    result = forecast_entity(player, [PLAN])
+    for turn, amount in enumerate(PLAN):
+        if amount >= 0:
+            player.recruit_soldiers(amount)
+        else:
+            player.dismiss_soldiers(-amount)
+        game_state.update_economy()
+        for name in ('land', 'peasants', 'soldiers', 'net_food'):
+            assert result[name][0, turn] == getattr(player, name), (name, turn)
+    assert result['recruited'][0].tolist() == [300, 0, -100, 0, 0, 50, 0, 0]
+
+
+def test_plans_are_independent_and_match_economy_step():
+    plans = np.array([[0] * 6, [200] * 6])
+    result = forecast(500, 4500, 500, 6500, plans)
+    peasants, soldiers = 4500, 500
+    for turn in range(6):
+        peasants, _, _, net_food = economy_step(500, peasants, soldiers)
+        assert result['peasants'][0, turn] == peasants and result['net_food'][0, turn] == net_food
+    assert (result['soldiers'][0] == 500).all()
+    assert (result['soldiers'][1] > 500).all()
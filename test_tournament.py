@@ -0,0 +1,30 @@
+import numpy as np
+from dataclasses import replace
+from config import DEFAULT_CONFIG
+from game_state import GameState
+from human_player import HumanPlayer
+from tournament import ColumnarResultsWriter, load_results, parse_sweep
+
+
+def test_rerun_into_the_same_directory_replaces_old_parts(tmp_path):
+    out_dir = str(tmp_path)
+    for games in (5, 2):
+        writer = ColumnarResultsWriter(out_dir, rows_per_part=2)
+        for game_id in range(games):
+            writer.append({'game_id': game_id})
+        writer.flush()
+    assert load_results(out_dir)['game_id'].tolist() == [0, 1]
+
+
+def test_power_buckets_come_from_the_config():
+    sweep = parse_sweep(["POWER_BUCKET_THRESHOLDS=0.3:0.6:1.4:2.0,0.1:0.2:5:10"])
+    assert sweep == {'POWER_BUCKET_THRESHOLDS': [(0.3, 0.6, 1.4, 2.0), (0.1, 0.2, 5.0, 10.0)]}
+    relative = []
+    for thresholds in sweep['POWER_BUCKET_THRESHOLDS']:
+        game_state = GameState(seed=0, config=replace(DEFAULT_CONFIG, POWER_BUCKET_THRESHOLDS=thresholds))
+        player, neighbor = HumanPlayer("Player", game_state), HumanPlayer("Neighbor", game_state)
+        game_state.initialize_game(player, [neighbor])
+        neighbor.land *= 3
+        game_state.mark_power_dirty()
+        relative.append(game_state.get_relative_power(neighbor, player))
+    assert relative == ["Overwhelming", "Equal"]
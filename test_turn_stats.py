@@ -0,0 +1,33 @@
+from game_state import GameState
+from scripted_ruler import ScriptedRuler
+from turn_stats import TurnStats, load_histories
+
+
+def play(seed, turns, path):
+    game_state = GameState(seed=seed)
+    rulers = [ScriptedRuler(name, game_state, policy) for name, policy in (("A", "aggressor"), ("B", "turtle"))]
+    game_state.initialize_game(rulers[0], rulers[1:])
+    stats = TurnStats(game_state, path=path, capacity=2)  # Small, so the columns have to grow
+    for _ in range(turns):
+        for ruler in rulers:
+            ruler.take_turn()
+        game_state.resolve_combat()
+        game_state.process_diplomacy()
+        game_state.update_economy()
+        stats.record()
+        game_state.advance_turn()
+    stats.flush()
+    return stats, rulers
+
+
+def test_flushed_histories_read_back(tmp_path):
+    stats, rulers = play(0, 7, str(tmp_path / "game-0"))
+    play(1, 3, str(tmp_path / "game-1"))
+    histories = load_histories(str(tmp_path))
+    assert sorted(histories) == ["game-0", "game-1"]
+    columns = histories["game-0"]
+    assert columns['turn'].tolist() == list(range(1, 8))
+    assert columns['entities'].tolist() == ["A", "B"]
+    assert columns['land'].shape == (7, 2) and columns['land'][-1].tolist() == [ruler.land for ruler in rulers]
+    assert columns['attacks_made'][:, 0].sum() == columns['attacks_received'][:, 1].sum() > 0
+    assert len(histories["game-1"]['turn']) == 3
@@ -0,0 +1,46 @@
+import numpy as np
+from game_state import GameState
+from human_player import HumanPlayer
+from vector_env import ACTION_FIELDS, ATTACK_FORCE, ATTACK_TARGET, RECRUIT, TRIBUTE_TARGET, VectorEnv
+
+# (attacker seat, defender seat, force), in seat order so both draw the battles' dice in the same order
+ATTACKS = [(0, 1, 300), (1, 3, 400), (2, 1, 200), (3, 0, 150)]
+
+
+def no_actions(env):
+    actions = np.zeros((env.num_envs, env.num_seats, len(ACTION_FIELDS)), dtype=np.int64)
+    actions[..., ATTACK_TARGET] = actions[..., TRIBUTE_TARGET] = -1
+    return actions
+
+
+def test_one_game_matches_game_state():
+    game_state = GameState(seed=1)
+    rulers = [HumanPlayer(f"Ruler {seat}", game_state) for seat in range(4)]
+    game_state.initialize_game(rulers[0], rulers[1:])
+    env = VectorEnv(1, 4, seed=1)
+    env.reset()
+    actions = no_actions(env)
+    for seat, ruler in enumerate(rulers):
+        ruler.recruit_soldiers(100)
+        actions[0, seat, RECRUIT] = 100
+    for attacker, defender, force in ATTACKS:
+        rulers[attacker].attack_target(rulers[defender].name, force)
+        actions[0, attacker, ATTACK_TARGET], actions[0, attacker, ATTACK_FORCE] = defender, force
+
+    env.step(actions)
+    game_state.resolve_combat()
+    game_state.update_economy()
+    assert env.land[0].tolist() != [500] * 4  # Some battle was won
+    for name in ("land", "peasants", "soldiers", "net_food"):
+        assert getattr(env, name)[0].tolist() == [getattr(ruler, name) for ruler in rulers], name
+
+
+def test_attacks_outside_the_force_limits_are_skipped():
+    env = VectorEnv(1, 2, seed=0)
+    env.reset()
+    soldiers = env.soldiers[0, 0]
+    for force in (env.config.MIN_ATTACK_FORCE - 1, int(soldiers * 0.8) + 1):
+        actions = no_actions(env)
+        actions[0, 0, ATTACK_TARGET], actions[0, 0, ATTACK_FORCE] = 1, force
+        env.step(actions)
+        assert env.events[0, 1, 3] == 0  # Seat 1 was not attacked
@@ -0,0 +1,25 @@
+from game_state import GameState
+from scripted_ruler import ScriptedRuler
+from world_map import WorldMap
+
+
+def test_generated_maps_are_connected_with_symmetric_reach():
+    for seed in range(20):
+        # Degree 1 leaves islands that have to be bridged
+        world_map = WorldMap.generate(60, degree=1, radius=2, seed=seed)
+        assert (WorldMap.components(world_map.borders) == 0).all()
+        for i in range(len(world_map)):
+            assert i not in world_map.reach(i)
+            for j in world_map.nearby(i):
+                assert world_map.in_reach(j, i)
+                assert world_map.reach(i)[j] <= 2
+
+
+def test_large_map_game_limits_rivals_to_those_in_reach():
+    game_state = GameState(seed=0, large_map=True)
+    rulers = [ScriptedRuler(f"Realm {i}", game_state) for i in range(40)]
+    game_state.initialize_game(rulers[0], rulers[1:])
+    for ruler in rulers:
+        nearby = game_state.nearby(ruler)
+        assert 0 < len(nearby) < len(rulers) - 1
+        assert all(game_state.in_reach(other, ruler) for other in nearby)
@@ -0,0 +1,200 @@
+# Headless tournament and parameter-sweep runner.
+#
+# Every game runs in its own worker process with its own GameConfig and seed,
+# using scripted rulers instead of LLMs. Results stream into a directory of
+# columnar .npz parts as games finish; load_results() stitches them together.
+# With --history, each game's per-turn statistics are also kept (turn_stats).
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace, fields
+import numpy as np
+from game_state import GameState
+from scripted_ruler import ScriptedRuler, POLICIES
+from turn_stats import TurnStats
+from config import *
+
+
+def play_headless(spec):
+    """Play one game to the end (or max_turns) and return a result row"""
+    config = replace(DEFAULT_CONFIG, **spec['overrides'])
+    game_state = GameState(seed=spec['seed'], config=config, large_map=spec.get('large_map', False))
+    rulers = [ScriptedRuler(f"Realm {i}", game_state, policy) for i, policy in enumerate(spec['policies'])]
+    game_state.initialize_game(rulers[0], rulers[1:])
+    history = TurnStats(game_state) if spec.get('history') else None
+
+    battles = 0
+    while True:
+        for ruler in rulers:
+            ruler.reset_turn()
+        for ruler in rulers:
+            ruler.take_turn()
+        battles += len(game_state.combat_queue)
+        game_state.resolve_combat()
+        game_state.process_diplomacy()
+        game_state.update_economy()
+        if history is not None:
+            history.record()
+        if game_state.check_victory_conditions() or game_state.turn >= spec['max_turns']:
+            break
+        game_state.advance_turn()
+
+    if history is not None:
+        history.flush(spec['history'])
+    table = game_state.get_power_table()
+    row = {
+        'game_id': spec['game_id'],
+        'seed': spec['seed'],
+        'turns': game_state.turn,
+        'battles': battles,
+        'winner_seat': int(np.argmax(table['power'])),
+        'game_over': game_state.is_game_over(),
+    }
+    row.update({name: value for name, value in spec['overrides'].items()})
+    for seat, ruler in enumerate(rulers):
+        row[f'power_{seat}'] = float(table['power'][seat])
+        row[f'land_{seat}'] = ruler.land
+        row[f'soldiers_{seat}'] = ruler.soldiers
+    return row
+
+
+def sweep_specs(sweep, games_per_setting, policies, max_turns, base_seed=0, history_dir=None, large_map=False):
+    """One game spec per (setting, repetition) over the cartesian product of the sweep.
+
+    With history_dir, game N writes its per-turn statistics to history_dir/game-N.
+    """
+    names = list(sweep)
+    game_id = 0
+    for values in itertools.product(*(sweep[name] for name in names)):
+        overrides = dict(zip(names, values))
+        for _ in range(games_per_setting):
+            yield {
+                'game_id': game_id,
+                'seed': base_seed + game_id,
+                'overrides': overrides,
+                'policies': policies,
+                'max_turns': max_turns,
+                'large_map': large_map,
+                'history': os.path.join(history_dir, f"game-{game_id:06d}") if history_dir else None,
+            }
+            game_id += 1
+
+
+class ColumnarResultsWriter:
+    """Buffers result rows by column and flushes them as numbered .npz parts.
+
+    Parts left in out_dir by an earlier run are deleted first, so
+    load_results() only ever sees this run's rows.
+    """
+
+    def __init__(self, out_dir, rows_per_part=1000):
+        self.out_dir = out_dir
+        self.rows_per_part = rows_per_part
+        self.columns = {}
+        self.buffered = 0
+        self.parts = 0
+        os.makedirs(out_dir, exist_ok=True)
+        for name in os.listdir(out_dir):
+            if is_part(name):
+                os.remove(os.path.join(out_dir, name))
+
+    def append(self, row):
+        for name, value in row.items():
+            self.columns.setdefault(name, []).append(value)
+        self.buffered += 1
+        if self.buffered >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        path = os.path.join(self.out_dir, f"part-{self.parts:05d}.npz")
+        np.savez(path, **{name: np.asarray(values) for name, values in self.columns.items()})
+        self.columns = {}
+        self.buffered = 0
+        self.parts += 1
+
+
+def is_part(name):
+    return name.startswith("part-") and name.endswith(".npz")
+
+
+def load_results(out_dir):
+    """All parts in a results directory, concatenated column by column"""
+    parts = sorted(name for name in os.listdir(out_dir) if is_part(name))
+    columns = {}
+    for name in parts:
+        with np.load(os.path.join(out_dir, name)) as part:
+            for column in part.files:
+                columns.setdefault(column, []).append(part[column])
+    return {column: np.concatenate(chunks) for column, chunks in columns.items()}
+
+
+def run_tournament(specs, out_dir, workers=None, rows_per_part=1000):
+    """Fan games out over a process pool and stream their rows to out_dir"""
+    specs = list(specs)
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(specs) // (workers * 16))
+    writer = ColumnarResultsWriter(out_dir, rows_per_part)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for row in pool.map(play_headless, specs, chunksize=chunksize):
+            writer.append(row)
+    writer.flush()
+    return len(specs)
+
+
+def parse_sweep(entries):
+    """NAME=v1,v2,... entries into {NAME: [values]} typed like the GameConfig field.
+
+    Values of tuple fields are colon-separated, e.g. POWER_BUCKET_THRESHOLDS=0.3:0.6:1.4:2.0
+    """
+    types = {field.name: field.type for field in fields(GameConfig)}
+    sweep = {}
+    for entry in entries:
+        name, _, values = entry.partition("=")
+        if name not in types:
+            raise SystemExit(f"Unknown config constant {name!r}. Choose from: {', '.join(types)}")
+        if types[name] in (tuple, 'tuple'):
+            cast = type(getattr(DEFAULT_CONFIG, name)[0])
+            sweep[name] = [tuple(cast(item) for item in value.split(":")) for value in values.split(",")]
+            continue
+        cast = float if types[name] in (float, 'float') else int
+        sweep[name] = [cast(value) for value in values.split(",")]
+    return sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many headless Neighbors games across all cores")
+    parser.add_argument("--games", type=int, default=100,
+                       help="Games per sweep setting")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2",
+                       help="Config constant to sweep, e.g. ATTACKER_PENALTY=0.6,0.8,1.0 (repeatable)")
+    parser.add_argument("--policies", default="balanced,aggressor,turtle,random",
+                       help=f"Comma-separated policy per seat, from: {', '.join(POLICIES)}")
+    parser.add_argument("--seats", type=int, default=None,
+                       help="Realms per game, cycling through --policies (default: one per policy)")
+    parser.add_argument("--large-map", action="store_true",
+                       help="Place realms on a generated map; each attacks and trades only within MAP_RADIUS borders")
+    parser.add_argument("--max-turns", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", default="tournament_results", help="Output directory for columnar parts (parts from an earlier run are replaced)")
+    parser.add_argument("--history", default=None, metavar="DIR",
+                       help="Also keep every game's per-turn statistics, one directory of .npy columns per game (load with turn_stats.load_histories)")
+    args = parser.parse_args()
+
+    policies = args.policies.split(",")
+    for policy in policies:
+        if policy not in POLICIES:
+            raise SystemExit(f"Unknown policy {policy!r}")
+    if args.seats:
+        policies = [policies[seat % len(policies)] for seat in range(args.seats)]
+
+    specs = list(sweep_specs(parse_sweep(args.sweep), args.games, policies, args.max_turns, args.seed,
+                             args.history, args.large_map))
+    start = time.perf_counter()
+    count = run_tournament(specs, args.out, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Played {count} games in {elapsed:.1f}s ({count / elapsed:.0f} games/s), results in {args.out}/")
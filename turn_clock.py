@@ -0,0 +1,88 @@
+# Per-turn time limit for the human player, with non-blocking input
+import os
+import selectors
+import sys
+import time
+
+
+class TurnTimeout(Exception):
+    """Raised by TurnClock.input when the turn's time has run out"""
+
+
+class TurnClock:
+    """Reads the player's input through a selector on stdin with a countdown.
+
+    While the player is typing, queued background tasks (neighbors preparing
+    their turn) run one at a time in the same loop. When the time is up,
+    input() raises TurnTimeout; actions already taken this turn stand.
+    On platforms where stdin cannot be selected (Windows), input is read
+    the blocking way and only the deadline check applies.
+    """
+
+    def __init__(self, seconds, tick=1.0):
+        self.seconds = seconds
+        self.tick = tick
+        self.deadline = None
+        self.tasks = []
+        self.pending = b""  # Input read from stdin but not yet returned as a line
+        self.selectable = os.name != 'nt'
+        self.show_countdown = sys.stdout.isatty()
+
+    def start(self, tasks=()):
+        """Start the clock for a new turn, with background tasks to run while waiting"""
+        self.deadline = time.monotonic() + self.seconds
+        self.tasks = list(tasks)
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic()) if self.deadline is not None else float('inf')
+
+    def run_pending_task(self):
+        """Run the next background task, if any; True if one ran"""
+        if not self.tasks:
+            return False
+        task = self.tasks.pop(0)
+        try:
+            task()
+        except Exception as e:
+            print(f"Background task failed: {e}")
+        return True
+
+    def input(self, prompt=""):
+        """Like input(), but gives up when the turn's time runs out"""
+        if self.remaining() <= 0:
+            raise TurnTimeout()
+        if not self.selectable:
+            line = input(prompt)
+            if self.remaining() <= 0:
+                raise TurnTimeout()
+            return line
+
+        # The countdown sits on its own line above the prompt and is redrawn in place
+        print(f"⏳ {self.remaining():.0f}s left this turn")
+        print(prompt, end="", flush=True)
+        shown = int(self.remaining())
+        fd = sys.stdin.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                # Read the raw descriptor ourselves: sys.stdin's buffer would hide lines from the selector
+                if b"\n" in self.pending:
+                    line, self.pending = self.pending.split(b"\n", 1)
+                    return line.decode(errors="replace")
+                remaining = self.remaining()
+                if remaining <= 0:
+                    print("\n⌛ Time is up!")
+                    raise TurnTimeout()
+                # Poll quickly while there is background work, otherwise wake up once per tick
+                timeout = 0 if self.tasks else min(self.tick, remaining)
+                if selector.select(timeout):
+                    data = os.read(fd, 4096)
+                    if not data:
+                        raise EOFError()
+                    self.pending += data
+                    continue
+                self.run_pending_task()
+                if self.show_countdown and int(self.remaining()) != shown:
+                    shown = int(self.remaining())
+                    sys.stdout.write(f"\0337\033[1A\r\033[2K⏳ {shown}s left this turn\0338")
+                    sys.stdout.flush()
@@ -0,0 +1,113 @@
+# Per-turn statistics of every entity, kept as NumPy columns for post-game analysis.
+#
+# A game's history is written as a directory with one .npy file per column,
+# so a dashboard or sweep can np.load(..., mmap_mode="r") thousands of games
+# and only touch the columns (and turns) it reads.
+import os
+import numpy as np
+
+ENTITY_COLUMNS = {
+    'land': np.int64,
+    'peasants': np.int64,
+    'soldiers': np.int64,
+    'food_production': np.int64,
+    'food_consumption': np.int64,
+    'net_food': np.int64,
+    'power': np.float64,
+    'attacks_made': np.int64,
+    'attacks_received': np.int64,
+    'llm_steps': np.int64,  # Chat model calls
+    'llm_seconds': np.float64,  # Time spent in them
+}
+
+
+class TurnStats:
+    """Columns of shape (turns, entities), one row appended per record() call.
+
+    Rows live in preallocated arrays that double when full. record() reads
+    the entities, the last combat batch and any LLM calls the usage log got
+    since the previous record; call it once a turn after the economy update.
+    flush() writes the rows so far, and can be called at any time.
+    """
+
+    def __init__(self, game_state, usage_log=None, path=None, capacity=128):
+        self.game_state = game_state
+        self.usage_log = usage_log
+        self.path = path
+        self.names = [entity.name for entity in game_state.entities]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.rows = 0
+        self.turns = np.zeros(capacity, dtype=np.int64)
+        self.columns = {name: np.zeros((capacity, len(self.names)), dtype=dtype)
+                        for name, dtype in ENTITY_COLUMNS.items()}
+        self.counted_batch = None
+        self.usage_seen = 0
+
+    def __len__(self):
+        return self.rows
+
+    def grow(self):
+        capacity = 2 * len(self.turns)
+        self.turns = np.resize(self.turns, capacity)
+        for name, column in self.columns.items():
+            grown = np.zeros((capacity, column.shape[1]), dtype=column.dtype)
+            grown[:self.rows] = column[:self.rows]
+            self.columns[name] = grown
+
+    def record(self):
+        """Append the current turn's row"""
+        if self.rows == len(self.turns):
+            self.grow()
+        game_state = self.game_state
+        row = self.rows
+        entities = game_state.entities
+        count = len(entities)
+        for name in ('land', 'peasants', 'soldiers', 'food_production', 'food_consumption', 'net_food'):
+            self.columns[name][row] = np.fromiter((getattr(e, name) for e in entities), dtype=np.int64, count=count)
+        self.columns['power'][row] = game_state.get_power_table()['power']
+
+        batch = game_state.last_combat
+        if batch is not None and batch is not self.counted_batch:
+            self.columns['attacks_made'][row] = np.bincount(batch.attackers, minlength=count)
+            self.columns['attacks_received'][row] = np.bincount(batch.defenders, minlength=count)
+            self.counted_batch = batch
+
+        if self.usage_log is not None:
+            with self.usage_log.lock:
+                calls = self.usage_log.rows[self.usage_seen:]
+                self.usage_seen = len(self.usage_log.rows)
+            for call in calls:
+                i = self.index.get(call.get('neighbor'))
+                if i is not None:
+                    self.columns['llm_steps'][row, i] += 1
+                    self.columns['llm_seconds'][row, i] += call['seconds']
+
+        self.turns[row] = game_state.turn
+        self.rows += 1
+
+    def flush(self, path=None):
+        """Write the rows so far as one .npy per column under path; returns path"""
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        arrays = {'turn': self.turns[:self.rows], 'entities': np.array(self.names)}
+        arrays.update((name, column[:self.rows]) for name, column in self.columns.items())
+        for name, array in arrays.items():
+            target = os.path.join(path, f"{name}.npy")
+            np.save(target + ".tmp.npy", array)
+            os.replace(target + ".tmp.npy", target)  # A reader never sees a half-written column
+        return path
+
+
+def load_stats(path, mmap_mode="r"):
+    """A flushed history as {column: array}, memory-mapped by default"""
+    columns = {}
+    for name in os.listdir(path):
+        if name.endswith(".npy") and not name.endswith(".tmp.npy"):
+            columns[name[:-4]] = np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+    return columns
+
+
+def load_histories(root, mmap_mode="r"):
+    """Every game history under root, as {directory name: columns}"""
+    return {name: load_stats(os.path.join(root, name), mmap_mode)
+            for name in sorted(os.listdir(root)) if os.path.isdir(os.path.join(root, name))}
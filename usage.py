@@ -0,0 +1,82 @@
+# Per-call token usage, split into cached and uncached prompt tokens
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+_recorder = ContextVar("neighbors_usage_recorder", default=None)
+register_configure_hook(_recorder, inheritable=True)
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """Callback that adds one row to a UsageLog for every chat model call"""
+
+    def __init__(self, log, **labels):
+        self.log = log
+        self.labels = labels
+        self.started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        seconds = time.perf_counter() - self.started.pop(run_id, time.perf_counter())
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, 'message', None)
+                usage = getattr(message, 'usage_metadata', None) or {}
+                details = usage.get('input_token_details') or {}
+                self.log.add(
+                    model=(message.response_metadata.get('model_name') or message.response_metadata.get('model'))
+                    if message is not None else None,
+                    input_tokens=usage.get('input_tokens', 0),
+                    cached_tokens=details.get('cache_read', 0) or 0,
+                    output_tokens=usage.get('output_tokens', 0),
+                    seconds=seconds,
+                    **self.labels,
+                )
+
+
+class UsageLog:
+    """Token usage of every LLM call, for checking prompt-cache hits.
+
+    cached_tokens is what the provider reports as read from its prompt cache
+    (OpenAI's cached_tokens). Ollama reuses its KV cache silently and only
+    counts the prompt tokens it had to evaluate, so there input_tokens drops
+    instead.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = []
+
+    def add(self, **row):
+        with self.lock:
+            self.rows.append(row)
+
+    @contextmanager
+    def record(self, **labels):
+        """Record every chat model call made inside the block, tagged with labels"""
+        token = _recorder.set(UsageRecorder(self, **labels))
+        try:
+            yield
+        finally:
+            _recorder.reset(token)
+
+    def totals(self):
+        with self.lock:
+            rows = list(self.rows)
+        return {
+            'calls': len(rows),
+            'input_tokens': sum(row['input_tokens'] for row in rows),
+            'cached_tokens': sum(row['cached_tokens'] for row in rows),
+            'output_tokens': sum(row['output_tokens'] for row in rows),
+        }
+
+    def summary(self):
+        totals = self.totals()
+        hit_rate = totals['cached_tokens'] / totals['input_tokens'] if totals['input_tokens'] else 0.0
+        return (f"LLM usage: {totals['calls']} calls, {totals['input_tokens']} prompt tokens "
+                f"({totals['cached_tokens']} cached, {hit_rate:.0%}), {totals['output_tokens']} completion tokens")
@@ -0,0 +1,177 @@
+# Gym-style vectorized environment: many independent games stepped in lockstep.
+#
+# The whole batch lives in (games, seats) NumPy arrays and every rule runs
+# vectorized across it, reusing the game's own combat and economy functions,
+# so cheap policies can be trained and evaluated at high throughput.
+# Diplomacy (treaties, trust, pledges) is not modelled here.
+import numpy as np
+from combat import resolve_battles
+from economy import economy_step, food_balance
+from config import *
+
+# Columns of an encoded action, one row per seat; targets are seat numbers, -1 for none
+ACTION_FIELDS = ("recruit", "dismiss", "attack_target", "attack_force", "tribute_target", "tribute_land", "tribute_peasants")
+RECRUIT, DISMISS, ATTACK_TARGET, ATTACK_FORCE, TRIBUTE_TARGET, TRIBUTE_LAND, TRIBUTE_PEASANTS = range(len(ACTION_FIELDS))
+
+# Columns of an observation, one row per seat
+OBSERVATION_FIELDS = (
+    "land", "peasants", "soldiers", "net_food", "power_share", "relative_power",
+    "land_change", "peasant_change", "soldier_change", "attacks_received", "attacks_won", "defenses_won",
+)
+
+
+class VectorEnv:
+    """num_envs games of num_seats rulers each, all controlled through step().
+
+    step(actions) takes an int array (num_envs, num_seats, len(ACTION_FIELDS))
+    and returns (observations, rewards, dones, info):
+
+    - observations: float32 (num_envs, num_seats, len(OBSERVATION_FIELDS)),
+      resources scaled by the starting values, each seat's share of total
+      power, its power relative to seat 0, and what happened last turn
+    - rewards: float32 (num_envs, num_seats), change in each seat's share of
+      all land
+    - dones: bool (num_envs,), is_game_over() from seat 0's point of view,
+      or max_turns reached
+
+    Actions follow the game's rules (including the attack force limits of
+    ActionHandler.attack_limits) and are skipped when the game would refuse
+    them. Finished games reset automatically; their last
+    observation is in info['final_observations'].
+    """
+
+    def __init__(self, num_envs, num_seats=MAX_NEIGHBORS + 1, config=DEFAULT_CONFIG, seed=None, max_turns=200):
+        self.num_envs = num_envs
+        self.num_seats = num_seats
+        self.config = config
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+        shape = (num_envs, num_seats)
+        self.land = np.zeros(shape, dtype=np.int64)
+        self.peasants = np.zeros(shape, dtype=np.int64)
+        self.soldiers = np.zeros(shape, dtype=np.int64)
+        self.net_food = np.zeros(shape, dtype=np.int64)
+        self.turns = np.zeros(num_envs, dtype=np.int64)
+        self.events = np.zeros((num_envs, num_seats, 6), dtype=np.float32)
+        # Flat seat ids of every (game, seat) pair, for resolving all battles as one batch
+        self.flat_ids = np.arange(num_envs * num_seats).reshape(shape)
+
+    def reset(self, mask=None):
+        """Reset all games (or those where mask is True); returns observations"""
+        mask = np.ones(self.num_envs, dtype=bool) if mask is None else mask
+        config = self.config
+        self.land[mask] = config.STARTING_LAND
+        self.peasants[mask] = config.STARTING_PEASANTS
+        self.soldiers[mask] = config.STARTING_SOLDIERS
+        self.net_food[mask] = food_balance(config.STARTING_PEASANTS, config.STARTING_SOLDIERS, config)[2]
+        self.turns[mask] = 1
+        self.events[mask] = 0
+        return self.observe()
+
+    def observe(self):
+        config = self.config
+        power = (self.peasants + self.soldiers * 2) * self.land / 1000
+        total_power = power.sum(axis=1, keepdims=True)
+        observations = np.empty((self.num_envs, self.num_seats, len(OBSERVATION_FIELDS)), dtype=np.float32)
+        observations[..., 0] = self.land / config.STARTING_LAND
+        observations[..., 1] = self.peasants / config.STARTING_PEASANTS
+        observations[..., 2] = self.soldiers / config.STARTING_SOLDIERS
+        observations[..., 3] = self.net_food / max(config.STARTING_PEASANTS * config.FOOD_PER_PEASANT, 1)
+        observations[..., 4] = np.divide(power, total_power, out=np.zeros_like(power), where=total_power > 0)
+        observations[..., 5] = np.divide(power, power[:, :1], out=np.zeros_like(power), where=power[:, :1] > 0)
+        observations[..., 6:] = self.events
+        return observations
+
+    def land_share(self):
+        total = self.land.sum(axis=1, keepdims=True)
+        return np.divide(self.land, total, out=np.zeros(self.land.shape), where=total > 0)
+
+    def step(self, actions):
+        config = self.config
+        actions = np.asarray(actions, dtype=np.int64)
+        seats = np.arange(self.num_seats)
+        share_before = self.land_share()
+        land_before, peasants_before, soldiers_before = self.land.copy(), self.peasants.copy(), self.soldiers.copy()
+
+        # Recruit and dismiss: all or nothing, like HumanPlayer
+        recruit = actions[..., RECRUIT]
+        ok = (recruit > 0) & (self.peasants >= recruit) & (self.net_food >= recruit * config.FOOD_PER_SOLDIER)
+        recruit = np.where(ok, recruit, 0)
+        self.peasants -= recruit
+        self.soldiers += recruit
+        dismiss = actions[..., DISMISS]
+        dismiss = np.where((dismiss > 0) & (self.soldiers >= dismiss), dismiss, 0)
+        self.soldiers -= dismiss
+        self.peasants += dismiss
+
+        # Tribute, checked against each sender's own resources
+        target = actions[..., TRIBUTE_TARGET]
+        land_sent, peasants_sent = actions[..., TRIBUTE_LAND], actions[..., TRIBUTE_PEASANTS]
+        ok = ((target >= 0) & (target < self.num_seats) & (target != seats)
+              & (land_sent >= 0) & (peasants_sent >= 0) & ((land_sent > 0) | (peasants_sent > 0))
+              & (land_sent <= self.land) & (peasants_sent <= self.peasants))
+        games, senders = np.nonzero(ok)
+        receivers = target[games, senders]
+        np.add.at(self.land, (games, senders), -land_sent[games, senders])
+        np.add.at(self.land, (games, receivers), land_sent[games, senders])
+        np.add.at(self.peasants, (games, senders), -peasants_sent[games, senders])
+        np.add.at(self.peasants, (games, receivers), peasants_sent[games, senders])
+
+        # Attacks, all games resolved as one simultaneous batch
+        target, force = actions[..., ATTACK_TARGET], actions[..., ATTACK_FORCE]
+        # Same limits as ActionHandler.attack_limits: at least MIN_ATTACK_FORCE, at most 80% of the army
+        max_force = np.minimum(self.soldiers, (self.soldiers * 0.8).astype(np.int64))
+        ok = ((target >= 0) & (target < self.num_seats) & (target != seats)
+              & (force >= config.MIN_ATTACK_FORCE) & (force <= max_force))
+        games, attacking = np.nonzero(ok)
+        attackers = self.flat_ids[games, attacking]
+        defenders = self.flat_ids[games, target[games, attacking]]
+        land, peasants, soldiers, outcome = resolve_battles(
+            self.land.ravel(), self.peasants.ravel(), self.soldiers.ravel(),
+            attackers, defenders, force[games, attacking], self.rng, config=config,
+        )
+        shape = self.land.shape
+        self.land, self.peasants, self.soldiers = land.reshape(shape), peasants.reshape(shape), soldiers.reshape(shape)
+        size = self.num_envs * self.num_seats
+        won = outcome['attacker_won']
+        attacks_received = np.bincount(defenders, minlength=size).reshape(shape)
+        attacks_won = np.bincount(attackers, weights=won, minlength=size).reshape(shape)
+        defenses_won = np.bincount(defenders, weights=~won, minlength=size).reshape(shape)
+
+        # End of turn economy
+        self.peasants, _, _, self.net_food = economy_step(self.land, self.peasants, self.soldiers, config)
+
+        self.events[..., 0] = (self.land - land_before) / config.STARTING_LAND
+        self.events[..., 1] = (self.peasants - peasants_before) / config.STARTING_PEASANTS
+        self.events[..., 2] = (self.soldiers - soldiers_before) / config.STARTING_SOLDIERS
+        self.events[..., 3] = attacks_received
+        self.events[..., 4] = attacks_won
+        self.events[..., 5] = defenses_won
+
+        rewards = (self.land_share() - share_before).astype(np.float32)
+        dones = self.game_over() | (self.turns >= self.max_turns)
+        observations = self.observe()
+        info = {'turns': self.turns.copy()}
+        self.turns += 1
+        if dones.any():
+            info['final_observations'] = observations[dones]
+            observations = self.reset(dones)
+        return observations, rewards, dones, info
+
+    def game_over(self):
+        """GameState.is_game_over for every game, with seat 0 as the player"""
+        total_land = self.land.sum(axis=1)
+        player_land = self.land[:, 0]
+        return (self.peasants[:, 0] <= 0) | (player_land <= 0) | (player_land >= total_land * 0.9)
+
+    def sample_actions(self, attack_rate=0.2):
+        """Random legal-looking actions for every seat, e.g. for smoke tests and baselines"""
+        actions = np.zeros((self.num_envs, self.num_seats, len(ACTION_FIELDS)), dtype=np.int64)
+        affordable = np.minimum(self.peasants, np.maximum(self.net_food, 0) // self.config.FOOD_PER_SOLDIER)
+        actions[..., RECRUIT] = (self.rng.random(affordable.shape) * (affordable + 1)).astype(np.int64)
+        attacking = self.rng.random(affordable.shape) < attack_rate
+        offset = self.rng.integers(1, self.num_seats, size=affordable.shape)
+        actions[..., ATTACK_TARGET] = np.where(attacking, (np.arange(self.num_seats) + offset) % self.num_seats, -1)
+        actions[..., ATTACK_FORCE] = (self.soldiers * self.rng.uniform(0.3, 0.8, size=affordable.shape)).astype(np.int64)
+        actions[..., TRIBUTE_TARGET] = -1
+        return actions
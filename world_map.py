@@ -0,0 +1,93 @@
+# Large-map mode: realms placed on a generated map, interacting only with those nearby
+from collections import deque
+import numpy as np
+
+
+class WorldMap:
+    """Realms as nodes of an adjacency graph (realm i is entity i).
+
+    Two realms are in reach when at most radius borders apart. Each realm's
+    reach is found with a breadth-first search bounded by radius the first
+    time it is asked for and then cached, so its cost depends on the size
+    of the neighborhood, not of the world.
+    """
+
+    def __init__(self, borders, radius=2, positions=None):
+        self.borders = [sorted(set(adjacent)) for adjacent in borders]
+        self.radius = radius
+        self.positions = positions
+        self._reach = {}
+
+    def __len__(self):
+        return len(self.borders)
+
+    @classmethod
+    def generate(cls, count, degree=4, radius=2, seed=None):
+        """Realms scattered over a square, each bordering its degree nearest; connected"""
+        rng = np.random.default_rng(seed)
+        positions = rng.random((count, 2))
+        distances = np.linalg.norm(positions[:, None] - positions[None, :], axis=-1)
+        np.fill_diagonal(distances, np.inf)
+        degree = min(degree, count - 1)
+        borders = [set() for _ in range(count)]
+        if degree > 0:
+            nearest = np.argpartition(distances, degree - 1, axis=1)[:, :degree]
+            for i, row in enumerate(nearest):
+                for j in row:
+                    borders[i].add(int(j))
+                    borders[int(j)].add(i)
+
+        # Nearest-neighbor graphs can fall apart into islands: bridge each to the mainland
+        component = cls.components(borders)
+        while component.max() > 0:
+            mainland, island = component == 0, component == 1
+            gaps = distances[np.ix_(island, mainland)]
+            i, j = np.unravel_index(np.argmin(gaps), gaps.shape)
+            a, b = int(np.flatnonzero(island)[i]), int(np.flatnonzero(mainland)[j])
+            borders[a].add(b)
+            borders[b].add(a)
+            component = cls.components(borders)
+        return cls(borders, radius, positions)
+
+    @staticmethod
+    def components(borders):
+        """Connected component number of each node, 0 for the one containing node 0"""
+        component = np.full(len(borders), -1, dtype=np.int64)
+        label = 0
+        for start in range(len(borders)):
+            if component[start] >= 0:
+                continue
+            component[start] = label
+            pending = [start]
+            while pending:
+                for j in borders[pending.pop()]:
+                    if component[j] < 0:
+                        component[j] = label
+                        pending.append(j)
+            label += 1
+        return component
+
+    def reach(self, i):
+        """{realm: borders away} for every other realm within radius of realm i"""
+        if i not in self._reach:
+            hops = {i: 0}
+            pending = deque([i])
+            while pending:
+                node = pending.popleft()
+                if hops[node] == self.radius:
+                    continue
+                for j in self.borders[node]:
+                    if j not in hops:
+                        hops[j] = hops[node] + 1
+                        pending.append(j)
+            del hops[i]
+            self._reach[i] = hops
+        return self._reach[i]
+
+    def nearby(self, i):
+        """Realms in reach of realm i, closest first"""
+        hops = self.reach(i)
+        return sorted(hops, key=lambda j: (hops[j], j))
+
+    def in_reach(self, i, j):
+        return j in self.reach(i)